@@ -5,6 +5,14 @@ set -e
 
 echo "Starting deployment process..."
 
+# Run every step below in one Django process, skipping migrate and
+# collectstatic when nothing changed (projects/management/commands/boot.py)
+if [ "${FAST_BOOT:-true}" = "true" ]; then
+    python manage.py boot
+    echo "Deployment process completed successfully!"
+    exit 0
+fi
+
 # Wait for database to be ready
 echo "Waiting for database..."
 python manage.py wait_for_db || echo "Database connection check failed, continuing..."
@@ -17,6 +25,14 @@ python manage.py migrate --noinput
 echo "Collecting static files..."
 python manage.py collectstatic --noinput
 
+# Precompute the project read model
+echo "Rebuilding project read model..."
+python manage.py rebuild_read_model
+
+# Pre-render the static API snapshot (served when API_SNAPSHOT=true)
+echo "Exporting API snapshot..."
+python manage.py export_api_snapshot --prune
+
 # Create superuser if it doesn't exist
 echo "Creating superuser..."
 python manage.py shell << EOF
@@ -1,8 +1,20 @@
 # Gunicorn configuration file for production deployment
 
+import os
+
+# SERVER_MODE=wsgi runs sync workers; SERVER_MODE=asgi runs uvicorn workers
+# serving the async read views (keep it in sync with Django's SERVER_MODE)
+server_mode = os.environ.get("SERVER_MODE", "wsgi")
+
 bind = "0.0.0.0:8000"
-workers = 2
-worker_class = "sync"
+# WEB_CONCURRENCY also sizes the per-worker database pool (portfolio/database.py)
+workers = int(os.environ.get("WEB_CONCURRENCY", 2))
+if server_mode == "asgi":
+    wsgi_app = "portfolio.asgi:application"
+    worker_class = "uvicorn_worker.UvicornWorker"
+else:
+    wsgi_app = "portfolio.wsgi:application"
+    worker_class = "sync"
 worker_connections = 1000
 max_requests = 1000
 max_requests_jitter = 100
@@ -27,6 +39,21 @@ user = None
 group = None
 tmp_upload_dir = None
 
+# Prometheus multi-process metrics: each worker writes to PROMETHEUS_MULTIPROC_DIR
+def on_starting(server):
+    metrics_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if metrics_dir:
+        os.makedirs(metrics_dir, exist_ok=True)
+        for name in os.listdir(metrics_dir):
+            os.remove(os.path.join(metrics_dir, name))
+
+
+def child_exit(server, worker):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
+
 # SSL (uncomment for HTTPS)
 # keyfile = "/path/to/keyfile"
 # certfile = "/path/to/certfile"
@@ -0,0 +1,69 @@
+"""
+Connection management for ``DATABASES['default']``.
+
+``DB_CONNECTION_MODE`` selects how worker processes talk to PostgreSQL:
+
+* ``persistent`` (default): each worker keeps its connection open for
+  ``DB_CONN_MAX_AGE`` seconds and checks it is still usable before reuse.
+* ``pool``: a psycopg 3 connection pool per worker (needs
+  ``psycopg[binary,pool]`` installed). The ``DB_MAX_CONNECTIONS`` budget is
+  split across the ``WEB_CONCURRENCY`` gunicorn workers.
+* ``pgbouncer``: persistent connections to a pgbouncer running in
+  transaction pooling mode, so server-side cursors are disabled.
+"""
+import importlib.util
+
+import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
+
+CONNECTION_MODES = ('persistent', 'pool', 'pgbouncer')
+
+
+def pool_size(max_connections, workers):
+    """Per-worker pool ``(min_size, max_size)`` for a total connection budget"""
+    max_size = max(1, max_connections // max(1, workers))
+    return min(2, max_size), max_size
+
+
+def database_config(url, mode='persistent', conn_max_age=600, max_connections=20,
+                    workers=2, pool_timeout=10.0, server_mode='wsgi'):
+    """Return the ``DATABASES['default']`` dict for ``url`` in ``mode``"""
+    if mode not in CONNECTION_MODES:
+        raise ImproperlyConfigured(
+            f'DB_CONNECTION_MODE must be one of {", ".join(CONNECTION_MODES)}, not {mode!r}'
+        )
+    # Django only closes persistent connections at the end of a request
+    # from the thread that opened them, which ASGI doesn't guarantee
+    if server_mode == 'asgi':
+        conn_max_age = 0
+
+    if mode == 'pool':
+        config = dj_database_url.parse(url, conn_max_age=0)
+        if config['ENGINE'] != 'django.db.backends.postgresql':
+            return config
+        if importlib.util.find_spec('psycopg_pool') is None:
+            raise ImproperlyConfigured(
+                "DB_CONNECTION_MODE='pool' requires psycopg 3: pip install 'psycopg[binary,pool]'"
+            )
+        min_size, max_size = pool_size(max_connections, workers)
+        config.setdefault('OPTIONS', {})['pool'] = {
+            'min_size': min_size,
+            'max_size': max_size,
+            'timeout': pool_timeout,
+        }
+        return config
+
+    # Transaction pooling hands each transaction to any server connection,
+    # so pgbouncer can't keep cursors open across transactions
+    return dj_database_url.parse(
+        url,
+        conn_max_age=conn_max_age,
+        conn_health_checks=True,
+        disable_server_side_cursors=mode == 'pgbouncer',
+    )
+
+
+def pool_stats(connection):
+    """Return the psycopg pool statistics of ``connection``, or None if unpooled"""
+    pool = connection.pool if connection.vendor == 'postgresql' else None
+    return pool.get_stats() if pool is not None else None
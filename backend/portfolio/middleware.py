@@ -0,0 +1,109 @@
+"""
+Path-scoped middleware for the public API.
+
+The read-only views under ``/api/`` are ``AllowAny`` JSON endpoints: they
+never read the session, ``request.user``, CSRF tokens or messages. The
+classes here are the stock Django middleware, subclassed so that safe-method
+requests under ``LEAN_API_PREFIX`` pass straight through them while
+``LEAN_API_MIDDLEWARE`` is on. Those requests keep CORS, the security
+headers and compression; everything else, the admin in particular, keeps
+the full stack. Being subclasses, they still satisfy the admin's system
+checks for the stock middleware.
+
+``WhiteNoiseMiddleware`` is WhiteNoise's middleware made async-capable.
+WhiteNoise only supports WSGI, and a single sync-only middleware makes
+Django run the rest of the chain, async views included, in a thread
+under ASGI; this one stays on the event loop and only serves the static
+files themselves in a thread. It also leaves the API snapshot's files to
+``projects.snapshot``, since exports delete them while the server runs.
+"""
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.utils.module_loading import import_string
+from whitenoise import middleware as whitenoise
+
+from projects.snapshot import SNAPSHOT_DIR
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def is_lean(request):
+    """Whether ``request`` skips the session, CSRF, auth and messages middleware"""
+    return (
+        settings.LEAN_API_MIDDLEWARE
+        and request.method in SAFE_METHODS
+        and request.path_info.startswith(settings.LEAN_API_PREFIX)
+    )
+
+
+def lean(path):
+    """Subclass middleware ``path`` so that lean requests bypass it"""
+    base = import_string(path)
+
+    def __call__(self, request):
+        if is_lean(request):
+            # A coroutine under ASGI, which the caller awaits either way
+            return self.get_response(request)
+        return base.__call__(self, request)
+
+    namespace = {
+        '__call__': __call__,
+        '__module__': __name__,
+        '__doc__': f'``{path}`` except for lean API requests',
+    }
+    if hasattr(base, 'process_view'):
+        def process_view(self, request, *args):
+            if not is_lean(request):
+                return base.process_view(self, request, *args)
+        namespace['process_view'] = process_view
+    if hasattr(base, 'process_exception'):
+        def process_exception(self, request, exception):
+            if not is_lean(request):
+                return base.process_exception(self, request, exception)
+        namespace['process_exception'] = process_exception
+    return type(base.__name__, (base,), namespace)
+
+
+SessionMiddleware = lean('django.contrib.sessions.middleware.SessionMiddleware')
+CsrfViewMiddleware = lean('django.middleware.csrf.CsrfViewMiddleware')
+AuthenticationMiddleware = lean('django.contrib.auth.middleware.AuthenticationMiddleware')
+MessageMiddleware = lean('django.contrib.messages.middleware.MessageMiddleware')
+
+
+class WhiteNoiseMiddleware(whitenoise.WhiteNoiseMiddleware):
+    """WhiteNoise's middleware, also usable in an async middleware chain"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, **kwargs):
+        super().__init__(get_response, **kwargs)
+        self.snapshot_prefix = f'{self.static_prefix}{SNAPSHOT_DIR}/'
+        self.files = {
+            url: static_file for url, static_file in self.files.items()
+            if not url.startswith(self.snapshot_prefix)
+        }
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    def find_file(self, url):
+        # With autorefresh (DEBUG) files are looked up per request instead
+        if url.startswith(self.snapshot_prefix):
+            return None
+        return super().find_file(url)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            # Opens and stats the file
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
@@ -0,0 +1,183 @@
+"""
+Primary/replica database routing.
+
+Each URL in ``DATABASE_REPLICA_URLS`` becomes a ``replica_<n>`` alias.
+Safe-method ``/api/`` requests read from a healthy replica picked at
+random; everything else (the admin, writes, management commands) uses the
+primary. Reads stick to the primary:
+
+* for the rest of a request or command once it has written anything, and
+* everywhere for ``REPLICA_STICKY_SECONDS`` after a project or resume
+  change, so readers (and the caches they fill) see the write despite
+  replication lag.
+
+A replica that fails to connect, or fails a query, is skipped for
+``REPLICA_RETRY_SECONDS``; a request whose replica query failed is
+answered again from the primary.
+"""
+import contextvars
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.db.utils import OperationalError
+from django.dispatch import receiver
+
+PRIMARY = 'default'
+PINNED_KEY = 'db:primary-pinned'
+
+# Whether reads in the current request may go to a replica
+_use_replicas = contextvars.ContextVar('use_replicas', default=False)
+# The current request's ReplicaFailures
+_failures = contextvars.ContextVar('replica_failures', default=None)
+
+
+class ReplicaHealth:
+    """Per-process record of replicas that recently failed to connect"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._down_until = {}
+
+    def is_up(self, alias):
+        if time.monotonic() < self._down_until.get(alias, 0):
+            return False
+        try:
+            connections[alias].ensure_connection()
+        except OperationalError:
+            self.mark_down(alias)
+            return False
+        return True
+
+    def mark_down(self, alias):
+        with self._lock:
+            self._down_until[alias] = time.monotonic() + settings.REPLICA_RETRY_SECONDS
+
+    def reset(self):
+        with self._lock:
+            self._down_until.clear()
+
+
+health = ReplicaHealth()
+
+
+def pin_primary():
+    """Send every process's reads to the primary for ``REPLICA_STICKY_SECONDS``"""
+    if settings.DATABASE_REPLICAS:
+        cache.set(PINNED_KEY, True, settings.REPLICA_STICKY_SECONDS)
+
+
+def primary_pinned():
+    return bool(settings.DATABASE_REPLICAS) and cache.get(PINNED_KEY, False)
+
+
+async def aprimary_pinned():
+    return bool(settings.DATABASE_REPLICAS) and await cache.aget(PINNED_KEY, False)
+
+
+class PrimaryReplicaRouter:
+    """Route reads to the replicas in ``DATABASE_REPLICAS`` when allowed"""
+
+    def db_for_read(self, model, **hints):
+        if not _use_replicas.get():
+            return PRIMARY
+        replicas = [alias for alias in settings.DATABASE_REPLICAS if health.is_up(alias)]
+        return random.choice(replicas) if replicas else PRIMARY
+
+    def db_for_write(self, model, **hints):
+        # Read your own writes for the rest of the request
+        _use_replicas.set(False)
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {PRIMARY, *settings.DATABASE_REPLICAS}
+        return obj1._state.db in aliases and obj2._state.db in aliases
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
+
+
+class ReplicaFailures:
+    """Whether a replica query failed while handling the current request"""
+
+    def __init__(self):
+        self.failed = False
+
+
+def record_failure(execute, sql, params, many, context):
+    """``connection.execute_wrapper()`` hook marking down replicas whose queries fail"""
+    try:
+        return execute(sql, params, many, context)
+    except OperationalError:
+        health.mark_down(context['connection'].alias)
+        failures = _failures.get()
+        if failures is not None:
+            failures.failed = True
+        raise
+
+
+@receiver(connection_created)
+def install_failure_hook(sender, connection, **kwargs):
+    # Once per connection: under ASGI the queries run in worker threads,
+    # each with its own connections, that the middleware never sees
+    wrappers = connection.execute_wrappers
+    if connection.alias in settings.DATABASE_REPLICAS and record_failure not in wrappers:
+        wrappers.append(record_failure)
+
+
+@contextmanager
+def replica_reads(enabled):
+    """Let the reads inside the block use replicas when ``enabled``; yields their failures"""
+    failures = ReplicaFailures()
+    tokens = _use_replicas.set(enabled), _failures.set(failures)
+    try:
+        yield failures
+    finally:
+        _use_replicas.reset(tokens[0])
+        _failures.reset(tokens[1])
+
+
+class ReplicaRoutingMiddleware:
+    """Let safe-method API requests read from replicas unless the primary is pinned"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        with replica_reads(self.may_use_replicas(request) and not primary_pinned()) as failures:
+            response = self.get_response(request)
+        if failures.failed:
+            # Only safe methods read from replicas, so the request can be repeated
+            with replica_reads(False):
+                response = self.get_response(request)
+        return response
+
+    async def __acall__(self, request):
+        enabled = self.may_use_replicas(request) and not await aprimary_pinned()
+        with replica_reads(enabled) as failures:
+            response = await self.get_response(request)
+        if failures.failed:
+            with replica_reads(False):
+                response = await self.get_response(request)
+        return response
+
+    def may_use_replicas(self, request):
+        return (
+            bool(settings.DATABASE_REPLICAS)
+            and request.method in ('GET', 'HEAD', 'OPTIONS')
+            and request.path_info.startswith('/api/')
+        )
@@ -5,10 +5,8 @@ Django settings for portfolio project.
 from pathlib import Path
 import environ
 import os
-import dj_database_url
+from .database import database_config
 import cloudinary
-import cloudinary.uploader
-import cloudinary.api
 
 env = environ.Env(
     DEBUG=(bool, False),
@@ -18,6 +16,12 @@ env = environ.Env(
     SECURE_HSTS_PRELOAD=(bool, False),
     SESSION_COOKIE_SECURE=(bool, False),
     CSRF_COOKIE_SECURE=(bool, False),
+    SERVER_MODE=(str, 'wsgi'),
+    DB_CONNECTION_MODE=(str, 'persistent'),
+    DB_CONN_MAX_AGE=(int, 600),
+    DB_MAX_CONNECTIONS=(int, 20),
+    DB_POOL_TIMEOUT=(float, 10.0),
+    WEB_CONCURRENCY=(int, 2),
 )
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -35,6 +39,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'corsheaders',
     'projects',
@@ -42,19 +47,28 @@ INSTALLED_APPS = [
     'cloudinary',
 ]
 
+# Every middleware here is async-capable, so under ASGI requests reach the
+# async views without a thread hop
 MIDDLEWARE = [
+    'projects.instrumentation.PerformanceMiddleware',
+    'portfolio.routers.ReplicaRoutingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'portfolio.middleware.WhiteNoiseMiddleware',
+    'portfolio.middleware.SessionMiddleware',
     'django.middleware.gzip.GZipMiddleware',
     'django.middleware.common.CommonMiddleware',
-    'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
+    'portfolio.middleware.CsrfViewMiddleware',
+    'portfolio.middleware.AuthenticationMiddleware',
+    'portfolio.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Safe-method requests under LEAN_API_PREFIX skip the session, CSRF, auth
+# and messages middleware (portfolio/middleware.py); the admin keeps them
+LEAN_API_MIDDLEWARE = env.bool('LEAN_API_MIDDLEWARE', default=True)
+LEAN_API_PREFIX = '/api/'
+
 ROOT_URLCONF = 'portfolio.urls'
 
 TEMPLATES = [
@@ -74,12 +88,44 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'portfolio.wsgi.application'
+ASGI_APPLICATION = 'portfolio.asgi.application'
+
+# 'wsgi' (sync gunicorn workers) or 'asgi' (uvicorn workers + async read views).
+# Must match the SERVER_MODE gunicorn.conf.py is started with.
+SERVER_MODE = env('SERVER_MODE')
+if SERVER_MODE not in ('wsgi', 'asgi'):
+    raise ValueError(f"SERVER_MODE must be 'wsgi' or 'asgi', not {SERVER_MODE!r}")
 
 # Database
+# DB_CONNECTION_MODE: 'persistent', 'pool' (psycopg 3) or 'pgbouncer', see
+# portfolio/database.py. DB_MAX_CONNECTIONS is the budget shared by the
+# WEB_CONCURRENCY gunicorn workers in pool mode.
+DATABASE_CONNECTION = dict(
+    mode=env('DB_CONNECTION_MODE'),
+    conn_max_age=env('DB_CONN_MAX_AGE'),
+    max_connections=env('DB_MAX_CONNECTIONS'),
+    workers=env('WEB_CONCURRENCY'),
+    pool_timeout=env('DB_POOL_TIMEOUT'),
+    server_mode=SERVER_MODE,
+)
 DATABASES = {
-    'default': dj_database_url.parse(env('DATABASE_URL'))
+    'default': database_config(env('DATABASE_URL'), **DATABASE_CONNECTION)
 }
 
+# Read replicas (portfolio/routers.py): safe-method /api/ requests read from
+# a random healthy replica, everything else uses the primary
+DATABASE_REPLICAS = []
+for index, url in enumerate(env.list('DATABASE_REPLICA_URLS', default=[])):
+    alias = f'replica_{index}'
+    DATABASES[alias] = database_config(url, **DATABASE_CONNECTION)
+    DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+    DATABASE_REPLICAS.append(alias)
+DATABASE_ROUTERS = ['portfolio.routers.PrimaryReplicaRouter']
+# Seconds reads stay on the primary after a project/resume change
+REPLICA_STICKY_SECONDS = env.int('REPLICA_STICKY_SECONDS', default=5)
+# Seconds an unreachable replica is skipped before being retried
+REPLICA_RETRY_SECONDS = env.int('REPLICA_RETRY_SECONDS', default=30)
+
 # Redis cache
 CACHES = {
     'default': {
@@ -94,6 +140,25 @@ CACHES = {
 SESSION_ENGINE = 'django.contrib.sessions.backends.cache'
 SESSION_CACHE_ALIAS = 'default'
 CACHE_TTL = 60 * 15  # 15 minutes
+# Stampede protection for the response cache (projects/cache.py): a miss is
+# recomputed by one request holding a lock for up to CACHE_LOCK_TIMEOUT
+# seconds; the others get the previous body (kept for CACHE_STALE_TTL) or
+# wait up to CACHE_LOCK_WAIT seconds for the new one. Higher
+# CACHE_EARLY_REFRESH_BETA refreshes hot entries earlier before they expire.
+CACHE_LOCK_TIMEOUT = 10
+CACHE_LOCK_WAIT = 2
+CACHE_STALE_TTL = 60 * 60 * 24
+CACHE_EARLY_REFRESH_BETA = 1.0
+# Per-worker LRU in front of Redis for generations, response entries and
+# read-model documents, cleared through Redis pub/sub on every change.
+# L1_CACHE_TTL bounds staleness if an invalidation is ever missed; set
+# L1_CACHE_SIZE to 0 to disable it.
+L1_CACHE_SIZE = env.int('L1_CACHE_SIZE', default=1024)
+L1_CACHE_TTL = env.int('L1_CACHE_TTL', default=30)
+# Lifetime of the read-model documents (projects/read_model.py). They are
+# rebuilt on every change; the TTL bounds a missed rebuild and clears the
+# documents of superseded generations.
+READ_MODEL_TTL = 60 * 60 * 24
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -113,6 +178,15 @@ USE_TZ = True
 STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# Content-hashed names (collectstatic's and the API snapshot's) never change
+WHITENOISE_IMMUTABLE_FILE_TEST = r'^.+\.[0-9a-f]{12}\..+$'
+# CorsMiddleware answers for static files too, with CORS_ALLOWED_ORIGINS
+WHITENOISE_ALLOW_ALL_ORIGINS = False
+
+# Serve the read-only API routes from the static JSON snapshot written to
+# STATIC_ROOT/api/ by export_api_snapshot (projects/snapshot.py)
+API_SNAPSHOT = env.bool('API_SNAPSHOT', default=False)
+API_SNAPSHOT_MAX_AGE = env.int('API_SNAPSHOT_MAX_AGE', default=60)
 
 # ✅ Cloudinary (used for ALL media uploads, both dev & prod)
 cloudinary.config(
@@ -124,6 +198,22 @@ cloudinary.config(
 
 DEFAULT_FILE_STORAGE = 'cloudinary_storage.storage.MediaCloudinaryStorage'
 
+# Per-process LRU of built Cloudinary URLs (projects/media.py)
+CLOUDINARY_URL_CACHE_SIZE = 4096
+# Widths of the responsive image variants returned as image_srcset
+CLOUDINARY_RESPONSIVE_WIDTHS = [320, 640, 960, 1280]
+# Time-limited resume download links (projects/media.py): valid for
+# SIGNED_URL_TTL seconds, reused until SIGNED_URL_REFRESH seconds before
+# they expire, which also bounds how long browsers and the CDN may cache
+# them. 'projects.media.LocalURLSigner' signs locally instead of Cloudinary.
+SIGNED_URL_BACKEND = env('SIGNED_URL_BACKEND', default='projects.media.CloudinaryURLSigner')
+SIGNED_URL_TTL = env.int('SIGNED_URL_TTL', default=3600)
+SIGNED_URL_REFRESH = 300
+# Token authentication key of the Cloudinary account; expires the named
+# resume links of authenticated and private files
+CLOUDINARY_AUTH_TOKEN_KEY = env('CLOUDINARY_AUTH_TOKEN_KEY', default='')
+RESUME_DOWNLOAD_FILENAME = 'Siri_Tech_Resume.pdf'
+
 CLOUDINARY_STORAGE = {
     'CLOUD_NAME': env('CLOUDINARY_CLOUD_NAME'),
     'API_KEY': env('CLOUDINARY_API_KEY'),
@@ -131,17 +221,42 @@ CLOUDINARY_STORAGE = {
     'SECURE': True,
 }
 
+# Background media pipeline (projects/media_jobs.py): admin uploads are
+# staged in MEDIA_STAGING_ROOT, which the web and process_media processes
+# must share, and uploaded by MEDIA_BACKEND. Set MEDIA_BACKEND to
+# 'projects.media_jobs.LocalMediaBackend' to keep media on local disk.
+MEDIA_STAGING_ROOT = env('MEDIA_STAGING_ROOT', default=str(BASE_DIR / 'media' / 'staging'))
+MEDIA_BACKEND = env('MEDIA_BACKEND', default='projects.media_jobs.CloudinaryBackend')
+MEDIA_JOB_MAX_ATTEMPTS = 3
+# Running jobs older than this (seconds) are assumed lost with their worker
+MEDIA_JOB_TIMEOUT = 600
+# Project thumbnail eagerly generated next to the responsive widths
+CLOUDINARY_THUMBNAIL = {'width': 400, 'height': 300, 'crop': 'fill', 'gravity': 'auto'}
+
 # Remove MEDIA_URL & MEDIA_ROOT since not needed with Cloudinary
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # REST Framework settings
+# orjson rendering and .values()-based project serializers (same output as
+# the DRF renderer and ModelSerializers, less CPU per response)
+FAST_JSON = env.bool('FAST_JSON', default=False)
+# Stream the unpaginated project listing row by row (projects/streaming.py)
+# instead of rendering it whole; the read model then skips the full listings
+STREAMING_JSON = env.bool('STREAMING_JSON', default=False)
+STREAMING_CHUNK_SIZE = 500
+
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': ['rest_framework.permissions.AllowAny'],
-    'DEFAULT_RENDERER_CLASSES': ['rest_framework.renderers.JSONRenderer'],
+    'DEFAULT_RENDERER_CLASSES': [
+        'projects.renderers.FastJSONRenderer' if FAST_JSON else 'rest_framework.renderers.JSONRenderer'
+    ],
+    # Token buckets in Redis (projects/throttling.py). Add
+    # '<scope>:<route name>' rates to limit a route separately, e.g.
+    # 'anon:projects:project-search': '30/minute'
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.AnonRateThrottle',
-        'rest_framework.throttling.UserRateThrottle'
+        'projects.throttling.AnonTokenBucketThrottle',
+        'projects.throttling.UserTokenBucketThrottle'
     ],
     'DEFAULT_THROTTLE_RATES': {
         'anon': '100/hour',
@@ -162,3 +277,23 @@ CSRF_COOKIE_SECURE = env('CSRF_COOKIE_SECURE')
 SECURE_BROWSER_XSS_FILTER = True
 SECURE_CONTENT_TYPE_NOSNIFF = True
 X_FRAME_OPTIONS = 'DENY'
+
+# Monitoring
+# /metrics (Prometheus) requires "Authorization: Bearer <METRICS_TOKEN>"; with
+# no token set it is only served in DEBUG
+METRICS_TOKEN = env('METRICS_TOKEN', default='')
+# Server-Timing headers go to staff users, and to everyone in DEBUG or with this on
+SERVER_TIMING = env.bool('SERVER_TIMING', default=False)
+
+SENTRY_DSN = env('SENTRY_DSN', default='')
+if SENTRY_DSN:
+    import sentry_sdk
+    from sentry_sdk.integrations.django import DjangoIntegration
+
+    sentry_sdk.init(
+        dsn=SENTRY_DSN,
+        integrations=[DjangoIntegration()],
+        traces_sample_rate=env.float('SENTRY_TRACES_SAMPLE_RATE', default=0.0),
+        environment=env('SENTRY_ENVIRONMENT', default='production'),
+        send_default_pii=False,
+    )
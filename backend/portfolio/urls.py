@@ -1,10 +1,20 @@
 """
 URL configuration for portfolio project.
 """
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
+from projects.instrumentation import metrics_view
+from projects.snapshot import SNAPSHOT_DIR, snapshot_file
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('projects.urls')),
+    path('metrics', metrics_view, name='metrics'),
+    # Snapshot files, which WhiteNoise leaves out since exports prune them
+    path(
+        f"{settings.STATIC_URL.strip('/')}/{SNAPSHOT_DIR}/<str:name>",
+        snapshot_file,
+        name='api-snapshot-file',
+    ),
 ]
@@ -1,11 +1,72 @@
-from django.contrib import admin
-from .models import Project, Resume
+from django.contrib import admin, messages
+from django.core.files.uploadedfile import UploadedFile
+from django.core.paginator import Paginator
+from django.db import connections, transaction
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+
+from . import bulk, media_jobs
+from .models import MediaJob, Project, Resume
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Changelist paginator that takes PostgreSQL's row estimate for large
+    unfiltered tables instead of running an exact ``COUNT(*)``.
+    """
+    
+    estimate_above = 10000
+    
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if isinstance(queryset, QuerySet) and not queryset.query.where:
+            connection = connections[queryset.db]
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                        [queryset.model._meta.db_table],
+                    )
+                    row = cursor.fetchone()
+                if row and row[0] >= self.estimate_above:
+                    return row[0]
+        return super().count
+
+
+class QueuedMediaAdmin(admin.ModelAdmin):
+    """Queue uploads to ``media_fields`` for ``process_media`` instead of uploading in the request"""
+    
+    media_fields = ()
+    
+    def save_model(self, request, obj, form, change):
+        uploads = {}
+        for field in self.media_fields:
+            value = getattr(obj, field)
+            if isinstance(value, UploadedFile):
+                uploads[field] = value
+                # Keep serving the previous file until the new one is ready
+                setattr(obj, field, form.initial.get(field))
+                setattr(obj, f'{field}_status', 'queued')
+        options = self.stage(obj, change) if uploads else {}
+        super().save_model(request, obj, form, change)
+        for field, upload in uploads.items():
+            media_jobs.enqueue(obj, field, upload, **options)
+        if uploads:
+            self.message_user(
+                request, 'The upload is being processed in the background.', messages.INFO
+            )
+    
+    def stage(self, obj, change):
+        """Adjust ``obj`` while its uploads are queued; returns ``enqueue()`` options"""
+        return {}
 
 
 @admin.register(Project)
-class ProjectAdmin(admin.ModelAdmin):
+class ProjectAdmin(QueuedMediaAdmin):
     """Admin interface for Project model"""
     
+    media_fields = ['image']
     list_display = [
         'title', 
         'short_description', 
@@ -16,6 +77,10 @@ class ProjectAdmin(admin.ModelAdmin):
     list_filter = ['featured', 'created_at', 'updated_at']
     search_fields = ['title', 'description', 'technologies']
     list_editable = ['featured', 'order']
+    readonly_fields = ['image_status', 'image_width', 'image_height', 'image_bytes']
+    actions = ['feature_projects', 'unfeature_projects']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     
     fieldsets = (
         ('Basic Information', {
@@ -25,7 +90,7 @@ class ProjectAdmin(admin.ModelAdmin):
             'fields': ('github_url', 'live_url')
         }),
         ('Media', {
-            'fields': ('image',)
+            'fields': ('image', 'image_status', 'image_width', 'image_height', 'image_bytes')
         }),
         ('Technical Details', {
             'fields': ('technologies',)
@@ -39,13 +104,42 @@ class ProjectAdmin(admin.ModelAdmin):
     def changelist_view(self, request, extra_context=None):
         extra_context = extra_context or {}
         extra_context['title'] = 'Siri Tech Portfolio Projects'
-        return super().changelist_view(request, extra_context)
+        if request.method != 'POST' or '_save' not in request.POST:
+            return super().changelist_view(request, extra_context)
+        # list_editable rows are collected by save_model and written together
+        request._project_changes = {}
+        with transaction.atomic():
+            response = super().changelist_view(request, extra_context)
+            bulk.apply_changes(request._project_changes)
+        return response
+    
+    def save_model(self, request, obj, form, change):
+        changes = getattr(request, '_project_changes', None)
+        if changes is None or not change:
+            super().save_model(request, obj, form, change)
+        elif form.changed_data:
+            changes[obj.pk] = {field: getattr(obj, field) for field in form.changed_data}
+    
+    def _set_featured(self, request, queryset, featured):
+        updated = bulk.apply_changes(
+            {pk: {'featured': featured} for pk in queryset.values_list('pk', flat=True)}
+        )
+        self.message_user(request, f"{updated} project(s) updated.", messages.SUCCESS)
+    
+    @admin.action(description="Feature selected projects")
+    def feature_projects(self, request, queryset):
+        self._set_featured(request, queryset, True)
+    
+    @admin.action(description="Unfeature selected projects")
+    def unfeature_projects(self, request, queryset):
+        self._set_featured(request, queryset, False)
 
 
 @admin.register(Resume)
-class ResumeAdmin(admin.ModelAdmin):
+class ResumeAdmin(QueuedMediaAdmin):
     """Admin interface for Resume model"""
     
+    media_fields = ['file']
     list_display = [
         'title',
         'file',
@@ -55,17 +149,41 @@ class ResumeAdmin(admin.ModelAdmin):
     list_filter = ['is_active', 'uploaded_at']
     search_fields = ['title']
     list_editable = ['is_active']
+    readonly_fields = ['file_status', 'file_bytes', 'preview_url']
     
     fieldsets = (
         ('Resume Information', {
             'fields': ('title', 'file', 'is_active')
         }),
+        ('Processing', {
+            'fields': ('file_status', 'file_bytes', 'preview_url')
+        }),
     )
     
     def changelist_view(self, request, extra_context=None):
         extra_context = extra_context or {}
         extra_context['title'] = 'Resume Management'
         return super().changelist_view(request, extra_context)
+    
+    def stage(self, obj, change):
+        if change or not obj.is_active:
+            return {}
+        # A new resume has no file until process_media uploads it; going
+        # live now would take the current resume's download down until then
+        obj.is_active = False
+        return {'activate': True}
+
+
+@admin.register(MediaJob)
+class MediaJobAdmin(admin.ModelAdmin):
+    """Read-only view of the background media queue"""
+    
+    list_display = ['kind', 'object_id', 'status', 'attempts', 'created_at', 'finished_at']
+    list_filter = ['status', 'kind']
+    readonly_fields = [field.name for field in MediaJob._meta.fields]
+    
+    def has_add_permission(self, request):
+        return False
 
 
 # Customize admin site
@@ -1,7 +1,14 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class ProjectsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'projects'
     verbose_name = 'Portfolio Projects'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .instrumentation import install_query_hook
+
+        connection_created.connect(install_query_hook)
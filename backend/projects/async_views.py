@@ -0,0 +1,143 @@
+"""
+Async variants of the read views, routed when ``SERVER_MODE`` is 'asgi'.
+
+The hot paths (conditional GET validators, read model and response cache
+hits) run on the event loop through the async ORM and Django's async cache
+API. Anything else (cache misses, pagination, non-GET methods) is handed to
+the sync DRF view in a worker thread, so both modes return the same bodies.
+"""
+import math
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from rest_framework.exceptions import Throttled
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from . import streaming, views
+from .cache import acached_entry
+from .conditional import (
+    aactive_resume_state,
+    aconditional,
+    afeatured_projects_state,
+    ahome_state,
+    aportfolio_stats_state,
+    aproject_detail_state,
+    aproject_list_state,
+)
+from .models import Project, Resume
+from .read_model import aget_document, aget_listing
+from .renderers import render_json
+
+
+def throttle_response(request):
+    """Apply the default DRF throttles; return a 429 response if exceeded"""
+    drf_request = Request(request, authenticators=())
+    durations = []
+    for throttle in (cls() for cls in api_settings.DEFAULT_THROTTLE_CLASSES):
+        if not throttle.allow_request(drf_request, None):
+            durations.append(throttle.wait())
+    if not durations:
+        return None
+
+    wait = max((duration for duration in durations if duration is not None), default=None)
+    response = JsonResponse({'detail': Throttled(wait).detail}, status=429)
+    if wait is not None:
+        response['Retry-After'] = '%d' % math.ceil(wait)
+    return response
+
+
+def async_read_view(sync_view, state_func, lookup):
+    """
+    Build an async view that serves ``sync_view`` from cached state.
+
+    ``lookup`` is awaited with the view arguments and returns the JSON
+    bytes or a ready response, or None to fall back to ``sync_view``. The fallback runs with
+    throttling disabled since the async view already applied it.
+    """
+    fallback = sync_to_async(sync_view.cls.as_view(throttle_classes=[]))
+
+    @aconditional(state_func)
+    async def serve(request, *args, **kwargs):
+        body = await lookup(request, *args, **kwargs)
+        if body is None:
+            response = await fallback(request, *args, **kwargs)
+            if response.streaming and not response.is_async:
+                response.streaming_content = streaming.aiterate(response.streaming_content)
+            return response
+        if isinstance(body, HttpResponse):
+            return body
+        return HttpResponse(body, content_type='application/json')
+
+    async def view(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return await fallback(request, *args, **kwargs)
+        throttled = await sync_to_async(throttle_response)(request)
+        if throttled is not None:
+            return throttled
+        return await serve(request, *args, **kwargs)
+
+    view.csrf_exempt = True
+    return view
+
+
+def cached_lookup(prefix, models):
+    """Lookup serving the response cache entry of a sync view"""
+    async def lookup(request, *args, **kwargs):
+        entry = await acached_entry(prefix, models, request)
+        if entry is None:
+            return None
+        # With the validators of the state the entry was rendered from
+        return HttpResponse(
+            render_json(entry.data), content_type='application/json', headers=entry.headers
+        )
+    return lookup
+
+
+async def project_list_document(request, *args, **kwargs):
+    if settings.STREAMING_JSON:
+        return None
+    params = set(request.GET)
+    if not params:
+        return await aget_listing('all')
+    if params == {'featured'}:
+        return await aget_listing('featured')
+    return None
+
+
+async def project_detail_document(request, pk, *args, **kwargs):
+    if request.GET:
+        return None
+    return await aget_document(pk)
+
+
+async def featured_projects_document(request, *args, **kwargs):
+    if request.GET:
+        return None
+    return await aget_listing('featured-top3')
+
+
+project_list = async_read_view(
+    views.ProjectListView.as_view(), aproject_list_state, project_list_document
+)
+project_detail = async_read_view(
+    views.ProjectDetailView.as_view(), aproject_detail_state, project_detail_document
+)
+featured_projects = async_read_view(
+    views.featured_projects, afeatured_projects_state, featured_projects_document
+)
+search_projects = async_read_view(
+    views.search_projects, aproject_list_state, cached_lookup('project-search', [Project])
+)
+portfolio_stats = async_read_view(
+    views.portfolio_stats, aportfolio_stats_state, cached_lookup('portfolio-stats', [Project])
+)
+# Serves a memoized signed link, with no cached body or validators to check
+download_resume = views.download_resume
+resume_status = async_read_view(
+    views.resume_status, aactive_resume_state, cached_lookup('resume-status', [Resume])
+)
+home = async_read_view(
+    views.home, ahome_state, cached_lookup('home', [Project, Resume])
+)
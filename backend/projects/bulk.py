@@ -0,0 +1,53 @@
+"""
+Bulk edits of project ordering and featured flags.
+
+``apply_changes()`` writes any number of ``order``/``featured`` changes in
+a single ``UPDATE ... SET col = CASE id WHEN ... END`` statement. Rows
+saved one by one would each send post_save and queue their own cache
+work; here the follow-ups the Project signals do (cache invalidation,
+read-model rebuild, snapshot export) are queued once for the whole batch.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+from . import read_model, snapshot
+from .cache import invalidate
+from .models import Project
+
+EDITABLE_FIELDS = ('order', 'featured')
+
+
+def apply_changes(changes):
+    """
+    Apply ``{pk: {'order': ..., 'featured': ...}}``; returns the rows updated.
+
+    Fields missing from a change keep their current value.
+    """
+    if not changes:
+        return 0
+    updates = {
+        field: Case(
+            *[
+                When(pk=pk, then=Value(change[field]))
+                for pk, change in changes.items()
+                if field in change
+            ],
+            default=F(field),
+            output_field=Project._meta.get_field(field),
+        )
+        for field in EDITABLE_FIELDS
+        if any(field in change for change in changes.values())
+    }
+    with transaction.atomic():
+        updated = Project.objects.filter(pk__in=changes).update(
+            **updates, updated_at=timezone.now()
+        )
+        # update() sends no post_save; queue what the signals would, once
+        invalidate(Project)
+        for pk in changes:
+            read_model.schedule_rebuild(pk)
+            if settings.API_SNAPSHOT:
+                snapshot.schedule_export(Project, pk)
+    return updated
@@ -0,0 +1,536 @@
+"""
+Versioned response cache for the read-only API views.
+
+Every cached response is keyed by a per-model "generation" counter. The
+counter is bumped whenever a Project or Resume row is saved or deleted, so
+admin edits show up immediately instead of after ``CACHE_TTL``.
+
+Misses are recomputed single-flight: the request that takes a short cache
+lock renders the response, while concurrent requests (in any worker) are
+served the previous body stale or wait for the new one. Entries are also
+refreshed probabilistically shortly before they expire ("XFetch"), so hot
+keys rarely expire under load at all.
+
+When the default cache is Redis, lookups go through a bounded in-process
+LRU ("L1") first. Response entries are keyed by generation and never
+change, so L1 only has to forget the generation counters and read-model
+documents when they move: every invalidation is published on a Redis
+channel that each worker listens to, and L1 is bypassed while a worker
+isn't subscribed.
+"""
+import hashlib
+import math
+import random
+import os
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+from rest_framework.response import Response
+
+from portfolio.routers import pin_primary
+
+from .instrumentation import record_cache
+
+GENERATION_KEY = 'api:generation:{}'
+# 'entry' rather than the former 'response' keys, which held bare data
+RESPONSE_KEY = 'api:entry:{prefix}:{generations}:{digest}'
+STALE_KEY = 'api:stale:{prefix}:{digest}'
+LOCK_KEY = 'api:lock:{}'
+STATS_KEY = 'api:stats:{}'
+INVALIDATION_CHANNEL = 'api:invalidate'
+
+
+def _generation_key(model):
+    return GENERATION_KEY.format(model._meta.label_lower)
+
+
+def redis_client():
+    """The raw Redis client behind the default cache, or None if it isn't Redis"""
+    try:
+        return get_redis_connection('default')
+    except NotImplementedError:
+        return None
+
+
+class LocalCache:
+    """
+    The L1 tier: a thread-safe LRU of at most ``maxsize`` entries that
+    expire after ``ttl`` seconds.
+
+    ``clear()`` starts a new epoch, and values read from Redis are only
+    stored if no invalidation arrived while they were being fetched.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.epoch = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value, expires = self._data[key]
+            except KeyError:
+                return default
+            if expires <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, epoch=None):
+        with self._lock:
+            if epoch is not None and epoch != self.epoch:
+                return
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self.epoch += 1
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+local = LocalCache(settings.L1_CACHE_SIZE, settings.L1_CACHE_TTL)
+
+
+class InvalidationListener:
+    """
+    Clears ``local`` whenever another process publishes an invalidation.
+
+    The subscriber thread is started lazily in every worker (threads don't
+    survive gunicorn's fork) and reconnects with backoff; ``subscribed``
+    is only set while messages can actually arrive.
+    """
+
+    max_delay = 8
+
+    def __init__(self):
+        self.sender = uuid.uuid4().hex.encode()
+        self.subscribed = threading.Event()
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def ensure_started(self, client):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self.sender = uuid.uuid4().hex.encode()
+            self.subscribed = threading.Event()
+            threading.Thread(
+                target=self.listen, args=(client,), name='l1-invalidation', daemon=True
+            ).start()
+
+    def listen(self, client):
+        delay = 0.5
+        while True:
+            try:
+                pubsub = client.pubsub()
+                pubsub.subscribe(INVALIDATION_CHANNEL)
+                for message in pubsub.listen():
+                    if message['type'] == 'subscribe':
+                        local.clear()
+                        self.subscribed.set()
+                        delay = 0.5
+                    elif message['type'] == 'message' and message['data'] != self.sender:
+                        local.clear()
+            except RedisError:
+                pass
+            self.subscribed.clear()
+            local.clear()
+            time.sleep(delay)
+            delay = min(delay * 2, self.max_delay)
+
+
+listener = InvalidationListener()
+
+
+def l1_enabled():
+    """Whether lookups can be served from ``local`` in this process"""
+    if not settings.L1_CACHE_SIZE:
+        return False
+    client = redis_client()
+    if client is None:
+        return False
+    listener.ensure_started(client)
+    return listener.subscribed.is_set()
+
+
+def publish_invalidation():
+    """Drop the L1 entries of this process and tell every other one to"""
+    local.clear()
+    client = redis_client()
+    if client is None:
+        return
+    try:
+        client.publish(INVALIDATION_CHANNEL, listener.sender)
+    except RedisError:
+        # Subscribers lose their connection too and bypass L1 until they
+        # resubscribe with an empty cache
+        pass
+
+
+def tiered_get(key):
+    """``cache.get(key)``, served from L1 when possible"""
+    if not l1_enabled():
+        return cache.get(key)
+    value = local.get(key)
+    if value is not None:
+        stats.record('cache-tier', 'l1-hit')
+        return value
+    epoch = local.epoch
+    value = cache.get(key)
+    if value is None:
+        stats.record('cache-tier', 'l2-miss')
+    else:
+        stats.record('cache-tier', 'l2-hit')
+        local.set(key, value, epoch)
+    return value
+
+
+async def atiered_get(key):
+    if not l1_enabled():
+        return await cache.aget(key)
+    value = local.get(key)
+    if value is not None:
+        stats.record('cache-tier', 'l1-hit')
+        return value
+    epoch = local.epoch
+    value = await cache.aget(key)
+    if value is None:
+        stats.record('cache-tier', 'l2-miss')
+    else:
+        stats.record('cache-tier', 'l2-hit')
+        local.set(key, value, epoch)
+    return value
+
+
+def tiered_set(key, value, timeout):
+    """``cache.set()`` that also keeps the value in this process's L1"""
+    cache.set(key, value, timeout)
+    if l1_enabled():
+        local.set(key, value)
+
+
+async def atiered_set(key, value, timeout):
+    await cache.aset(key, value, timeout)
+    if l1_enabled():
+        local.set(key, value)
+
+
+_MISSING = object()
+
+
+def _local_generations(keys):
+    # Generations are only ever changed through bump_generation(), which
+    # publishes, so missing counters (0) are kept in L1 as well
+    cached = [local.get(key, _MISSING) for key in keys]
+    if _MISSING in cached:
+        return None
+    stats.record('cache-tier', 'l1-hit')
+    return tuple(cached)
+
+
+def get_generations(models):
+    """Return the current generation of each model in a single round-trip"""
+    keys = [_generation_key(model) for model in models]
+    enabled = l1_enabled()
+    if enabled:
+        generations = _local_generations(keys)
+        if generations is not None:
+            return generations
+        epoch = local.epoch
+    values = cache.get_many(keys)
+    generations = tuple(values.get(key, 0) for key in keys)
+    if enabled:
+        stats.record('cache-tier', 'l2-hit')
+        for key, generation in zip(keys, generations):
+            local.set(key, generation, epoch)
+    return generations
+
+
+async def aget_generations(models):
+    keys = [_generation_key(model) for model in models]
+    enabled = l1_enabled()
+    if enabled:
+        generations = _local_generations(keys)
+        if generations is not None:
+            return generations
+        epoch = local.epoch
+    values = await cache.aget_many(keys)
+    generations = tuple(values.get(key, 0) for key in keys)
+    if enabled:
+        stats.record('cache-tier', 'l2-hit')
+        for key, generation in zip(keys, generations):
+            local.set(key, generation, epoch)
+    return generations
+
+
+def bump_generation(model):
+    """Invalidate every cached response that depends on ``model``"""
+    key = _generation_key(model)
+    cache.add(key, 0, timeout=None)
+    cache.incr(key)
+
+
+_pending = threading.local()
+
+
+def on_commit_once(name, item, callback):
+    """
+    Collect ``item`` under ``name`` and run ``callback(items)`` after commit.
+
+    Every item saved in one transaction is handed to a single callback
+    run, so a bulk delete or an admin changelist save of N rows does the
+    follow-up work once instead of N times.
+    """
+    pending = _pending.__dict__.setdefault(name, set())
+    pending.add(item)
+
+    def run():
+        items = _pending.__dict__.pop(name, set())
+        if items:
+            callback(items)
+
+    transaction.on_commit(run)
+
+
+def invalidate(model):
+    """Bump the generation of ``model`` once the current transaction commits"""
+    on_commit_once('invalidate', model, _bump_generations)
+
+
+def _bump_generations(models):
+    # Pin reads to the primary first, so nothing refills the bumped
+    # generation from a replica that hasn't replayed the write yet
+    pin_primary()
+    for model in models:
+        bump_generation(model)
+    publish_invalidation()
+
+
+class CacheStats:
+    """
+    Hit/miss counters for the response cache.
+
+    Counts are kept per process and pushed to the shared cache in batches,
+    so recording an event doesn't cost an extra round-trip per request.
+    """
+
+    flush_every = 50
+    flush_interval = 10
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = Counter()
+        self._last_flush = time.monotonic()
+
+    def record(self, prefix, outcome):
+        if outcome in REQUEST_OUTCOMES:
+            record_cache(outcome)
+        with self._lock:
+            self._pending[f'{prefix}:{outcome}'] += 1
+            due = (
+                sum(self._pending.values()) >= self.flush_every
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            )
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+            self._last_flush = time.monotonic()
+        for name, count in pending.items():
+            key = STATS_KEY.format(name)
+            cache.add(key, 0, timeout=None)
+            cache.incr(key, count)
+
+    def totals(self, prefixes, outcomes=('hit', 'miss')):
+        """Return shared counts per outcome and the hit ratio for each prefix"""
+        self.flush()
+        keys = {
+            (prefix, outcome): STATS_KEY.format(f'{prefix}:{outcome}')
+            for prefix in prefixes
+            for outcome in outcomes
+        }
+        values = cache.get_many(keys.values())
+        totals = {}
+        for prefix in prefixes:
+            counts = {
+                outcome: values.get(keys[(prefix, outcome)], 0) for outcome in outcomes
+            }
+            lookups = counts.get('hit', 0) + counts.get('miss', 0)
+            counts['hit_ratio'] = counts.get('hit', 0) / lookups if lookups else 0.0
+            totals[prefix] = counts
+        return totals
+
+
+stats = CacheStats()
+
+# Outcomes also counted in the per-request metrics. 'stale' and 'coalesced'
+# requests were answered without touching the database during a rebuild.
+# 'l1-hit'/'l2-hit'/'l2-miss' count lookups by the tier that answered them.
+REQUEST_OUTCOMES = ('hit', 'miss', 'stale', 'coalesced', 'l1-hit', 'l2-hit', 'l2-miss')
+
+# Prefixes used by the views in projects/views.py
+CACHED_VIEWS = []
+
+
+def _request_digest(request):
+    query = sorted(request.GET.lists())
+    return hashlib.md5(f'{request.path}?{query}'.encode()).hexdigest()
+
+
+def _response_key(prefix, generations, request):
+    generations = '.'.join(str(gen) for gen in generations)
+    return RESPONSE_KEY.format(
+        prefix=prefix, generations=generations, digest=_request_digest(request)
+    )
+
+
+def response_key(prefix, models, request):
+    """Build the cache key for ``request`` at the current model generations"""
+    return _response_key(prefix, get_generations(models), request)
+
+
+class CacheEntry:
+    """A cached ``Response.data`` with what's needed to serve or refresh it"""
+
+    def __init__(self, data, headers, timeout, delta):
+        self.data = data
+        self.headers = headers
+        self.expires = time.time() + timeout
+        self.delta = delta  # seconds it took to compute
+
+    def refresh_early(self, beta=None):
+        """
+        Decide whether this request should recompute the entry before it expires.
+
+        The chance grows as expiry nears and with the recompute time
+        (Vattani et al., "Optimal Probabilistic Cache Stampede Prevention").
+        """
+        beta = settings.CACHE_EARLY_REFRESH_BETA if beta is None else beta
+        return time.time() - self.delta * beta * math.log(1 - random.random()) >= self.expires
+
+
+async def acached_entry(prefix, models, request):
+    """
+    Return the cached ``CacheEntry`` for ``request``, or None.
+
+    Used by the async views; a miss is left to the sync view, which records
+    it and fills the cache.
+    """
+    key = _response_key(prefix, await aget_generations(models), request)
+    entry = await atiered_get(key)
+    if entry is None or entry.refresh_early():
+        return None
+    stats.record(prefix, 'hit')
+    return entry
+
+
+def _wait_for(key):
+    """Poll for the entry another worker is computing, up to CACHE_LOCK_WAIT"""
+    deadline = time.monotonic() + settings.CACHE_LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(0.025)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry
+    return None
+
+
+def cache_response(prefix, models, timeout=None, bypass=None):
+    """
+    Cache the ``Response.data`` of a DRF view.
+
+    Apply it below ``@api_view`` on function views, or with
+    ``method_decorator(..., name='get')`` on class-based views. Only
+    successful GET/HEAD responses are stored. Requests for which
+    ``bypass(request)`` is true get a response that can't be stored
+    (a streamed one); they go straight to the view, without taking the
+    lock or waiting on another request's.
+    """
+    CACHED_VIEWS.append(prefix)
+
+    def compute(key, stale_key, view_func, request, args, kwargs):
+        from .conditional import validator_headers  # conditional imports the models
+
+        started = time.perf_counter()
+        response = view_func(request, *args, **kwargs)
+        if isinstance(response, Response) and response.status_code == 200:
+            ttl = timeout or settings.CACHE_TTL
+            entry = CacheEntry(
+                response.data, validator_headers(request), ttl, time.perf_counter() - started
+            )
+            tiered_set(key, entry, ttl)
+            cache.set(stale_key, entry, settings.CACHE_STALE_TTL)
+        return response
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view_func(request, *args, **kwargs)
+            if bypass is not None and bypass(request):
+                stats.record(prefix, 'bypass')
+                return view_func(request, *args, **kwargs)
+
+            key = response_key(prefix, models, request)
+            entry = tiered_get(key)
+            fresh = entry is not None and not entry.refresh_early()
+            if entry is not None and not fresh and l1_enabled():
+                # Another worker may have refreshed it since it was copied to L1
+                entry = cache.get(key)
+                fresh = entry is not None and not entry.refresh_early()
+                if fresh:
+                    local.set(key, entry)
+            # Served with the validators of the state each entry was
+            # rendered from, which may predate the current one
+            if fresh:
+                stats.record(prefix, 'hit')
+                return Response(entry.data, headers=entry.headers)
+
+            lock_key = LOCK_KEY.format(key)
+            stale_key = STALE_KEY.format(prefix=prefix, digest=_request_digest(request))
+            if cache.add(lock_key, 1, settings.CACHE_LOCK_TIMEOUT):
+                stats.record(prefix, 'miss' if entry is None else 'early-refresh')
+                try:
+                    return compute(key, stale_key, view_func, request, args, kwargs)
+                finally:
+                    cache.delete(lock_key)
+
+            # Another request is already recomputing this key
+            if entry is not None:
+                stats.record(prefix, 'hit')
+                return Response(entry.data, headers=entry.headers)
+            stale = cache.get(stale_key)
+            if stale is not None:
+                stats.record(prefix, 'stale')
+                return Response(stale.data, headers=stale.headers)
+            entry = _wait_for(key)
+            if entry is not None:
+                stats.record(prefix, 'coalesced')
+                return Response(entry.data, headers=entry.headers)
+            stats.record(prefix, 'miss')
+            return compute(key, stale_key, view_func, request, args, kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,194 @@
+"""
+Conditional GET support for the read-only API views.
+
+Validators are computed from cheap aggregate queries instead of the
+serialized body, so a matching ``If-None-Match``/``If-Modified-Since``
+short-circuits to a 304 before the cache or serializer is touched.
+"""
+import hashlib
+from functools import wraps
+
+from django.db.models import Count, F, Max, Q
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views.decorators.http import condition
+
+from .models import Project, Resume
+
+# Bump whenever the JSON shape of an endpoint changes, so clients holding a
+# body in the old shape don't get a 304 for it after a deploy.
+REPRESENTATION_VERSION = 2
+
+
+def _etag(state):
+    payload = repr((REPRESENTATION_VERSION, sorted(state.items())))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def validator_headers(request):
+    """
+    The ETag/Last-Modified of the state computed for ``request``, if any.
+
+    Stored with cached bodies, so a body served stale keeps the validators
+    of the state it was rendered from instead of the current ones.
+    """
+    current = getattr(request, '_conditional_state', None)
+    if current is None:
+        return {}
+    headers = {'ETag': f'"{_etag(current)}"'}
+    if current['last_modified']:
+        headers['Last-Modified'] = http_date(int(current['last_modified'].timestamp()))
+    return headers
+
+
+def conditional(state_func):
+    """
+    Wrap a view in Django's ``condition()`` driven by ``state_func``.
+
+    ``state_func`` receives the view arguments and returns a dict describing
+    the resource (it must include ``last_modified``), or None if the
+    resource doesn't exist. It runs once per request; the strong ETag is a
+    hash of the whole dict.
+    """
+    def state(request, *args, **kwargs):
+        if not hasattr(request, '_conditional_state'):
+            request._conditional_state = state_func(request, *args, **kwargs)
+        return request._conditional_state
+
+    def etag_func(request, *args, **kwargs):
+        current = state(request, *args, **kwargs)
+        if current is None:
+            return None
+        return _etag(current)
+
+    def last_modified_func(request, *args, **kwargs):
+        current = state(request, *args, **kwargs)
+        return current['last_modified'] if current else None
+
+    return condition(etag_func=etag_func, last_modified_func=last_modified_func)
+
+
+def aconditional(state_func):
+    """
+    Async counterpart of ``conditional()`` for async views.
+
+    Django's ``condition()`` calls its validator functions synchronously
+    even around async views, so this awaits ``state_func`` (an async state
+    function using the async ORM) and applies the same 304/header logic.
+    The state is stored on the request so a sync fallback view reuses it.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        async def wrapper(request, *args, **kwargs):
+            current = await state_func(request, *args, **kwargs)
+            request._conditional_state = current
+            etag = last_modified = None
+            if current is not None:
+                etag = f'"{_etag(current)}"'
+                if current['last_modified']:
+                    last_modified = int(current['last_modified'].timestamp())
+
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = await view_func(request, *args, **kwargs)
+            if request.method in ('GET', 'HEAD'):
+                if last_modified and not response.has_header('Last-Modified'):
+                    response.headers['Last-Modified'] = http_date(last_modified)
+                if etag:
+                    response.headers.setdefault('ETag', etag)
+            return response
+        return wrapper
+    return decorator
+
+
+def project_list_state(request, *args, **kwargs):
+    queryset = Project.objects.all()
+    if request.GET.get('featured') is not None:
+        queryset = queryset.filter(featured=True)
+    return queryset.aggregate(count=Count('id'), last_modified=Max('updated_at'))
+
+
+def project_detail_state(request, pk, *args, **kwargs):
+    return Project.objects.filter(pk=pk).values(last_modified=F('updated_at')).first()
+
+
+def featured_projects_state(request, *args, **kwargs):
+    return Project.objects.filter(featured=True).aggregate(
+        count=Count('id'), last_modified=Max('updated_at')
+    )
+
+
+def portfolio_stats_state(request, *args, **kwargs):
+    return Project.objects.aggregate(
+        count=Count('id'),
+        featured=Count('id', filter=Q(featured=True)),
+        last_modified=Max('updated_at'),
+    )
+
+
+def _resume_state(resume):
+    if resume is None:
+        return {'id': None, 'last_modified': None}
+    return {
+        'id': resume.pk,
+        'title': resume.title,
+        'file': (str(resume.file), getattr(resume.file, 'version', None)),
+        'last_modified': resume.uploaded_at,
+    }
+
+
+def active_resume_state(request, *args, **kwargs):
+    return _resume_state(Resume.get_active())
+
+
+def home_state(request, *args, **kwargs):
+    projects = portfolio_stats_state(request)
+    resume = active_resume_state(request)
+    return _home_state(projects, resume)
+
+
+def _home_state(projects, resume):
+    last_modified = max(
+        (value for value in (projects['last_modified'], resume['last_modified']) if value),
+        default=None,
+    )
+    return {
+        'projects': sorted(projects.items()),
+        'resume': sorted(resume.items()),
+        'last_modified': last_modified,
+    }
+
+
+async def aproject_list_state(request, *args, **kwargs):
+    queryset = Project.objects.all()
+    if request.GET.get('featured') is not None:
+        queryset = queryset.filter(featured=True)
+    return await queryset.aaggregate(count=Count('id'), last_modified=Max('updated_at'))
+
+
+async def aproject_detail_state(request, pk, *args, **kwargs):
+    return await Project.objects.filter(pk=pk).values(last_modified=F('updated_at')).afirst()
+
+
+async def afeatured_projects_state(request, *args, **kwargs):
+    return await Project.objects.filter(featured=True).aaggregate(
+        count=Count('id'), last_modified=Max('updated_at')
+    )
+
+
+async def aportfolio_stats_state(request, *args, **kwargs):
+    return await Project.objects.aaggregate(
+        count=Count('id'),
+        featured=Count('id', filter=Q(featured=True)),
+        last_modified=Max('updated_at'),
+    )
+
+
+async def aactive_resume_state(request, *args, **kwargs):
+    return _resume_state(await Resume.aget_active())
+
+
+async def ahome_state(request, *args, **kwargs):
+    projects = await aportfolio_stats_state(request)
+    resume = await aactive_resume_state(request)
+    return _home_state(projects, resume)
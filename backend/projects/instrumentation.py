@@ -0,0 +1,250 @@
+"""
+Per-request performance instrumentation.
+
+``PerformanceMiddleware`` records the database query count and time, cache
+hits/misses, serializer time and total view time of every request. It
+returns them in a ``Server-Timing`` header to staff users (to everyone in
+``DEBUG`` or with ``SERVER_TIMING`` on) and, when prometheus_client is
+installed, exports them as histograms labelled by route name (for example
+``projects:project-list``) on ``/metrics``, which needs ``METRICS_TOKEN``
+unless ``DEBUG`` is on. Set ``PROMETHEUS_MULTIPROC_DIR`` so the gunicorn
+workers share one set of metrics. Workers using the psycopg connection
+pool (``DB_CONNECTION_MODE=pool``) also export its size, idle connections
+and waiting requests as ``api_db_pool_*`` gauges.
+"""
+import contextvars
+import os
+import time
+from collections import Counter
+from contextlib import contextmanager
+from importlib import import_module
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.db import connections
+from django.http import Http404, HttpRequest, HttpResponse
+from django.utils.crypto import constant_time_compare
+
+from portfolio.database import pool_stats
+
+try:
+    import prometheus_client
+    from prometheus_client import multiprocess
+except ImportError:  # metrics export is optional
+    prometheus_client = None
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+
+if prometheus_client is not None:
+    REQUEST_DURATION = prometheus_client.Histogram(
+        'api_request_duration_seconds', 'Total view time', ['route', 'method', 'status'],
+    )
+    DB_DURATION = prometheus_client.Histogram(
+        'api_db_duration_seconds', 'Database time per request', ['route'],
+    )
+    DB_QUERIES = prometheus_client.Histogram(
+        'api_db_queries', 'Database queries per request', ['route'],
+        buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+    )
+    SERIALIZER_DURATION = prometheus_client.Histogram(
+        'api_serializer_duration_seconds', 'Serializer time per request', ['route'],
+    )
+    CACHE_EVENTS = prometheus_client.Counter(
+        'api_cache_events', 'Response cache lookups', ['route', 'outcome'],
+    )
+    # psycopg_pool.ConnectionPool.get_stats() key -> gauge, summed over workers
+    DB_POOL_GAUGES = {
+        key: prometheus_client.Gauge(
+            f'api_db_{key}', description, ['database'], multiprocess_mode='livesum',
+        )
+        for key, description in [
+            ('pool_size', 'Connections held by the pool'),
+            ('pool_available', 'Idle connections in the pool'),
+            ('requests_waiting', 'Requests waiting for a pooled connection'),
+        ]
+    }
+
+
+class RequestMetrics:
+    """Timings collected while a single request is handled"""
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.cache = Counter()
+
+
+def record_query(execute, sql, params, many, context):
+    """``connection.execute_wrapper()`` hook timing the queries of the current request"""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.db_time += time.perf_counter() - started
+        metrics.db_queries += 1
+
+
+def install_query_hook(sender, connection, **kwargs):
+    """
+    ``connection_created`` receiver adding ``record_query`` to every connection.
+
+    Connections are per thread, and under ASGI the queries of a request run
+    in a worker thread rather than where the middleware runs, so the hook
+    is installed once per connection and finds the request's metrics in
+    the context, which ``sync_to_async`` carries over.
+    """
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def record_cache(outcome):
+    """Count a cache outcome (``'hit'``, ``'miss'``, ``'l1-hit'``...) for the request"""
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.cache[outcome] += 1
+
+
+@contextmanager
+def timed_serialization():
+    metrics = _current.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if metrics is not None:
+            metrics.serializer_time += time.perf_counter() - started
+
+
+def server_timing(metrics, total):
+    return ', '.join([
+        f'db;dur={metrics.db_time * 1000:.2f};desc="{metrics.db_queries} queries"',
+        'cache;desc="{}"'.format(' '.join(
+            f'{metrics.cache[outcome]} {outcome}'
+            for outcome in ('hit', 'miss', 'stale', 'coalesced', 'l1-hit', 'l2-hit', 'l2-miss')
+            if metrics.cache[outcome] or outcome in ('hit', 'miss')
+        )),
+        f'serialize;dur={metrics.serializer_time * 1000:.2f}',
+        f'total;dur={total * 1000:.2f}',
+    ])
+
+
+def is_staff(request):
+    """Whether ``request`` comes from a staff user, lean API requests included"""
+    if hasattr(request, 'session'):
+        user = getattr(request, 'user', None)
+        return user is not None and user.is_staff
+    # Lean API requests skip the session and auth middleware; read the
+    # session without attaching it, so nothing else starts using it
+    key = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if not key:
+        return False
+    probe = HttpRequest()
+    probe.session = import_module(settings.SESSION_ENGINE).SessionStore(key)
+    return get_user(probe).is_staff
+
+
+async def ais_staff(request):
+    if hasattr(request, 'auser'):
+        # The lazy request.user would query the database on the event loop
+        return (await request.auser()).is_staff
+    return await sync_to_async(is_staff)(request)
+
+
+def timing_enabled():
+    return settings.DEBUG or settings.SERVER_TIMING
+
+
+class PerformanceMiddleware:
+    """Attach Server-Timing to the responses allowed to see it and feed the Prometheus metrics"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        started = time.perf_counter()
+        with collect() as metrics:
+            response = self.get_response(request)
+        total = time.perf_counter() - started
+        self.record(request, response, metrics, total, timing_enabled() or is_staff(request))
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        with collect() as metrics:
+            response = await self.get_response(request)
+        total = time.perf_counter() - started
+        timing = timing_enabled() or await ais_staff(request)
+        self.record(request, response, metrics, total, timing)
+        return response
+
+    def record(self, request, response, metrics, total, timing):
+        if timing:
+            response['Server-Timing'] = server_timing(metrics, total)
+        if prometheus_client is not None:
+            match = request.resolver_match
+            route = match.view_name if match else 'unmatched'
+            REQUEST_DURATION.labels(route, request.method, response.status_code).observe(total)
+            DB_DURATION.labels(route).observe(metrics.db_time)
+            DB_QUERIES.labels(route).observe(metrics.db_queries)
+            SERIALIZER_DURATION.labels(route).observe(metrics.serializer_time)
+            for outcome, count in metrics.cache.items():
+                if count:
+                    CACHE_EVENTS.labels(route, outcome).inc(count)
+            record_pool_stats()
+
+
+@contextmanager
+def collect():
+    """Collect the metrics of the request handled inside the block"""
+    metrics = RequestMetrics()
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current.reset(token)
+
+
+def record_pool_stats():
+    """Copy this worker's connection pool statistics into the gauges"""
+    for connection in connections.all(initialized_only=True):
+        stats = pool_stats(connection)
+        if stats is None:
+            continue
+        for key, gauge in DB_POOL_GAUGES.items():
+            gauge.labels(connection.alias).set(stats.get(key, 0))
+
+
+def metrics_view(request):
+    """Expose the Prometheus metrics of every worker process"""
+    if prometheus_client is None:
+        raise Http404('prometheus_client is not installed')
+    token = settings.METRICS_TOKEN
+    if not token:
+        # Open only in development; in production the token is required
+        if not settings.DEBUG:
+            return HttpResponse(status=403)
+    elif not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponse(status=401)
+
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    return HttpResponse(
+        prometheus_client.generate_latest(registry),
+        content_type=prometheus_client.CONTENT_TYPE_LATEST,
+    )
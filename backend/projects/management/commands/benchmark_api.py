@@ -0,0 +1,354 @@
+import asyncio
+import itertools
+import json
+import platform
+import random
+import resource
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from unittest import mock
+
+import cloudinary
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import AsyncClient, Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from projects import read_model, search
+from projects.cache import bump_generation
+from projects.models import Project, Resume
+
+SEED_PREFIX = 'bench-'
+SEED_BATCH_SIZE = 1000
+TECHNOLOGIES = ['Django', 'React', 'Next.js', 'PostgreSQL', 'Redis', 'Docker', 'TypeScript', 'Go']
+
+ROUTES = [
+    ('project-list', 'projects/'),
+    ('project-list-featured', 'projects/?featured=true'),
+    ('project-list-page', 'projects/?page_size=20&fields=id,title,image'),
+    ('project-detail', 'projects/{pk}/'),
+    ('featured-projects', 'projects/featured/'),
+    ('project-search', 'projects/search/?q=django&tech=redis'),
+    ('portfolio-stats', 'stats/'),
+    ('resume-status', 'resume/status/'),
+    ('resume-download', 'resume/download/'),
+    ('home', 'home/'),
+]
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def add_confirm_argument(parser):
+    parser.add_argument(
+        '--yes', action='store_true',
+        help='Seed and delete benchmark rows even though DEBUG is off',
+    )
+
+
+def confirm_writes(options):
+    """Refuse to write benchmark rows to what may be the production database"""
+    if not (settings.DEBUG or options['yes']):
+        raise CommandError(
+            'This seeds and then deletes rows in the configured database; '
+            'run it with DEBUG on or pass --yes'
+        )
+
+
+def peak_rss_kb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+@contextmanager
+def stub_cloudinary_urls():
+    """Replace Cloudinary URL signing/building with a cheap string format"""
+    def build_url(self, **options):
+        return f'https://res.cloudinary.com/bench/{self.resource_type}/upload/{self.public_id}'
+
+    with mock.patch.object(cloudinary.CloudinaryResource, 'build_url', build_url):
+        yield
+
+
+class Command(BaseCommand):
+    """
+    Django command to benchmark every route in projects/urls.py.
+
+    By default it seeds ``--projects`` rows into the configured database
+    (only with ``DEBUG`` on or ``--yes``, since it deletes them and
+    reactivates the previous resume afterwards), stubs Cloudinary URL generation and drives the routes in-process
+    through Django's request handler at each ``--concurrency`` level,
+    reporting latency percentiles, requests/s, queries per request and
+    peak RSS. With ``--asgi`` (under ``SERVER_MODE=asgi``) the requests go
+    through Django's ASGI handler and the async views instead, as
+    concurrent tasks on one event loop, so the two modes can be compared
+    without a server; query counts aren't collected there. With
+    ``--base-url`` it load-tests a running server instead. Results can be
+    saved with ``--output`` and checked against an earlier run with
+    ``--compare``.
+    """
+
+    help = 'Benchmark the /api/ routes and report latency, throughput and query counts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--projects', type=int, default=1000, help='Projects to seed')
+        parser.add_argument('--resumes', type=int, default=3, help='Resumes to seed')
+        parser.add_argument(
+            '--concurrency', default='1,8,32',
+            help='Comma-separated concurrency levels',
+        )
+        parser.add_argument('--requests', type=int, default=200, help='Requests per route and level')
+        parser.add_argument('--output', help='Write results to this JSON file')
+        parser.add_argument('--compare', help='Compare against a JSON file from an earlier run')
+        parser.add_argument(
+            '--threshold', type=float, default=10.0,
+            help='Percent p95/throughput change flagged as a regression by --compare',
+        )
+        parser.add_argument('--keep', action='store_true', help="Don't delete the seeded rows")
+        parser.add_argument('--base-url', help='Benchmark a running server instead of in-process')
+        parser.add_argument(
+            '--asgi', action='store_true',
+            help='Drive the routes in-process through the ASGI handler',
+        )
+        add_confirm_argument(parser)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        levels = [int(level) for level in options['concurrency'].split(',')]
+        if options['asgi'] and settings.SERVER_MODE != 'asgi':
+            raise CommandError('--asgi needs SERVER_MODE=asgi, which routes the async views')
+
+        if options['base_url']:
+            results = self.run_remote(options['base_url'], levels, options['requests'])
+        else:
+            confirm_writes(options)
+            try:
+                # Inside the try, so rows seeded before a failure are removed too
+                self.seed(options['projects'], options['resumes'])
+                with stub_cloudinary_urls():
+                    if options['asgi']:
+                        results = self.run_asgi(levels, options['requests'])
+                    else:
+                        results = self.run_in_process(levels, options['requests'])
+            finally:
+                if not options['keep']:
+                    self.cleanup()
+
+        report = {
+            'meta': {
+                'timestamp': timezone.now().isoformat(),
+                'projects': None if options['base_url'] else options['projects'],
+                'server_mode': settings.SERVER_MODE,
+                'handler': None if options['base_url'] else 'asgi' if options['asgi'] else 'wsgi',
+                'database': connection.vendor,
+                'python': platform.python_version(),
+                'peak_rss_kb': peak_rss_kb(),
+            },
+            'results': results,
+        }
+        self.stdout.write(f"Peak RSS: {report['meta']['peak_rss_kb'] / 1024:.1f} MiB")
+
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump(report, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+        if options['compare']:
+            self.compare(options['compare'], report, options['threshold'])
+
+    def seed(self, count, resumes):
+        self.stdout.write(f'Seeding {count} projects and {resumes} resumes...')
+        started = time.perf_counter()
+        rng = random.Random(42)
+        for offset in range(0, count, SEED_BATCH_SIZE):
+            batch = [
+                Project(
+                    title=f'{SEED_PREFIX}{index}',
+                    description='Benchmark project. ' * rng.randint(20, 200),
+                    short_description=f'Benchmark project {index}',
+                    github_url=f'https://github.com/example/{SEED_PREFIX}{index}',
+                    image=f'projects/{SEED_PREFIX}{index}',
+                    technologies=', '.join(rng.sample(TECHNOLOGIES, rng.randint(1, 4))),
+                    featured=rng.random() < 0.1,
+                    order=rng.randint(0, 10),
+                )
+                for index in range(offset, min(offset + SEED_BATCH_SIZE, count))
+            ]
+            search.index_projects(Project.objects.bulk_create(batch))
+
+        active = Resume.objects.filter(is_active=True)
+        self.previously_active = list(active.values_list('pk', flat=True))
+        active.update(is_active=False)
+        Resume.objects.bulk_create([
+            Resume(title=f'{SEED_PREFIX}{index}', file=f'resume/{SEED_PREFIX}{index}.pdf',
+                   is_active=index == resumes - 1)
+            for index in range(resumes)
+        ])
+        self.refresh_caches()
+        self.stdout.write(f'Seeded in {time.perf_counter() - started:.1f}s')
+
+    def cleanup(self):
+        # One transaction, so the delete signals rebuild the caches only once
+        with transaction.atomic():
+            Project.objects.filter(title__startswith=SEED_PREFIX).delete()
+            Resume.objects.filter(title__startswith=SEED_PREFIX).delete()
+            Resume.objects.filter(pk__in=getattr(self, 'previously_active', [])).update(
+                is_active=True
+            )
+        self.refresh_caches()
+
+    def refresh_caches(self):
+        # bulk writes skip the signals that normally keep these in step
+        bump_generation(Project)
+        bump_generation(Resume)
+        read_model.rebuild_all()
+
+    def run_in_process(self, levels, requests):
+        pks = list(
+            Project.objects.filter(title__startswith=SEED_PREFIX).values_list('pk', flat=True)[:1000]
+        )
+        local = threading.local()
+        counter = itertools.count()
+
+        def fetch(path):
+            if not hasattr(local, 'client'):
+                local.client = Client()
+            # A distinct client address per request, as under real traffic,
+            # so the anonymous throttle measures its cost without rejecting
+            ident = next(counter)
+            address = f'10.{ident >> 16 & 255}.{ident >> 8 & 255}.{ident & 255}'
+            url = '/api/' + path.format(pk=random.choice(pks) if pks else 0)
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = local.client.get(url, REMOTE_ADDR=address)
+                elapsed = time.perf_counter() - started
+            return elapsed, response.status_code, len(queries)
+
+        return self.run(fetch, levels, requests)
+
+    def run_asgi(self, levels, requests):
+        pks = list(
+            Project.objects.filter(title__startswith=SEED_PREFIX).values_list('pk', flat=True)[:1000]
+        )
+        client = AsyncClient()
+        counter = itertools.count()
+
+        async def fetch(path):
+            ident = next(counter)
+            address = f'10.{ident >> 16 & 255}.{ident >> 8 & 255}.{ident & 255}'
+            url = '/api/' + path.format(pk=random.choice(pks) if pks else 0)
+            started = time.perf_counter()
+            # The throttle's client address (DRF reads it from X-Forwarded-For first)
+            response = await client.get(url, headers={'X-Forwarded-For': address})
+            return time.perf_counter() - started, response.status_code, None
+
+        async def fetch_all(path, level):
+            semaphore = asyncio.Semaphore(level)
+
+            async def limited():
+                async with semaphore:
+                    return await fetch(path)
+            return await asyncio.gather(*(limited() for _ in range(requests)))
+
+        results = []
+        for level in levels:
+            for name, path in ROUTES:
+                async_to_sync(fetch)(path)  # warm the caches for this route
+                started = time.perf_counter()
+                samples = async_to_sync(fetch_all)(path, level)
+                elapsed = time.perf_counter() - started
+                results.append(self.summarize(name, level, samples, elapsed))
+        return results
+
+    def run_remote(self, base_url, levels, requests):
+        base_url = base_url.rstrip('/') + '/'
+        pks = [1]
+
+        def fetch(path):
+            url = base_url + path.format(pk=random.choice(pks))
+            started = time.perf_counter()
+            try:
+                with urllib.request.urlopen(url) as response:
+                    response.read()
+                    status = response.status
+            except urllib.error.HTTPError as exc:
+                status = exc.code
+            return time.perf_counter() - started, status, None
+
+        return self.run(fetch, levels, requests)
+
+    def run(self, fetch, levels, requests):
+        results = []
+        for level in levels:
+            with ThreadPoolExecutor(max_workers=level) as pool:
+                for name, path in ROUTES:
+                    fetch(path)  # warm the caches for this route
+                    started = time.perf_counter()
+                    samples = list(pool.map(fetch, [path] * requests))
+                    elapsed = time.perf_counter() - started
+                    results.append(self.summarize(name, level, samples, elapsed))
+        return results
+
+    def summarize(self, name, level, samples, elapsed):
+        latencies = [latency * 1000 for latency, _, _ in samples]
+        queries = [count for _, _, count in samples if count is not None]
+        result = {
+            'route': name,
+            'concurrency': level,
+            'requests': len(samples),
+            'requests_per_second': round(len(samples) / elapsed, 1),
+            'p50_ms': round(statistics.median(latencies), 3),
+            'p95_ms': round(percentile(latencies, 95), 3),
+            'p99_ms': round(percentile(latencies, 99), 3),
+            'queries_per_request': round(statistics.mean(queries), 2) if queries else None,
+            'status_4xx': sum(1 for _, status, _ in samples if 400 <= status < 500),
+            'status_5xx': sum(1 for _, status, _ in samples if status >= 500),
+        }
+        self.stdout.write(
+            f"{name:<24} c={level:<3} {result['requests_per_second']:9.1f} req/s  "
+            f"p50 {result['p50_ms']:8.2f}ms  p95 {result['p95_ms']:8.2f}ms  "
+            f"p99 {result['p99_ms']:8.2f}ms  "
+            f"queries {result['queries_per_request'] if queries else '-'}  "
+            f"4xx {result['status_4xx']}  5xx {result['status_5xx']}"
+        )
+        return result
+
+    def compare(self, path, report, threshold):
+        with open(path) as fh:
+            baseline = {
+                (result['route'], result['concurrency']): result
+                for result in json.load(fh)['results']
+            }
+
+        regressions = []
+        self.stdout.write(f'\nCompared with {path}:')
+        for result in report['results']:
+            before = baseline.get((result['route'], result['concurrency']))
+            if before is None:
+                continue
+            p95_change = (result['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100
+            rps_change = (
+                (result['requests_per_second'] - before['requests_per_second'])
+                / before['requests_per_second'] * 100
+            )
+            regressed = p95_change > threshold or rps_change < -threshold
+            line = (
+                f"{result['route']:<24} c={result['concurrency']:<3} "
+                f"p95 {p95_change:+7.1f}%  req/s {rps_change:+7.1f}%"
+            )
+            if regressed:
+                regressions.append(line)
+                line = self.style.ERROR(line + '  REGRESSION')
+            self.stdout.write(line)
+
+        if regressions:
+            raise CommandError(f'{len(regressions)} route(s) regressed by more than {threshold}%')
@@ -0,0 +1,84 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from projects.models import Project
+from projects.renderers import FastJSONRenderer, orjson
+from projects.serializers import (
+    FastProjectListSerializer,
+    FastProjectSerializer,
+    ProjectListSerializer,
+    ProjectSerializer,
+)
+
+from .benchmark_api import SEED_PREFIX, TECHNOLOGIES, stub_cloudinary_urls
+
+
+class Command(BaseCommand):
+    """
+    Django command to micro-benchmark serializing and rendering the project
+    list and detail shapes: DRF ModelSerializer + JSONRenderer against the
+    ``.values()`` serializers + orjson renderer used under FAST_JSON.
+
+    ``--projects`` rows are seeded inside a transaction that is rolled back
+    afterwards. Reports the best and median time per full render of
+    ``Project.objects.all()`` and checks both paths return the same bytes.
+    """
+
+    help = 'Micro-benchmark the stock and FAST_JSON project serialization paths'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--projects', type=int, default=1000, help='Projects to seed')
+        parser.add_argument('--repeat', type=int, default=10, help='Timed renders per path')
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        if orjson is None:
+            self.stdout.write(self.style.WARNING('orjson is not installed; FastJSONRenderer falls back'))
+
+        with transaction.atomic(), stub_cloudinary_urls():
+            Project.objects.bulk_create([
+                Project(
+                    title=f'{SEED_PREFIX}{index}',
+                    description='Benchmark project. ' * 50,
+                    short_description=f'Benchmark project {index}',
+                    github_url=f'https://github.com/example/{SEED_PREFIX}{index}',
+                    image=f'projects/{SEED_PREFIX}{index}',
+                    technologies=', '.join(TECHNOLOGIES[index % 4:index % 4 + 3]),
+                    featured=index % 10 == 0,
+                )
+                for index in range(options['projects'])
+            ])
+            for name, stock, fast in [
+                ('list', ProjectListSerializer, FastProjectListSerializer),
+                ('detail', ProjectSerializer, FastProjectSerializer),
+            ]:
+                self.compare(name, stock, fast, options['repeat'])
+            transaction.set_rollback(True)
+
+    def compare(self, name, stock, fast, repeat):
+        results = {}
+        for label, serializer_class, renderer in [
+            ('drf', stock, JSONRenderer()),
+            ('fast', fast, FastJSONRenderer()),
+        ]:
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                body = renderer.render(serializer_class(Project.objects.all(), many=True).data)
+                timings.append(time.perf_counter() - started)
+            results[label] = body, timings
+
+        identical = results['drf'][0] == results['fast'][0]
+        drf, fast = (statistics.median(results[label][1]) for label in ('drf', 'fast'))
+        for label in ('drf', 'fast'):
+            timings = results[label][1]
+            self.stdout.write(
+                f'{name:<7}{label:<5} best {min(timings) * 1000:8.2f}ms  '
+                f'median {statistics.median(timings) * 1000:8.2f}ms'
+            )
+        summary = f'{name:<7}speedup {drf / fast:.1f}x, identical bytes: {identical}'
+        self.stdout.write(self.style.SUCCESS(summary) if identical else self.style.ERROR(summary))
@@ -0,0 +1,98 @@
+import itertools
+import statistics
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.sessions.backends.cache import SessionStore
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from redis import Redis
+
+from projects.cache import redis_client
+
+from .benchmark_api import stub_cloudinary_urls
+
+
+class Command(BaseCommand):
+    """
+    Django command to measure what the lean ``/api/`` middleware chain saves.
+
+    Drives ``--path`` in-process with ``LEAN_API_MIDDLEWARE`` off and on,
+    once as an anonymous client and once with a session cookie (a browser
+    that has logged in to the admin), and reports the mean/p95 latency and
+    the Redis round-trips per request. Cloudinary URLs are stubbed.
+    """
+
+    help = 'Benchmark the full and the lean middleware stack on an API route'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000, help='Requests per run')
+        parser.add_argument('--path', default='/api/projects/', help='Route to request')
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        if not settings.LEAN_API_PREFIX or not options['path'].startswith(settings.LEAN_API_PREFIX):
+            raise CommandError(f'--path must start with {settings.LEAN_API_PREFIX}')
+        session = SessionStore()
+        session['benchmark'] = True
+        session.create()
+        self.addresses = itertools.count()
+        try:
+            with stub_cloudinary_urls():
+                for label, cookies in [
+                    ('anonymous', {}),
+                    ('with session', {settings.SESSION_COOKIE_NAME: session.session_key}),
+                ]:
+                    results = {
+                        lean: self.run(options['path'], cookies, options['requests'], lean)
+                        for lean in (False, True)
+                    }
+                    self.report(label, results)
+        finally:
+            session.delete()
+
+    def fetch(self, client, path):
+        # A distinct address per request, so the throttle never rejects one
+        ident = next(self.addresses)
+        response = client.get(path, REMOTE_ADDR=f'10.{ident >> 16 & 255}.{ident >> 8 & 255}.{ident & 255}')
+        if response.status_code != 200:
+            raise CommandError(f'{path} returned {response.status_code}')
+
+    def run(self, path, cookies, count, lean):
+        client = Client()
+        for name, value in cookies.items():
+            client.cookies[name] = value
+        samples = []
+        with override_settings(LEAN_API_MIDDLEWARE=lean):
+            self.fetch(client, path)  # warm the caches
+            for _ in range(count):
+                started = time.perf_counter()
+                self.fetch(client, path)
+                samples.append(time.perf_counter() - started)
+
+            round_trips = None
+            if redis_client() is not None:
+                # Counted in a separate pass so the patch doesn't skew the timings
+                with mock.patch.object(
+                    Redis, 'execute_command', autospec=True, side_effect=Redis.execute_command
+                ) as calls:
+                    for _ in range(100):
+                        self.fetch(client, path)
+                round_trips = calls.call_count / 100
+        return samples, round_trips
+
+    def report(self, label, results):
+        for lean, (samples, round_trips) in results.items():
+            samples.sort()
+            redis = f'{round_trips:5.2f}' if round_trips is not None else '  n/a'
+            self.stdout.write(
+                f'{label:<13}{"lean" if lean else "full":<5} '
+                f'mean {statistics.mean(samples) * 1e6:8.1f}us  '
+                f'p95 {samples[int(len(samples) * 0.95)] * 1e6:8.1f}us  '
+                f'redis round-trips/request {redis}'
+            )
+        full, lean = (statistics.mean(results[mode][0]) for mode in (False, True))
+        self.stdout.write(self.style.SUCCESS(
+            f'{label:<13}lean saves {(full - lean) * 1e6:.1f}us per request ({1 - lean / full:.1%})'
+        ))
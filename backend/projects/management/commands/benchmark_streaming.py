@@ -0,0 +1,137 @@
+import gzip
+import hashlib
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client, override_settings
+
+from projects import search
+from projects.cache import bump_generation, publish_invalidation
+from projects.models import Project
+from projects.serializers import ProjectListSerializer
+
+from .benchmark_api import (
+    SEED_BATCH_SIZE,
+    SEED_PREFIX,
+    TECHNOLOGIES,
+    add_confirm_argument,
+    confirm_writes,
+    stub_cloudinary_urls,
+)
+
+
+class Command(BaseCommand):
+    """
+    Django command to compare the buffered and the streamed project listing.
+
+    Seeds ``--projects`` rows (100k by default) and requests the full
+    listing gzipped, with ``STREAMING_JSON`` off and on, reporting the
+    time to first byte, the total time, the body size and the peak Python
+    memory allocated while serving it (traced in a separate pass, since
+    tracing slows the request down). The request names every list field
+    in ``?fields=``, which returns the plain listing while bypassing the
+    read model, so both modes render it. Also checks that both bodies are
+    identical. Cloudinary URLs are stubbed. Like benchmark_api it only
+    writes to the database with ``DEBUG`` on or ``--yes``.
+    """
+
+    help = 'Benchmark memory and time to first byte of the streamed project listing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--projects', type=int, default=100000, help='Projects to seed')
+        parser.add_argument('--keep', action='store_true', help="Don't delete the seeded rows")
+        add_confirm_argument(parser)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        confirm_writes(options)
+        path = '/api/projects/?fields=' + ','.join(ProjectListSerializer.Meta.fields)
+        try:
+            self.seed(options['projects'])
+            with stub_cloudinary_urls():
+                results = {streamed: self.run(path, streamed) for streamed in (False, True)}
+        finally:
+            if not options['keep']:
+                self.cleanup()
+
+        for streamed, result in results.items():
+            self.stdout.write(
+                f'{"streamed" if streamed else "buffered":<9} '
+                f'first byte {result["first_byte"] * 1000:8.1f}ms  '
+                f'total {result["total"] * 1000:8.1f}ms  '
+                f'gzipped {result["size"] / 2 ** 20:6.1f} MiB  '
+                f'peak memory {result["peak"] / 2 ** 20:7.1f} MiB'
+            )
+        if results[False]['digest'] != results[True]['digest']:
+            raise CommandError('The streamed body differs from the buffered one')
+        buffered, streamed = results[False]['peak'], results[True]['peak']
+        self.stdout.write(self.style.SUCCESS(
+            f'Identical bodies; streaming peaks at {streamed / buffered:.1%} of the buffered memory'
+        ))
+
+    def seed(self, count):
+        self.stdout.write(f'Seeding {count} projects...')
+        started = time.perf_counter()
+        for offset in range(0, count, SEED_BATCH_SIZE):
+            batch = [
+                Project(
+                    title=f'{SEED_PREFIX}{index}',
+                    description='Benchmark project.',
+                    short_description=f'Benchmark project {index}',
+                    github_url=f'https://github.com/example/{SEED_PREFIX}{index}',
+                    image=f'projects/{SEED_PREFIX}{index}',
+                    technologies=', '.join(TECHNOLOGIES[index % 4:index % 4 + 3]),
+                    featured=index % 10 == 0,
+                    order=index % 10,
+                )
+                for index in range(offset, min(offset + SEED_BATCH_SIZE, count))
+            ]
+            search.index_projects(Project.objects.bulk_create(batch))
+        self.stdout.write(f'Seeded in {time.perf_counter() - started:.1f}s')
+
+    def cleanup(self):
+        with transaction.atomic():
+            Project.objects.filter(title__startswith=SEED_PREFIX).delete()
+
+    def fetch(self, client, path):
+        # A new generation each time, so the response cache never answers
+        bump_generation(Project)
+        publish_invalidation()
+        started = time.perf_counter()
+        response = client.get(path, HTTP_ACCEPT_ENCODING='gzip')
+        if response.status_code != 200:
+            raise CommandError(f'{path} returned {response.status_code}')
+        return started, response
+
+    def run(self, path, streamed):
+        client = Client()
+        with override_settings(STREAMING_JSON=streamed):
+            started, response = self.fetch(client, path)
+            pieces = iter(response) if streamed else iter([response.content])
+            body = [next(pieces)]
+            if streamed:
+                # The first piece is the gzip header, sent before any row is read
+                body.append(next(pieces, b''))
+            first_byte = time.perf_counter() - started
+            body.extend(pieces)
+            total = time.perf_counter() - started
+            body = b''.join(body)
+
+            tracemalloc.start()
+            try:
+                _, response = self.fetch(client, path)
+                # Consumed piece by piece, as a server writing to a socket would
+                for _ in (response if streamed else [response.content]):
+                    pass
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+        return {
+            'first_byte': first_byte,
+            'total': total,
+            'size': len(body),
+            'peak': peak,
+            'digest': hashlib.sha256(gzip.decompress(body)).hexdigest(),
+        }
@@ -0,0 +1,84 @@
+import statistics
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from redis import Redis
+from rest_framework.request import Request
+from rest_framework.throttling import AnonRateThrottle
+
+from projects.cache import redis_client
+from projects.throttling import AnonTokenBucketThrottle, local_buckets
+
+RATE = '1000000/hour'
+
+
+class Command(BaseCommand):
+    """
+    Django command to compare the per-request cost of DRF's AnonRateThrottle
+    with the token-bucket throttle in projects/throttling.py.
+
+    Both run against the configured Redis cache with a rate high enough
+    that every request is allowed. Reports the mean/p95 time per
+    allow_request(), Redis round-trips per request and the memory held per
+    client once ``--requests`` have been spread over ``--clients``.
+    """
+
+    help = 'Benchmark the per-request overhead of the API throttles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=5000, help='Throttle checks per class')
+        parser.add_argument('--clients', type=int, default=50, help='Distinct client addresses')
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        client = redis_client()
+        if client is None:
+            raise CommandError('The default cache must be django_redis to benchmark throttling')
+
+        factory = RequestFactory()
+        requests = [
+            Request(factory.get('/api/projects/', REMOTE_ADDR=f'10.0.{index >> 8}.{index & 255}'))
+            for index in range(options['clients'])
+        ]
+        for throttle_class in (AnonRateThrottle, AnonTokenBucketThrottle):
+            throttle_class = type(
+                throttle_class.__name__, (throttle_class,), {'THROTTLE_RATES': {'anon': RATE}}
+            )
+            self.run(throttle_class, requests, options['requests'], client)
+
+    def run(self, throttle_class, requests, count, client):
+        keys = [throttle_class().get_cache_key(request, None) for request in requests]
+        cache.delete_many(keys)
+        local_buckets.clear()
+
+        samples = []
+        for index in range(count):
+            request = requests[index % len(requests)]
+            started = time.perf_counter()
+            allowed = throttle_class().allow_request(request, None)
+            samples.append(time.perf_counter() - started)
+            if not allowed:
+                raise CommandError(f'{throttle_class.__name__} throttled a benchmark request')
+
+        # Counted in a separate pass so the patch doesn't skew the timings
+        with mock.patch.object(
+            Redis, 'execute_command', autospec=True, side_effect=Redis.execute_command
+        ) as round_trips:
+            for request in requests:
+                throttle_class().allow_request(request, None)
+        memory = statistics.mean(
+            client.memory_usage(cache.make_key(key)) or 0 for key in keys
+        )
+        cache.delete_many(keys)
+
+        samples.sort()
+        self.stdout.write(
+            f'{throttle_class.__name__:<24} '
+            f'mean {statistics.mean(samples) * 1e6:8.1f}us  '
+            f'p95 {samples[int(len(samples) * 0.95)] * 1e6:8.1f}us  '
+            f'redis round-trips/request {round_trips.call_count / len(requests):5.2f}  '
+            f'bytes/client {memory:8.0f}'
+        )
@@ -0,0 +1,192 @@
+import hashlib
+import importlib.util
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import Counter
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.staticfiles.finders import get_finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.recorder import MigrationRecorder
+
+STATIC_FINGERPRINT_NAME = '.boot-fingerprint'
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def migration_files():
+    """``(app label, migration name)`` of every migration file, found without importing them"""
+    for app_config in apps.get_app_configs():
+        module_name, _ = MigrationLoader.migrations_module(app_config.label)
+        spec = importlib.util.find_spec(module_name) if module_name else None
+        if spec is None or not spec.submodule_search_locations:
+            continue
+        for directory in spec.submodule_search_locations:
+            for name in sorted(os.listdir(directory)):
+                if name.endswith('.py') and name != '__init__.py':
+                    yield app_config.label, name.removesuffix('.py')
+
+
+def unapplied_migrations():
+    """The migration files the database's ``django_migrations`` table doesn't list"""
+    applied = MigrationRecorder(connection).applied_migrations()
+    return [key for key in migration_files() if key not in applied]
+
+
+def static_fingerprint():
+    """Hash of the contents of every file collectstatic would copy"""
+    files = {}
+    for finder in get_finders():
+        for path, storage in finder.list(['CVS', '.*', '*~']):
+            prefix = getattr(storage, 'prefix', None) or ''
+            files.setdefault(os.path.join(prefix, path), storage.path(path))
+    digest = hashlib.sha256(settings.STORAGES['staticfiles']['BACKEND'].encode())
+    for name in sorted(files):
+        digest.update(name.encode())
+        with open(files[name], 'rb') as fh:
+            digest.update(hashlib.sha256(fh.read()).digest())
+    return digest.hexdigest()
+
+
+def importtime_summary():
+    """
+    Load the app in a fresh ``python -X importtime`` process.
+
+    Returns the total import time in seconds and the cumulative seconds
+    per top-level package.
+    """
+    result = subprocess.run(
+        [
+            sys.executable, '-X', 'importtime', '-c',
+            f'import django; django.setup(); import {settings.ROOT_URLCONF}',
+        ],
+        capture_output=True, text=True, cwd=settings.BASE_DIR, check=True,
+    )
+    packages = Counter()
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match and len(match.group(3)) == 1:
+            # Top-level imports only; nested ones are in their cumulative time
+            packages[match.group(4).split('.')[0]] += int(match.group(2)) / 1e6
+    return sum(packages.values()), packages
+
+
+class Command(BaseCommand):
+    """
+    Django command running every container boot step in one process:
+    wait for the database, migrate, collectstatic, rebuild the read model,
+    export the API snapshot and create the superuser.
+
+    migrate is skipped when the database has recorded every migration file
+    as applied (one query, without importing the migrations) and
+    collectstatic while the hash of the static sources (kept in
+    STATIC_ROOT) is unchanged; ``--force`` runs both anyway.
+    Reports the time of each phase, and with ``--importtime`` the import
+    cost of loading the app broken down by package.
+    """
+
+    help = 'Run the deploy steps in a single process, skipping unchanged ones'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Ignore the stored fingerprints')
+        parser.add_argument('--importtime', action='store_true', help='Report import time by package')
+        parser.add_argument('--top', type=int, default=10, help='Packages listed by --importtime')
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        self.force = options['force']
+        self.verbosity = options['verbosity']
+        phases = [
+            ('wait_for_db', self.wait_for_db),
+            ('migrate', self.migrate),
+            ('collectstatic', self.collectstatic),
+            ('read model', self.rebuild_read_model),
+            ('api snapshot', self.export_api_snapshot),
+            ('superuser', self.ensure_superuser),
+        ]
+        timings = []
+        for name, phase in phases:
+            started = time.perf_counter()
+            outcome = phase()
+            timings.append((name, time.perf_counter() - started, outcome))
+
+        self.stdout.write('')
+        for name, elapsed, outcome in timings:
+            self.stdout.write(f'{name:<14}{elapsed:8.2f}s  {outcome}')
+        total = sum(elapsed for _, elapsed, _ in timings)
+        self.stdout.write(self.style.SUCCESS(f'{"total":<14}{total:8.2f}s'))
+
+        if options['importtime']:
+            total, packages = importtime_summary()
+            self.stdout.write(f'\nImports while loading the app: {total:.2f}s')
+            for package, seconds in packages.most_common(options['top']):
+                self.stdout.write(f'  {package:<28}{seconds * 1000:8.1f}ms')
+
+    def call(self, name, *args, **options):
+        call_command(name, *args, verbosity=self.verbosity, stdout=self.stdout, **options)
+
+    def wait_for_db(self):
+        self.call('wait_for_db')
+        return 'available'
+
+    def migrate(self):
+        if not unapplied_migrations() and not self.force:
+            return 'skipped, every migration is applied'
+
+        executor = MigrationExecutor(connection)
+        if executor.migration_plan(executor.loader.graph.leaf_nodes()):
+            self.call('migrate', interactive=False)
+            return 'applied'
+        return 'nothing to apply'
+
+    def collectstatic(self):
+        path = os.path.join(settings.STATIC_ROOT, STATIC_FINGERPRINT_NAME)
+        fingerprint = static_fingerprint()
+        manifest = getattr(staticfiles_storage, 'manifest_name', None)
+        try:
+            with open(path) as fh:
+                stored = fh.read()
+        except FileNotFoundError:
+            stored = None
+        if (
+            stored == fingerprint
+            and not self.force
+            and (manifest is None or staticfiles_storage.exists(manifest))
+        ):
+            return 'skipped, static files unchanged'
+
+        self.call('collectstatic', interactive=False)
+        with open(path, 'w') as fh:
+            fh.write(fingerprint)
+        return 'collected'
+
+    def rebuild_read_model(self):
+        self.call('rebuild_read_model')
+        return 'rebuilt'
+
+    def export_api_snapshot(self):
+        if not settings.API_SNAPSHOT:
+            return 'skipped, API_SNAPSHOT is disabled'
+        self.call('export_api_snapshot', prune=True)
+        return 'exported'
+
+    def ensure_superuser(self):
+        User = get_user_model()
+        username = os.environ.get('DJANGO_SUPERUSER_USERNAME', 'admin')
+        if User.objects.filter(username=username).exists():
+            return f'"{username}" already exists'
+        User.objects.create_superuser(
+            username=username,
+            email=os.environ.get('DJANGO_SUPERUSER_EMAIL', 'admin@example.com'),
+            password=os.environ.get('DJANGO_SUPERUSER_PASSWORD', 'admin123'),
+        )
+        return f'"{username}" created'
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from projects import views  # noqa: F401  (registers the cached view prefixes)
+from projects.cache import CACHED_VIEWS, stats
+
+
+class Command(BaseCommand):
+    """Django command to report response cache and L1/L2 tier hit/miss counters"""
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        outcomes = (
+            'hit', 'miss', 'read-model', 'read-model-bypass', 'stale', 'coalesced',
+            'early-refresh',
+        )
+        for prefix, totals in stats.totals(CACHED_VIEWS, outcomes).items():
+            self.stdout.write(
+                f"{prefix}: {totals['hit']} hits, {totals['miss']} misses "
+                f"({totals['hit_ratio']:.1%} hit ratio), "
+                f"{totals['read-model']} served from the read model, "
+                f"{totals['stale'] + totals['coalesced']} kept off the database during rebuilds "
+                f"({totals['stale']} stale, {totals['coalesced']} waited), "
+                f"{totals['early-refresh']} early refreshes"
+            )
+
+        tiers = stats.totals(['cache-tier'], ('l1-hit', 'l2-hit', 'l2-miss'))['cache-tier']
+        lookups = sum(tiers[outcome] for outcome in ('l1-hit', 'l2-hit', 'l2-miss'))
+        if lookups:
+            self.stdout.write(
+                f"tiers: {tiers['l1-hit']} L1 hits ({tiers['l1-hit'] / lookups:.1%}), "
+                f"{tiers['l2-hit']} L2 hits ({tiers['l2-hit'] / lookups:.1%}), "
+                f"{tiers['l2-miss']} misses"
+            )
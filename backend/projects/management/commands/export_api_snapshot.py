@@ -0,0 +1,32 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from projects import snapshot
+
+
+class Command(BaseCommand):
+    """Django command to write the static JSON snapshot of the API"""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--prune', action='store_true',
+            help='Delete files of older snapshots',
+        )
+        parser.add_argument(
+            '--force', action='store_true', help='Export even if API_SNAPSHOT is disabled',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        if not settings.API_SNAPSHOT and not options['force']:
+            self.stdout.write('API_SNAPSHOT is disabled, skipping the snapshot export')
+            return
+        self.stdout.write('Exporting API snapshot...')
+        started = time.perf_counter()
+        manifest = snapshot.export(prune=options['prune'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Exported {len(manifest)} routes to {snapshot.snapshot_root()} in {elapsed:.2f}s'
+        ))
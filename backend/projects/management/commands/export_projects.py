@@ -0,0 +1,65 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from projects import transfer
+
+
+class Command(BaseCommand):
+    """
+    Django command to export projects or resumes to a JSONL or CSV file.
+
+    Rows are streamed in primary-key order, ``--chunk-size`` at a time,
+    and the position is saved to ``<path>.checkpoint`` after every chunk;
+    ``--resume`` continues an interrupted export from there. On PostgreSQL
+    CSV is written by ``COPY``. The output loads back with
+    ``import_projects``.
+    """
+
+    help = 'Stream projects or resumes to a JSONL or CSV file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Output file; a .csv name selects CSV')
+        parser.add_argument('--model', choices=sorted(transfer.MODELS), default='projects')
+        parser.add_argument('--format', choices=transfer.FORMATS, help='Defaults to the file extension')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Rows per chunk and checkpoint')
+        parser.add_argument('--resume', action='store_true', help='Continue an interrupted export')
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        path = options['path']
+        format = options['format'] or transfer.guess_format(path)
+        checkpoint = transfer.Checkpoint(path)
+        state = checkpoint.load() if options['resume'] else None
+        if options['resume'] and state is None:
+            raise CommandError(f'No checkpoint at {checkpoint.path}')
+        if state and (state['model'], state['format']) != (options['model'], format):
+            raise CommandError(f'{checkpoint.path} is for an export of {state["model"]} as {state["format"]}')
+        after, offset, done = (state['pk'], state['offset'], state['rows']) if state else (0, 0, 0)
+
+        model = transfer.MODELS[options['model']]
+        started = time.perf_counter()
+        count = 0
+        try:
+            with open(path, 'r+b' if state else 'wb') as fh:
+                # Drops whatever was written after the last checkpoint
+                fh.seek(offset)
+                fh.truncate()
+                for pk, count in transfer.export_rows(
+                    model, fh, format, after, options['chunk_size'], header=not state
+                ):
+                    checkpoint.save(
+                        model=options['model'], format=format, pk=pk, offset=fh.tell(), rows=done + count
+                    )
+                    if options['verbosity'] > 1:
+                        self.stdout.write(f'{done + count} rows, {self.rate(count, started)}')
+        except KeyboardInterrupt:
+            raise CommandError(f'Interrupted after {done + count} rows; rerun with --resume to continue')
+        checkpoint.clear()
+        self.stdout.write(self.style.SUCCESS(
+            f'Exported {count} {options["model"]} to {path} in '
+            f'{time.perf_counter() - started:.2f}s ({self.rate(count, started)})'
+        ))
+
+    def rate(self, count, started):
+        return f'{count / max(time.perf_counter() - started, 1e-9):.0f} rows/s'
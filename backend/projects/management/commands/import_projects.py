@@ -0,0 +1,73 @@
+import itertools
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from projects import transfer
+
+
+class Command(BaseCommand):
+    """
+    Django command to load projects or resumes from a JSONL or CSV file.
+
+    Records are upserted on ``id`` (records without one are added) in
+    transactions of ``--batch-size`` rows; only the columns present in the
+    file are written to existing rows. The number of records committed is
+    saved to ``<path>.checkpoint`` after every batch and ``--resume`` skips
+    them. Reads what ``export_projects`` writes, and seeds large datasets.
+    """
+
+    help = 'Upsert projects or resumes from a JSONL or CSV file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Input file; a .csv name selects CSV')
+        parser.add_argument('--model', choices=sorted(transfer.MODELS), default='projects')
+        parser.add_argument('--format', choices=transfer.FORMATS, help='Defaults to the file extension')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per transaction')
+        parser.add_argument('--resume', action='store_true', help='Continue an interrupted import')
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        path = options['path']
+        format = options['format'] or transfer.guess_format(path)
+        checkpoint = transfer.Checkpoint(path)
+        state = checkpoint.load() if options['resume'] else None
+        if options['resume'] and state is None:
+            raise CommandError(f'No checkpoint at {checkpoint.path}')
+        if state and (state['model'], state['format']) != (options['model'], format):
+            raise CommandError(f'{checkpoint.path} is for an import of {state["model"]} as {state["format"]}')
+        skip = state['rows'] if state else 0
+
+        model = transfer.MODELS[options['model']]
+        started = time.perf_counter()
+        count = 0
+        interrupted = False
+        with open(path, 'rb') as fh:
+            records = transfer.read_records(fh, format)
+            first = next(records, None)
+            if first is None:
+                raise CommandError(f'{path} has no records')
+            columns = list(first)
+            unknown = set(columns) - {field.attname for field in transfer.transfer_fields(model)}
+            if unknown:
+                raise CommandError(f'Unknown {options["model"]} columns: {", ".join(sorted(unknown))}')
+            records = itertools.islice(itertools.chain([first], records), skip, None)
+            try:
+                for count in transfer.import_rows(model, records, columns, options['batch_size']):
+                    checkpoint.save(model=options['model'], format=format, rows=skip + count)
+                    if options['verbosity'] > 1:
+                        self.stdout.write(f'{skip + count} rows, {self.rate(count, started)}')
+            except KeyboardInterrupt:
+                interrupted = True
+        if count:
+            transfer.finish_import(model)
+        if interrupted:
+            raise CommandError(f'Interrupted after {skip + count} rows; rerun with --resume to continue')
+        checkpoint.clear()
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {count} {options["model"]} from {path} in '
+            f'{time.perf_counter() - started:.2f}s ({self.rate(count, started)})'
+        ))
+
+    def rate(self, count, started):
+        return f'{count / max(time.perf_counter() - started, 1e-9):.0f} rows/s'
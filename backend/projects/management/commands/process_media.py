@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from projects import media_jobs
+from projects.models import MediaJob
+
+
+class Command(BaseCommand):
+    """
+    Django command that works through the queued admin media uploads.
+
+    Runs until interrupted, polling the queue every ``--poll-interval``
+    seconds when it's empty; ``--once`` exits once the queue is drained.
+    Several workers can run side by side, each job is claimed by one.
+    """
+
+    help = 'Upload and post-process media queued from the admin'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit when the queue is empty')
+        parser.add_argument('--poll-interval', type=float, default=2.0, help='Seconds between polls')
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        backend = media_jobs.media_backend()
+        while True:
+            close_old_connections()
+            job = media_jobs.claim()
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+                continue
+
+            started = time.perf_counter()
+            job = media_jobs.process(job, backend)
+            elapsed = time.perf_counter() - started
+            if job.status == MediaJob.DONE:
+                self.stdout.write(self.style.SUCCESS(f'{job} in {elapsed:.1f}s'))
+            else:
+                self.stderr.write(f'{job} after attempt {job.attempts}:\n{job.error}')
@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from projects import read_model
+
+
+class Command(BaseCommand):
+    """Django command to rebuild the precomputed project read model"""
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        self.stdout.write('Rebuilding project read model...')
+        started = time.perf_counter()
+        count = read_model.rebuild_all()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {count} project documents and {len(read_model.LISTINGS)} '
+            f'listings in {elapsed:.2f}s'
+        ))
@@ -1,22 +1,45 @@
 import time
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.db import connections
 from django.db.utils import OperationalError
 
 
 class Command(BaseCommand):
-    """Django command to wait for database to be available"""
+    """
+    Django command to wait for database to be available.
+
+    Retries with exponential backoff (``--initial-delay`` doubling up to
+    ``--max-delay``) and gives up with a non-zero exit after ``--timeout``
+    seconds.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--timeout', type=float, default=60.0, help='Seconds before giving up')
+        parser.add_argument('--initial-delay', type=float, default=0.5, help='First retry delay')
+        parser.add_argument('--max-delay', type=float, default=8.0, help='Longest retry delay')
+        parser.add_argument('--database', default='default', help='Database alias to check')
 
     def handle(self, *args, **options):
         """Entrypoint for command"""
         self.stdout.write('Waiting for database...')
-        db_conn = None
-        while not db_conn:
+        db_conn = connections[options['database']]
+        deadline = time.monotonic() + options['timeout']
+        delay = options['initial_delay']
+        attempts = 0
+        while True:
+            attempts += 1
             try:
-                db_conn = connections['default']
-                db_conn.cursor()
-            except OperationalError:
-                self.stdout.write('Database unavailable, waiting 1 second...')
-                time.sleep(1)
+                db_conn.ensure_connection()
+                break
+            except OperationalError as exc:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise CommandError(
+                        f'Database unavailable after {attempts} attempts: {exc}'
+                    ) from exc
+                delay = min(delay, remaining)
+                self.stdout.write(f'Database unavailable, waiting {delay:.1f} seconds...')
+                time.sleep(delay)
+                delay = min(delay * 2, options['max_delay'])
 
         self.stdout.write(self.style.SUCCESS('Database available!'))
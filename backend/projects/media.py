@@ -0,0 +1,203 @@
+"""
+Memoized Cloudinary URL building.
+
+``CloudinaryResource.url`` signs and assembles the URL through the SDK on
+every call. These helpers cache the result per public_id, version and
+transformation in a bounded in-process LRU, and build the responsive
+``srcset`` variants of an image once. Time-limited download links, signed
+by ``SIGNED_URL_BACKEND``, are kept until shortly before they expire.
+"""
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.utils.crypto import salted_hmac
+from django.utils.module_loading import import_string
+
+
+class LRUCache:
+    """A small thread-safe LRU mapping"""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                return None
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def discard(self, predicate):
+        """Drop every key for which ``predicate(key)`` is true"""
+        with self._lock:
+            for key in [key for key in self._data if predicate(key)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+_urls = LRUCache(settings.CLOUDINARY_URL_CACHE_SIZE)
+
+
+def _cache_key(resource, variant, options):
+    return (
+        resource.public_id,
+        resource.version,
+        resource.resource_type,
+        resource.type,
+        resource.format,
+        variant,
+        repr(sorted(options.items())),
+    )
+
+
+def resource_url(resource, **options):
+    """Return the delivery URL of a CloudinaryResource, or None if empty"""
+    if not resource:
+        return None
+    options = {**resource.url_options, **options}
+    key = _cache_key(resource, 'url', options)
+    url = _urls.get(key)
+    if url is None:
+        url = resource.build_url(**options)
+        _urls.set(key, url)
+    return url
+
+
+def responsive_srcset(resource, widths=None):
+    """
+    Return ``["<url> <width>w", ...]`` for the responsive widths of an image.
+
+    Each variant is resized with ``c_limit`` (never upscaled) and delivered
+    with ``f_auto``/``q_auto``, so the browser picks a small, modern format.
+    """
+    if not resource:
+        return []
+    widths = tuple(widths or settings.CLOUDINARY_RESPONSIVE_WIDTHS)
+    key = _cache_key(resource, 'srcset', {'widths': widths})
+    srcset = _urls.get(key)
+    if srcset is None:
+        srcset = [
+            '{} {}w'.format(
+                resource.build_url(
+                    width=width, crop='limit', fetch_format='auto', quality='auto'
+                ),
+                width,
+            )
+            for width in widths
+        ]
+        _urls.set(key, srcset)
+    return srcset
+
+
+def forget(resource):
+    """Drop every cached URL of ``resource``'s public_id"""
+    # Freshly assigned field values may still be plain strings
+    public_id = getattr(resource, 'public_id', resource)
+    if public_id:
+        _urls.discard(lambda key: key[0] == public_id)
+
+
+class CloudinaryURLSigner:
+    """
+    Signed Cloudinary links delivering a file as a named attachment.
+
+    The name goes in ``fl_attachment:<name>``, with the extension taken
+    from the file. Those are delivery URLs, which only expire with a token
+    signed by ``CLOUDINARY_AUTH_TOKEN_KEY``; without one they are used for
+    public (``upload``) files only, and other files go through the
+    authenticated download API, which can't rename them.
+    """
+
+    def sign(self, resource, expires_at, filename=None):
+        """URL downloading ``resource`` as an attachment until ``expires_at``"""
+        import cloudinary.utils
+
+        key = settings.CLOUDINARY_AUTH_TOKEN_KEY
+        if key or resource.type == 'upload':
+            name = attachment_name(filename) if filename else ''
+            url, _ = cloudinary.utils.cloudinary_url(
+                resource.public_id,
+                format=resource.format,
+                version=resource.version,
+                resource_type=resource.resource_type,
+                type=resource.type,
+                flags=f'attachment:{name}' if name else 'attachment',
+                sign_url=True,
+                secure=True,
+                auth_token={'key': key, 'expiration': expires_at} if key else False,
+            )
+            return url
+        return cloudinary.utils.private_download_url(
+            resource.public_id,
+            resource.format,
+            resource_type=resource.resource_type,
+            type=resource.type,
+            expires_at=expires_at,
+            attachment=True,
+        )
+
+
+def attachment_name(filename):
+    """``filename`` without its extension, in the characters ``fl_attachment`` accepts"""
+    stem = os.path.splitext(filename)[0]
+    stem = unicodedata.normalize('NFKD', stem).encode('ascii', 'ignore').decode()
+    return re.sub(r'[^A-Za-z0-9_-]+', '_', stem).strip('_')
+
+
+class LocalURLSigner:
+    """Stand-in for Cloudinary that signs links with the SECRET_KEY"""
+
+    def sign(self, resource, expires_at, filename=None):
+        name = f'{resource.public_id}.{resource.format}' if resource.format else resource.public_id
+        url = f'/media/local/{name}?' + urlencode({
+            'expires_at': expires_at,
+            'filename': filename or '',
+        })
+        signature = salted_hmac('projects.media.LocalURLSigner', url).hexdigest()
+        return f'{url}&signature={signature}'
+
+
+def url_signer():
+    return import_string(settings.SIGNED_URL_BACKEND)()
+
+
+def signed_url(resource, filename=None):
+    """
+    Return ``(url, expires_at)``: a time-limited download link of ``resource``.
+
+    The link is valid for ``SIGNED_URL_TTL`` seconds and reused until
+    ``SIGNED_URL_REFRESH`` seconds before it expires; ``(None, None)`` if
+    there is no file.
+    """
+    if not resource:
+        return None, None
+    key = _cache_key(resource, 'signed', {'filename': filename})
+    signed = _urls.get(key)
+    now = time.time()
+    if signed is None or signed[1] - now <= settings.SIGNED_URL_REFRESH:
+        expires_at = int(now) + settings.SIGNED_URL_TTL
+        signed = (url_signer().sign(resource, expires_at, filename), expires_at)
+        _urls.set(key, signed)
+    return signed
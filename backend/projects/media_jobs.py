@@ -0,0 +1,232 @@
+"""
+Background processing of admin media uploads.
+
+Saving a ``CloudinaryField`` upload sends the file to Cloudinary inside
+the request. The admin instead stages the upload on local disk
+(``MEDIA_STAGING_ROOT``) and queues a ``MediaJob``. ``manage.py
+process_media`` claims queued jobs, uploads each file with its eager
+transformations (the responsive widths and thumbnail of a project image, a
+first-page preview of a PDF resume), records its dimensions, size and
+checksum and saves the row, which refreshes the caches through the usual
+signals. A resume added as active is saved inactive and only activated by
+its job, so the current resume stays downloadable meanwhile.
+
+``MEDIA_BACKEND`` decides where files go: ``CloudinaryBackend`` or
+``LocalMediaBackend``, a filesystem stand-in for development and tests.
+"""
+import hashlib
+import os
+import time
+import traceback
+from datetime import timedelta
+
+from cloudinary import CloudinaryResource
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import MediaJob, Project, Resume
+
+# Job kind -> (model, field, Cloudinary resource type, folder)
+MEDIA_FIELDS = {
+    'project-image': (Project, 'image', 'image', 'projects'),
+    'resume-file': (Resume, 'file', 'raw', 'resumes'),
+}
+CHUNK_SIZE = 64 * 1024
+PDF_PREVIEW = {'page': 1, 'width': 800, 'crop': 'limit', 'format': 'jpg'}
+
+
+def eager_transformations():
+    """Project image variants rendered at upload time instead of on first view"""
+    return [
+        {'width': width, 'crop': 'limit', 'quality': 'auto'}
+        for width in settings.CLOUDINARY_RESPONSIVE_WIDTHS
+    ] + [settings.CLOUDINARY_THUMBNAIL]
+
+
+class CloudinaryBackend:
+    """Upload through the Cloudinary API"""
+
+    def upload(self, fh, name, resource_type, folder, eager=None):
+        """Upload ``fh``; returns the upload API response"""
+        import cloudinary.uploader  # only the process_media worker needs it
+
+        upload = cloudinary.uploader.upload
+        if os.fstat(fh.fileno()).st_size > cloudinary.uploader.UPLOAD_LARGE_CHUNK_SIZE:
+            upload = cloudinary.uploader.upload_large
+        options = {'resource_type': resource_type, 'folder': folder}
+        if eager:
+            options['eager'] = eager
+        return upload(fh, **options)
+
+    def pdf_preview(self, fh, name, folder):
+        """URL of an image of the first page of PDF ``fh``"""
+        import cloudinary.uploader
+
+        response = cloudinary.uploader.upload(
+            fh, resource_type='image', folder=f'{folder}/previews', eager=[PDF_PREVIEW]
+        )
+        return response['eager'][0]['secure_url']
+
+
+class LocalMediaBackend:
+    """Stand-in for Cloudinary that keeps files under MEDIA_STAGING_ROOT/local"""
+
+    def __init__(self):
+        self.storage = FileSystemStorage(
+            location=os.path.join(settings.MEDIA_STAGING_ROOT, 'local')
+        )
+
+    def upload(self, fh, name, resource_type, folder, eager=None):
+        stored = self.storage.save(f'{folder}/{os.path.basename(name)}', File(fh))
+        public_id, extension = os.path.splitext(stored)
+        if resource_type == 'raw':
+            # Raw public ids keep their extension, as on Cloudinary
+            public_id, extension = stored, ''
+        return {
+            'public_id': public_id,
+            'version': int(time.time()),
+            'format': extension.lstrip('.') or None,
+            'resource_type': resource_type,
+            'type': 'upload',
+        }
+
+    def pdf_preview(self, fh, name, folder):
+        return ''  # nothing to rasterize PDFs with locally
+
+
+def media_backend():
+    return import_string(settings.MEDIA_BACKEND)()
+
+
+def file_metadata(fh, image=False):
+    """``(size in bytes, sha256 hex digest, (width, height) or None)`` of ``fh``"""
+    digest = hashlib.sha256()
+    size = 0
+    for chunk in iter(lambda: fh.read(CHUNK_SIZE), b''):
+        digest.update(chunk)
+        size += len(chunk)
+    dimensions = None
+    if image:
+        from PIL import Image, UnidentifiedImageError  # keeps Pillow out of web startup
+
+        fh.seek(0)
+        try:
+            with Image.open(fh) as img:  # reads the header only
+                dimensions = img.size
+        except UnidentifiedImageError:
+            pass
+    fh.seek(0)
+    return size, digest.hexdigest(), dimensions
+
+
+def enqueue(instance, field, upload, activate=False):
+    """
+    Stage ``upload`` for ``instance.<field>`` and queue it; ``instance`` must be saved.
+
+    ``activate`` makes the resume active once the file is ready. A job
+    that supersedes one still waiting to activate the resume inherits it.
+    """
+    kind = next(
+        kind for kind, (model, name, *_) in MEDIA_FIELDS.items()
+        if isinstance(instance, model) and name == field
+    )
+    activate = activate or MediaJob.objects.filter(
+        kind=kind, object_id=instance.pk, activate=True,
+        status__in=[MediaJob.PENDING, MediaJob.RUNNING],
+    ).exists()
+    job = MediaJob(kind=kind, object_id=instance.pk, activate=activate)
+    job.upload.save(os.path.basename(upload.name), upload, save=False)
+    job.save()
+    return job
+
+
+def claim():
+    """Start the oldest pending job (or one lost with its worker), or return None"""
+    lost = timezone.now() - timedelta(seconds=settings.MEDIA_JOB_TIMEOUT)
+    with transaction.atomic():
+        job = (
+            MediaJob.objects.select_for_update(skip_locked=True)
+            .filter(Q(status=MediaJob.PENDING) | Q(status=MediaJob.RUNNING, started_at__lt=lost))
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = MediaJob.RUNNING
+        job.attempts += 1
+        job.started_at = timezone.now()
+        job.save(update_fields=['status', 'attempts', 'started_at'])
+    return job
+
+
+def _upload(job, backend):
+    """Upload the staged file; returns the field updates for the row"""
+    model, field, resource_type, folder = MEDIA_FIELDS[job.kind]
+    name = job.upload.name
+    with job.upload.open('rb') as fh:
+        size, checksum, dimensions = file_metadata(fh, image=resource_type == 'image')
+        eager = eager_transformations() if resource_type == 'image' else None
+        response = backend.upload(fh, name, resource_type, folder, eager)
+        updates = {
+            field: CloudinaryResource(
+                response['public_id'],
+                version=str(response['version']),
+                format=response.get('format'),
+                type=response['type'],
+                resource_type=response['resource_type'],
+                metadata=response,
+            ),
+            f'{field}_status': 'ready',
+            f'{field}_bytes': size,
+            f'{field}_checksum': checksum,
+        }
+        if dimensions:
+            updates[f'{field}_width'], updates[f'{field}_height'] = dimensions
+        if model is Resume and name.lower().endswith('.pdf'):
+            fh.seek(0)
+            updates['preview_url'] = backend.pdf_preview(fh, name, folder)
+    return updates
+
+
+def _superseded(job):
+    return MediaJob.objects.filter(
+        kind=job.kind, object_id=job.object_id, pk__gt=job.pk
+    ).exists()
+
+
+def process(job, backend=None):
+    """Run a claimed job; failures are retried up to MEDIA_JOB_MAX_ATTEMPTS times"""
+    model, field, *_ = MEDIA_FIELDS[job.kind]
+    try:
+        if model.objects.filter(pk=job.object_id).exists() and not _superseded(job):
+            updates = _upload(job, backend or media_backend())
+            if job.activate:
+                updates['is_active'] = True
+            # Loaded after the upload, so edits made meanwhile (such as
+            # activating another resume) aren't overwritten
+            instance = model.objects.filter(pk=job.object_id).first()
+            if instance is not None and not _superseded(job):
+                for name, value in updates.items():
+                    setattr(instance, name, value)
+                instance.save(update_fields=list(updates))
+    except Exception:
+        job.error = traceback.format_exc()
+        if job.attempts < settings.MEDIA_JOB_MAX_ATTEMPTS:
+            job.status = MediaJob.PENDING
+        else:
+            job.status = MediaJob.FAILED
+            job.finished_at = timezone.now()
+            model.objects.filter(pk=job.object_id).update(**{f'{field}_status': 'failed'})
+        job.save(update_fields=['status', 'error', 'finished_at'])
+        return job
+
+    job.upload.delete(save=False)
+    job.status = MediaJob.DONE
+    job.error = ''
+    job.finished_at = timezone.now()
+    job.save(update_fields=['upload', 'status', 'error', 'finished_at'])
+    return job
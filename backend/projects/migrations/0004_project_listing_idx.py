@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-18 14:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0003_alter_project_image_alter_resume_file'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['order', '-created_at', '-id'], name='project_listing_idx'),
+        ),
+    ]
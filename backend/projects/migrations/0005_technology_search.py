@@ -0,0 +1,89 @@
+# Generated by Django 5.2.5 on 2026-10-18 14:16
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+SEARCH_INDEX = django.contrib.postgres.indexes.GinIndex(
+    fields=['search_vector'], name='project_search_idx'
+)
+
+
+def add_search_index(apps, schema_editor):
+    # GIN indexes only exist on PostgreSQL; other backends fall back to icontains
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.add_index(apps.get_model('projects', 'Project'), SEARCH_INDEX)
+
+
+def remove_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.remove_index(apps.get_model('projects', 'Project'), SEARCH_INDEX)
+
+
+def backfill_search(apps, schema_editor):
+    Project = apps.get_model('projects', 'Project')
+    Technology = apps.get_model('projects', 'Technology')
+    using = schema_editor.connection.alias
+
+    for project in Project.objects.using(using).iterator():
+        names = {}
+        for name in (project.technologies or '').split(','):
+            if name.strip():
+                names.setdefault(name.strip().lower(), name.strip())
+        Technology.objects.using(using).bulk_create(
+            [Technology(name=name, key=key) for key, name in names.items()],
+            ignore_conflicts=True,
+        )
+        project.tech_stack.set(Technology.objects.using(using).filter(key__in=names))
+
+    if schema_editor.connection.vendor == 'postgresql':
+        from django.contrib.postgres.search import SearchVector
+
+        Project.objects.using(using).update(search_vector=(
+            SearchVector('title', weight='A', config='english')
+            + SearchVector('short_description', weight='B', config='english')
+            + SearchVector('technologies', weight='B', config='english')
+            + SearchVector('description', weight='C', config='english')
+        ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0004_project_listing_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Technology',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('key', models.CharField(help_text='Lowercased name used for lookups', max_length=100, unique=True)),
+            ],
+            options={
+                'verbose_name': 'Technology',
+                'verbose_name_plural': 'Technologies',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='tech_stack',
+            field=models.ManyToManyField(blank=True, editable=False, related_name='projects', to='projects.technology'),
+        ),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(model_name='project', index=SEARCH_INDEX),
+            ],
+            database_operations=[
+                migrations.RunPython(add_search_index, remove_search_index),
+            ],
+        ),
+        migrations.RunPython(backfill_search, migrations.RunPython.noop),
+    ]
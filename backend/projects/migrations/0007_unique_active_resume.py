@@ -0,0 +1,27 @@
+# Generated by Django 5.2.5 on 2026-10-18 14:41
+
+from django.db import migrations, models
+
+
+def keep_latest_active(apps, schema_editor):
+    # Earlier races could leave several active resumes; keep the newest
+    Resume = apps.get_model('projects', 'Resume')
+    active = Resume.objects.using(schema_editor.connection.alias).filter(is_active=True)
+    latest = active.order_by('-uploaded_at', '-pk').values_list('pk', flat=True).first()
+    if latest is not None:
+        active.exclude(pk=latest).update(is_active=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0006_media_jobs'),
+    ]
+
+    operations = [
+        migrations.RunPython(keep_latest_active, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='resume',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_active', True)), fields=('is_active',), name='unique_active_resume'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 15:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0008_project_featured_created_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mediajob',
+            name='activate',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -1,7 +1,76 @@
-from django.db import models
+import os
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, models, transaction
 from django.core.validators import URLValidator
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from cloudinary.models import CloudinaryField
 
+from .cache import (
+    aget_generations,
+    atiered_get,
+    atiered_set,
+    get_generations,
+    invalidate,
+    tiered_get,
+    tiered_set,
+)
+
+ACTIVE_RESUME_KEY = 'api:active-resume:{}'
+
+
+MEDIA_STATUS_CHOICES = [
+    ('', 'Uploaded directly'),
+    ('queued', 'Queued'),
+    ('ready', 'Ready'),
+    ('failed', 'Failed'),
+]
+
+
+class StagingStorage(FileSystemStorage):
+    """Local disk holding admin uploads until ``process_media`` picks them up"""
+    
+    # Read on every access rather than once, like MEDIA_ROOT
+    @property
+    def base_location(self):
+        return settings.MEDIA_STAGING_ROOT
+    
+    @property
+    def location(self):
+        return os.path.abspath(self.base_location)
+
+
+def staging_storage():
+    return StagingStorage()
+
+
+def parse_technologies(value):
+    """Split a comma-separated technologies string into clean names"""
+    if not value:
+        return []
+    return [tech.strip() for tech in value.split(',') if tech.strip()]
+
+
+class Technology(models.Model):
+    """Normalized technology facet, kept in sync with Project.technologies"""
+    
+    name = models.CharField(max_length=100)
+    key = models.CharField(
+        max_length=100,
+        unique=True,
+        help_text="Lowercased name used for lookups"
+    )
+    
+    class Meta:
+        ordering = ['name']
+        verbose_name = "Technology"
+        verbose_name_plural = "Technologies"
+    
+    def __str__(self):
+        return self.name
+
 
 class Project(models.Model):
     """Model for portfolio projects"""
@@ -31,6 +100,15 @@ class Project(models.Model):
     # Image (Cloudinary)
     image = CloudinaryField("image", blank=True, null=True)
     
+    # Filled in by the background media pipeline (see projects/media_jobs.py)
+    image_status = models.CharField(
+        max_length=10, choices=MEDIA_STATUS_CHOICES, blank=True, editable=False
+    )
+    image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_bytes = models.PositiveBigIntegerField(null=True, blank=True, editable=False)
+    image_checksum = models.CharField(max_length=64, blank=True, editable=False)
+    
     # Technologies used
     technologies = models.CharField(
         max_length=500,
@@ -50,8 +128,25 @@ class Project(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Search and facets, maintained from post_save (see projects/search.py)
+    tech_stack = models.ManyToManyField(
+        Technology,
+        related_name='projects',
+        blank=True,
+        editable=False
+    )
+    search_vector = SearchVectorField(null=True, editable=False)
+    
     class Meta:
         ordering = ['order', '-created_at']
+        indexes = [
+            GinIndex(fields=['search_vector'], name='project_search_idx'),
+            # Matches Meta.ordering plus the id tie-breaker used for keyset pagination
+            models.Index(fields=['order', '-created_at', '-id'], name='project_listing_idx'),
+            # Featured listings in display order, and the admin's date filter
+            models.Index(fields=['featured', 'order', '-created_at'], name='project_featured_idx'),
+            models.Index(fields=['created_at'], name='project_created_idx'),
+        ]
         verbose_name = "Project"
         verbose_name_plural = "Projects"
     
@@ -61,9 +156,7 @@ class Project(models.Model):
     @property
     def technology_list(self):
         """Return technologies as a list"""
-        if self.technologies:
-            return [tech.strip() for tech in self.technologies.split(',')]
-        return []
+        return parse_technologies(self.technologies)
 
 
 class Resume(models.Model):
@@ -77,6 +170,16 @@ class Resume(models.Model):
     # Store resume on Cloudinary
     file = CloudinaryField("resume", resource_type="raw")
     
+    # Filled in by the background media pipeline (see projects/media_jobs.py)
+    file_status = models.CharField(
+        max_length=10, choices=MEDIA_STATUS_CHOICES, blank=True, editable=False
+    )
+    file_bytes = models.PositiveBigIntegerField(null=True, blank=True, editable=False)
+    file_checksum = models.CharField(max_length=64, blank=True, editable=False)
+    preview_url = models.URLField(
+        blank=True, editable=False, help_text="Image of the first page"
+    )
+    
     uploaded_at = models.DateTimeField(auto_now_add=True)
     is_active = models.BooleanField(
         default=True,
@@ -85,14 +188,104 @@ class Resume(models.Model):
     
     class Meta:
         ordering = ['-uploaded_at']
+        constraints = [
+            # Also the index behind the active-resume lookup
+            models.UniqueConstraint(
+                fields=['is_active'],
+                condition=models.Q(is_active=True),
+                name='unique_active_resume'
+            ),
+        ]
         verbose_name = "Resume"
         verbose_name_plural = "Resumes"
     
     def __str__(self):
         return f"{self.title} - {self.uploaded_at.strftime('%Y-%m-%d')}"
     
+    def validate_constraints(self, exclude=None):
+        # save() deactivates the current resume, so activating another one
+        # in the admin doesn't violate unique_active_resume
+        super().validate_constraints(exclude={*(exclude or ()), 'is_active'})
+    
     def save(self, *args, **kwargs):
-        # Ensure only one active resume
-        if self.is_active:
-            Resume.objects.filter(is_active=True).update(is_active=False)
-        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if not self.is_active or (update_fields is not None and 'is_active' not in update_fields):
+            super().save(*args, **kwargs)
+            return
+        # Ensure only one active resume: deactivate the current one (the
+        # UPDATE locks it, so concurrent activations queue up) and save this
+        # one in the same transaction. A concurrent activation that commits
+        # first makes the save hit unique_active_resume; the swap is then
+        # retried against the now visible row.
+        for attempt in range(2):
+            try:
+                with transaction.atomic():
+                    Resume.objects.filter(is_active=True).exclude(pk=self.pk).update(
+                        is_active=False
+                    )
+                    super().save(*args, **kwargs)
+                break
+            except IntegrityError:
+                if attempt:
+                    raise
+        # update() doesn't send post_save for the rows it deactivates
+        invalidate(Resume)
+    
+    @classmethod
+    def get_active(cls):
+        """The active resume or None, cached until any resume changes"""
+        key = ACTIVE_RESUME_KEY.format(*get_generations([cls]))
+        cached = tiered_get(key)
+        if cached is None:
+            # A 1-tuple, so "no active resume" is cached as well
+            cached = (cls.objects.filter(is_active=True).first(),)
+            tiered_set(key, cached, settings.CACHE_TTL)
+        return cached[0]
+    
+    @classmethod
+    async def aget_active(cls):
+        key = ACTIVE_RESUME_KEY.format(*await aget_generations([cls]))
+        cached = await atiered_get(key)
+        if cached is None:
+            cached = (await cls.objects.filter(is_active=True).afirst(),)
+            await atiered_set(key, cached, settings.CACHE_TTL)
+        return cached[0]
+
+
+class MediaJob(models.Model):
+    """An admin upload waiting to be processed by ``manage.py process_media``"""
+    
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    
+    kind = models.CharField(
+        max_length=20,
+        choices=[('project-image', 'Project image'), ('resume-file', 'Resume file')]
+    )
+    object_id = models.PositiveBigIntegerField()
+    upload = models.FileField(upload_to='media-jobs/%Y/%m/%d', storage=staging_storage)
+    status = models.CharField(
+        max_length=10,
+        default=PENDING,
+        choices=[(PENDING, 'Pending'), (RUNNING, 'Running'), (DONE, 'Done'), (FAILED, 'Failed')]
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # Make the resume active once its file is ready (a resume added as active)
+    activate = models.BooleanField(default=False)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['created_at', 'id']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='media_job_queue_idx'),
+        ]
+        verbose_name = "Media job"
+        verbose_name_plural = "Media jobs"
+    
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.object_id} ({self.status})"
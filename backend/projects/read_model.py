@@ -0,0 +1,186 @@
+"""
+Precomputed read model for the project endpoints.
+
+Each project and each listing (all, featured, top-3 featured) is stored
+in the cache as the exact JSON bytes the API returns, so list and detail
+requests are served without touching the ORM or the DRF serializers.
+A saved project has its own document rebuilt from the Project signals;
+the listings that may include it are dropped and rendered again by the
+next read, so a burst of edits costs one listing render instead of one
+per edit. Documents and listings are keyed by the Project generation,
+like the cached responses, and a render reads the generation before the
+rows: one that straddles a commit lands under the generation it's stale
+for, which no lookup asks for once the commit has bumped it. Everything is rebuilt by the ``rebuild_read_model`` management
+command at deploy time, and expires after ``READ_MODEL_TTL`` in case a
+rebuild is ever missed. Lookups go through the in-process L1 cache, which
+every rebuild invalidates.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+from .cache import (
+    aget_generations,
+    atiered_get,
+    get_generations,
+    on_commit_once,
+    publish_invalidation,
+    stats,
+    tiered_get,
+)
+from .instrumentation import record_cache
+from .models import Project
+from .renderers import render_json
+from .serializers import ProjectListSerializer, ProjectSerializer, project_serializer
+
+DOCUMENT_KEY = 'read-model:project:{generation}:{pk}'
+LISTING_KEY = 'read-model:listing:{generation}:{name}'
+BATCH_SIZE = 500
+
+LISTINGS = {
+    'all': lambda: Project.objects.all(),
+    'featured': lambda: Project.objects.filter(featured=True),
+    'featured-top3': lambda: Project.objects.filter(featured=True)[:3],
+}
+# Served by the streamed project list under STREAMING_JSON instead
+STREAMED_LISTINGS = {'all', 'featured'}
+
+
+def current_generation():
+    return get_generations([Project])[0]
+
+
+async def acurrent_generation():
+    return (await aget_generations([Project]))[0]
+
+
+def build_listing(name, generation=None):
+    """Render listing ``name`` and store it under ``generation``, the current one by default"""
+    if generation is None:
+        generation = current_generation()
+    body = render_json(
+        project_serializer(ProjectListSerializer)(LISTINGS[name](), many=True).data
+    )
+    cache.set(
+        LISTING_KEY.format(generation=generation, name=name), body,
+        timeout=settings.READ_MODEL_TTL,
+    )
+    return body
+
+
+def build_listings(generation):
+    for name in LISTINGS:
+        if not (settings.STREAMING_JSON and name in STREAMED_LISTINGS):
+            build_listing(name, generation)
+
+
+def build_document(pk, generation=None):
+    """Render the detail document for project ``pk``, or drop it if it's gone"""
+    if generation is None:
+        generation = current_generation()
+    key = DOCUMENT_KEY.format(generation=generation, pk=pk)
+    project = Project.objects.filter(pk=pk).first()
+    if project is None:
+        cache.delete(key)
+        return None
+    body = render_json(project_serializer(ProjectSerializer)(project).data)
+    cache.set(key, body, timeout=settings.READ_MODEL_TTL)
+    return body
+
+
+def rebuild_projects(pks):
+    """
+    Refresh the documents of ``pks``; the listings are rebuilt on their next read.
+
+    Runs after the commit has bumped the generation. Listings already
+    rendered under it are dropped first, in case one read the rows early.
+    """
+    generation = current_generation()
+    cache.delete_many([
+        LISTING_KEY.format(generation=generation, name=name) for name in LISTINGS
+    ])
+    for pk in pks:
+        build_document(pk, generation)
+    publish_invalidation()
+
+
+def schedule_rebuild(pk):
+    """Rebuild project ``pk`` once the current transaction commits"""
+    on_commit_once('read-model', pk, rebuild_projects)
+
+
+def rebuild_all():
+    """Rebuild every document and listing; returns the number of projects"""
+    count = 0
+    batch = {}
+    generation = current_generation()
+    serializer_class = project_serializer(ProjectSerializer)
+    for project in Project.objects.iterator(chunk_size=BATCH_SIZE):
+        key = DOCUMENT_KEY.format(generation=generation, pk=project.pk)
+        batch[key] = render_json(serializer_class(project).data)
+        count += 1
+        if len(batch) >= BATCH_SIZE:
+            cache.set_many(batch, timeout=settings.READ_MODEL_TTL)
+            batch = {}
+    if batch:
+        cache.set_many(batch, timeout=settings.READ_MODEL_TTL)
+    build_listings(generation)
+    publish_invalidation()
+    return count
+
+
+def get_listing(name):
+    generation = current_generation()
+    return (
+        tiered_get(LISTING_KEY.format(generation=generation, name=name))
+        or build_listing(name, generation)
+    )
+
+
+def get_document(pk):
+    generation = current_generation()
+    return (
+        tiered_get(DOCUMENT_KEY.format(generation=generation, pk=pk))
+        or build_document(pk, generation)
+    )
+
+
+async def aget_listing(name):
+    generation = await acurrent_generation()
+    return (
+        await atiered_get(LISTING_KEY.format(generation=generation, name=name))
+        or await sync_to_async(build_listing)(name, generation)
+    )
+
+
+async def aget_document(pk):
+    generation = await acurrent_generation()
+    return (
+        await atiered_get(DOCUMENT_KEY.format(generation=generation, pk=pk))
+        or await sync_to_async(build_document)(pk, generation)
+    )
+
+
+def serve_read_model(prefix, lookup):
+    """
+    Serve a view from the read model when ``lookup`` finds a document.
+
+    ``lookup`` receives the view arguments and returns the JSON bytes, or
+    None when the request isn't covered by the read model (extra query
+    parameters, unknown pk), in which case the view runs as usual.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            body = lookup(request, *args, **kwargs)
+            if body is None:
+                stats.record(prefix, 'read-model-bypass')
+                return view_func(request, *args, **kwargs)
+            stats.record(prefix, 'read-model')
+            record_cache('hit')
+            return HttpResponse(body, content_type='application/json')
+        return wrapper
+    return decorator
@@ -0,0 +1,47 @@
+"""
+orjson-backed JSON rendering, enabled with ``FAST_JSON``.
+
+``FastJSONRenderer`` writes the same bytes as DRF's compact, UTF-8
+``JSONRenderer``. Datetimes, Decimals and anything else orjson doesn't
+handle natively are converted by DRF's own encoder, and U+2028/U+2029 are
+escaped the way DRF does. Requests for indented output, non-default
+``UNICODE_JSON``/``COMPACT_JSON`` settings, and data orjson can't encode
+(such as integers over 64 bits) fall back to the stock renderer.
+"""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+
+try:
+    import orjson
+except ImportError:  # the fast renderer is optional
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """Drop-in ``JSONRenderer`` that serializes with orjson"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if (
+            orjson is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            body = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Like JSONRenderer: these are valid JSON but not valid JavaScript
+        return body.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+def render_json(data):
+    """Render ``data`` with the API's configured JSON renderer"""
+    return api_settings.DEFAULT_RENDERER_CLASSES[0]().render(data)
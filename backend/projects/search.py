@@ -0,0 +1,119 @@
+"""
+Full-text search and technology facets for projects.
+
+On PostgreSQL the ``search_vector`` column (GIN indexed) is refreshed on
+every save and queried with ``websearch_to_tsquery``. Other databases fall
+back to ``icontains`` so the endpoint keeps working in local development.
+Facet counts come from the indexed ``tech_stack`` join table.
+"""
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connections
+from django.db.models import Count, F, Q
+
+from .models import Project, Technology, parse_technologies
+
+SEARCH_CONFIG = 'english'
+
+
+def _is_postgres(using):
+    return connections[using].vendor == 'postgresql'
+
+
+def search_vector():
+    return (
+        SearchVector('title', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('short_description', weight='B', config=SEARCH_CONFIG)
+        + SearchVector('technologies', weight='B', config=SEARCH_CONFIG)
+        + SearchVector('description', weight='C', config=SEARCH_CONFIG)
+    )
+
+
+def sync_technologies(project):
+    """Point ``project.tech_stack`` at the Technology rows for its technologies"""
+    names = {}
+    for name in parse_technologies(project.technologies):
+        names.setdefault(name.lower(), name)
+
+    Technology.objects.bulk_create(
+        [Technology(name=name, key=key) for key, name in names.items()],
+        ignore_conflicts=True,
+    )
+    project.tech_stack.set(Technology.objects.filter(key__in=names))
+
+
+def index_project(project):
+    """Refresh the facets and, on PostgreSQL, the search vector of ``project``"""
+    sync_technologies(project)
+    using = project._state.db or 'default'
+    if _is_postgres(using):
+        # update() doesn't send post_save, so this can't recurse
+        Project.objects.using(using).filter(pk=project.pk).update(search_vector=search_vector())
+
+
+def index_projects(projects):
+    """
+    Bulk ``index_project`` for rows written without signals (bulk_create, imports).
+
+    ``projects`` must be saved instances; their facet rows are replaced in
+    a handful of statements instead of a few per project.
+    """
+    projects = list(projects)
+    if not projects:
+        return
+    stacks = {}
+    names = {}
+    for project in projects:
+        keys = stacks[project.pk] = []
+        for name in parse_technologies(project.technologies):
+            key = name.lower()
+            names.setdefault(key, name)
+            if key not in keys:
+                keys.append(key)
+
+    Technology.objects.bulk_create(
+        [Technology(name=name, key=key) for key, name in names.items()],
+        ignore_conflicts=True,
+    )
+    technology_ids = dict(Technology.objects.filter(key__in=names).values_list('key', 'id'))
+    through = Project.tech_stack.through
+    through.objects.filter(project_id__in=stacks).delete()
+    through.objects.bulk_create([
+        through(project_id=pk, technology_id=technology_ids[key])
+        for pk, keys in stacks.items()
+        for key in keys
+    ])
+
+    using = projects[0]._state.db or 'default'
+    if _is_postgres(using):
+        Project.objects.using(using).filter(pk__in=stacks).update(search_vector=search_vector())
+
+
+def search(queryset, text):
+    """Filter ``queryset`` to projects matching ``text``, best matches first"""
+    if _is_postgres(queryset.db):
+        query = SearchQuery(text, search_type='websearch', config=SEARCH_CONFIG)
+        return queryset.filter(search_vector=query).annotate(
+            rank=SearchRank(F('search_vector'), query)
+        ).order_by('-rank', *Project._meta.ordering)
+    return queryset.filter(
+        Q(title__icontains=text)
+        | Q(description__icontains=text)
+        | Q(technologies__icontains=text)
+    )
+
+
+def filter_technologies(queryset, names):
+    """Keep projects that use every technology in ``names``"""
+    for name in names:
+        queryset = queryset.filter(tech_stack__key=name.lower())
+    return queryset
+
+
+def technology_facets(queryset):
+    """Return ``{'name', 'count'}`` for each technology used in ``queryset``"""
+    return list(
+        Technology.objects.filter(projects__in=queryset.values('pk'))
+        .annotate(count=Count('projects'))
+        .order_by('-count', 'name')
+        .values('name', 'count')
+    )
@@ -1,15 +1,77 @@
+from django.conf import settings
+from django.db.models import QuerySet
+from django.utils import timezone
 from rest_framework import serializers
-from .models import Project
+from .instrumentation import timed_serialization
+from .media import resource_url, responsive_srcset
+from .models import Project, parse_technologies
 
 
-class ProjectSerializer(serializers.ModelSerializer):
+class TimedSerializerMixin:
+    """Count the time spent rendering ``.data`` in the request metrics"""
+
+    @property
+    def data(self):
+        with timed_serialization():
+            return super().data
+
+
+class TimedListSerializer(TimedSerializerMixin, serializers.ListSerializer):
+    pass
+
+
+class SparseFieldsetsMixin:
+    """
+    Limit the output to the comma-separated ``?fields=`` of the request.
+
+    ``Meta.field_sources`` maps computed fields to the model columns they
+    read, so views can ``.only()`` the columns a response actually needs.
+    """
+
+    fields_query_param = 'fields'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = self.requested_fields(self.context.get('request'))
+        if requested is not None:
+            for name in set(self.fields) - requested:
+                self.fields.pop(name)
+
+    @classmethod
+    def requested_fields(cls, request):
+        """Return the requested field names, or None if all were requested"""
+        if request is None:
+            return None
+        value = request.query_params.get(cls.fields_query_param)
+        if not value:
+            return None
+        return {name.strip() for name in value.split(',') if name.strip()}
+
+    @classmethod
+    def model_fields(cls, request):
+        """Return the model columns needed to render the requested fields"""
+        names = cls.requested_fields(request)
+        if names is None:
+            names = cls.Meta.fields
+        sources = getattr(cls.Meta, 'field_sources', {})
+        columns = set()
+        for name in names:
+            if name in cls.Meta.fields:
+                columns.update(sources.get(name, [name]))
+        return columns
+
+
+class ProjectSerializer(TimedSerializerMixin, SparseFieldsetsMixin, serializers.ModelSerializer):
     technology_list = serializers.ReadOnlyField()
     image = serializers.SerializerMethodField()
     
+    image_srcset = serializers.SerializerMethodField()
+    
     def get_image(self, obj):
-        if obj.image:
-            return obj.image.url  # Cloudinary auto generates full URL
-        return None
+        return resource_url(obj.image)  # Cloudinary URL, memoized per version
+    
+    def get_image_srcset(self, obj):
+        return responsive_srcset(obj.image)
     
     class Meta:
         model = Project
@@ -21,6 +83,7 @@ class ProjectSerializer(serializers.ModelSerializer):
             'github_url',
             'live_url',
             'image',
+            'image_srcset',
             'technologies',
             'technology_list',
             'featured',
@@ -29,16 +92,21 @@ class ProjectSerializer(serializers.ModelSerializer):
             'updated_at'
         ]
         read_only_fields = ['created_at', 'updated_at']
+        list_serializer_class = TimedListSerializer
+        field_sources = {'technology_list': ['technologies'], 'image_srcset': ['image']}
 
 
-class ProjectListSerializer(serializers.ModelSerializer):
+class ProjectListSerializer(TimedSerializerMixin, SparseFieldsetsMixin, serializers.ModelSerializer):
     technology_list = serializers.ReadOnlyField()
     image = serializers.SerializerMethodField()
     
+    image_srcset = serializers.SerializerMethodField()
+    
     def get_image(self, obj):
-        if obj.image:
-            return obj.image.url
-        return None
+        return resource_url(obj.image)
+    
+    def get_image_srcset(self, obj):
+        return responsive_srcset(obj.image)
     
     class Meta:
         model = Project
@@ -49,6 +117,133 @@ class ProjectListSerializer(serializers.ModelSerializer):
             'github_url',
             'live_url',
             'image',
+            'image_srcset',
             'technology_list',
             'featured'
         ]
+        list_serializer_class = TimedListSerializer
+        field_sources = {'technology_list': ['technologies'], 'image_srcset': ['image']}
+
+
+def _datetime(value):
+    # DateTimeField.to_representation for the default ISO 8601 format
+    if not value:
+        return None
+    if settings.USE_TZ and timezone.is_aware(value):
+        value = value.astimezone(timezone.get_current_timezone())
+    value = value.isoformat()
+    if value.endswith('+00:00'):
+        value = value.removesuffix('+00:00') + 'Z'
+    return value
+
+
+class ProjectValuesSerializer:
+    """
+    Render the output of ``shape`` straight from ``.values()`` rows.
+
+    Produces the same data as the ``shape`` ModelSerializer (including
+    ``?fields=``) without building a serializer field per attribute. A
+    queryset is read with ``.values()``; model instances (e.g. a page of
+    keyset pagination) are read attribute by attribute. Used when
+    ``FAST_JSON`` is enabled, see ``project_serializer()``.
+    """
+
+    shape = None
+    computed = {
+        'image': lambda row: resource_url(row['image']),
+        'image_srcset': lambda row: responsive_srcset(row['image']),
+        'technology_list': lambda row: parse_technologies(row['technologies']),
+        'created_at': lambda row: _datetime(row['created_at']),
+        'updated_at': lambda row: _datetime(row['updated_at']),
+    }
+
+    def __init__(self, instance=None, many=False, context=None, **kwargs):
+        self.instance = instance
+        self.many = many
+        self.context = context or {}
+        requested = self.shape.requested_fields(self.context.get('request'))
+        self.fields = [
+            name for name in self.shape.Meta.fields if requested is None or name in requested
+        ]
+        sources = self.shape.Meta.field_sources
+        self.columns = list(dict.fromkeys(
+            column for name in self.fields for column in sources.get(name, [name])
+        ))
+
+    def to_representation(self, row):
+        if not isinstance(row, dict):
+            row = {column: getattr(row, column) for column in self.columns}
+        computed = self.computed
+        return {
+            name: computed[name](row) if name in computed else row[name]
+            for name in self.fields
+        }
+
+    @property
+    def data(self):
+        if not hasattr(self, '_data'):
+            with timed_serialization():
+                if not self.many:
+                    self._data = self.to_representation(self.instance)
+                else:
+                    rows = self.instance
+                    if isinstance(rows, QuerySet):
+                        rows = rows.values(*self.columns)
+                    self._data = [self.to_representation(row) for row in rows]
+        return self._data
+
+
+class FastProjectSerializer(ProjectValuesSerializer):
+    shape = ProjectSerializer
+
+
+class FastProjectListSerializer(ProjectValuesSerializer):
+    shape = ProjectListSerializer
+
+
+FAST_SERIALIZERS = {
+    ProjectSerializer: FastProjectSerializer,
+    ProjectListSerializer: FastProjectListSerializer,
+}
+
+
+def project_serializer(shape):
+    """The serializer class rendering ``shape``: its slim variant under ``FAST_JSON``"""
+    return FAST_SERIALIZERS[shape] if settings.FAST_JSON else shape
+
+
+class ProjectChangeSerializer(serializers.Serializer):
+    """New ``order`` and/or ``featured`` value of one project"""
+
+    id = serializers.IntegerField()
+    order = serializers.IntegerField(min_value=0, required=False)
+    featured = serializers.BooleanField(required=False)
+
+    def validate(self, attrs):
+        if 'order' not in attrs and 'featured' not in attrs:
+            raise serializers.ValidationError('Give order and/or featured.')
+        return attrs
+
+
+class ProjectBulkChangeSerializer(serializers.Serializer):
+    """Body of the bulk project update endpoint"""
+
+    changes = ProjectChangeSerializer(many=True, allow_empty=False, max_length=1000)
+
+    def validate_changes(self, changes):
+        ids = [change['id'] for change in changes]
+        if len(set(ids)) != len(ids):
+            raise serializers.ValidationError('Each project may only appear once.')
+        missing = set(ids) - set(Project.objects.filter(pk__in=ids).values_list('pk', flat=True))
+        if missing:
+            raise serializers.ValidationError(
+                'Unknown project ids: {}'.format(', '.join(map(str, sorted(missing))))
+            )
+        return changes
+
+    def to_changes(self):
+        """The validated changes as ``{pk: {field: value}}`` for bulk.apply_changes()"""
+        return {
+            change['id']: {field: value for field, value in change.items() if field != 'id'}
+            for change in self.validated_data['changes']
+        }
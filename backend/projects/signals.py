@@ -0,0 +1,57 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import media, read_model, search, snapshot
+from .cache import invalidate
+from .models import Project, Resume
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def invalidate_project_cache(sender, **kwargs):
+    """Drop cached project responses after any project change"""
+    invalidate(Project)
+
+
+@receiver(post_save, sender=Project)
+def index_project(sender, instance, raw=False, **kwargs):
+    """Keep the technology facets and search vector in step with the row"""
+    if not raw:
+        search.index_project(instance)
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def rebuild_project_read_model(sender, instance, **kwargs):
+    """Re-render the project's document and the listings that include it"""
+    read_model.schedule_rebuild(instance.pk)
+
+
+@receiver(post_save, sender=Resume)
+@receiver(post_delete, sender=Resume)
+def invalidate_resume_cache(sender, **kwargs):
+    """Drop cached resume responses after any resume change"""
+    invalidate(Resume)
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def forget_project_image_urls(sender, instance, **kwargs):
+    media.forget(instance.image)
+
+
+@receiver(post_save, sender=Resume)
+@receiver(post_delete, sender=Resume)
+def forget_resume_file_urls(sender, instance, **kwargs):
+    media.forget(instance.file)
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+@receiver(post_save, sender=Resume)
+@receiver(post_delete, sender=Resume)
+def export_api_snapshot(sender, instance, **kwargs):
+    """Rewrite the snapshot routes showing the row after the caches have been refreshed"""
+    if settings.API_SNAPSHOT:
+        snapshot.schedule_export(sender, instance.pk)
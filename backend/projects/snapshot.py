@@ -0,0 +1,276 @@
+"""
+Pre-rendered static JSON snapshot of the read-only API.
+
+``export()`` renders every snapshot route through the regular views and
+writes each body as a content-hashed file (``projects.<hash>.json``, plus
+``.gz``/``.br`` variants) into ``STATIC_ROOT/api/``, followed by a
+``manifest.json`` mapping routes to files. Every file is written to a
+temporary name and renamed into place, and the manifest is renamed last,
+so readers always see a complete snapshot.
+
+With ``API_SNAPSHOT`` enabled the routes showing a changed project or
+resume (the listings and its detail route) are re-exported after every
+change, and files of older snapshots are pruned. The URLconf serves plain
+GETs of those routes straight from the files through WhiteNoise's
+responder, with a content ETag and a ``Content-Location`` pointing at the
+immutable hashed URL under ``STATIC_URL``. The hashed files themselves are
+served by ``snapshot_file()``, not by the WhiteNoise middleware, which
+would keep answering for files pruned after it started; CORS headers come
+from django-cors-headers like for the rest of the site.
+"""
+import fcntl
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.http import Http404
+from whitenoise.compress import Compressor, brotli_installed
+from whitenoise.middleware import WhiteNoiseMiddleware
+from whitenoise.responders import StaticFile
+
+SNAPSHOT_DIR = 'api'
+MANIFEST_NAME = 'manifest.json'
+HASHED_NAME = re.compile(r'^[\w-]+\.[0-9a-f]{12}\.json$')
+DETAIL_ROUTE = re.compile(r'^projects/(\d+)/$')
+# Routes that show every project, and those that show the active resume
+PROJECT_ROUTES = ('projects/', 'projects/featured/', 'stats/', 'home/')
+RESUME_ROUTES = ('resume/status/', 'home/')
+IMMUTABLE = f'max-age={10 * 365 * 24 * 60 * 60}, public, immutable'
+
+
+def snapshot_root():
+    return os.path.join(settings.STATIC_ROOT, SNAPSHOT_DIR)
+
+
+def snapshot_routes(routes=None):
+    """``(route, sync view, kwargs)`` for every route in the snapshot, or for ``routes``"""
+    from . import views
+    from .models import Project
+
+    entries = [
+        ('projects/', views.ProjectListView.as_view(throttle_classes=[]), {}),
+        ('projects/featured/', views.featured_projects.cls.as_view(throttle_classes=[]), {}),
+        ('stats/', views.portfolio_stats.cls.as_view(throttle_classes=[]), {}),
+        ('resume/status/', views.resume_status.cls.as_view(throttle_classes=[]), {}),
+        ('home/', views.home.cls.as_view(throttle_classes=[]), {}),
+    ]
+    if routes is None:
+        pks = Project.objects.order_by('pk').values_list('pk', flat=True)
+    else:
+        entries = [entry for entry in entries if entry[0] in routes]
+        pks = sorted(int(match[1]) for match in map(DETAIL_ROUTE.match, routes) if match)
+    detail = views.ProjectDetailView.as_view(throttle_classes=[])
+    for pk in pks:
+        entries.append((f'projects/{pk}/', detail, {'pk': pk}))
+    return entries
+
+
+def affected_routes(model, pk=None):
+    """The routes showing row ``pk`` of ``model``; None for every route"""
+    from .models import Project
+
+    if model is not Project:
+        return RESUME_ROUTES
+    if pk is None:
+        return None
+    return (*PROJECT_ROUTES, f'projects/{pk}/')
+
+
+def file_name(route, body):
+    digest = hashlib.sha256(body).hexdigest()[:12]
+    return '{}.{}.json'.format(route.strip('/').replace('/', '-'), digest)
+
+
+def _write_atomic(path, data):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as fh:
+            fh.write(data)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _write_file(root, name, body):
+    """Write ``name`` and its precompressed variants unless they exist"""
+    path = os.path.join(root, name)
+    if os.path.exists(path):
+        return
+    variants = [('.gz', Compressor.compress_gzip(body))]
+    if brotli_installed:
+        variants.append(('.br', Compressor.compress_brotli(body)))
+    for suffix, data in variants:
+        if len(data) <= len(body) * 0.95:
+            _write_atomic(path + suffix, data)
+    _write_atomic(path, body)
+
+
+def read_manifest(root=None):
+    try:
+        with open(os.path.join(root or snapshot_root(), MANIFEST_NAME), 'rb') as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return {}
+
+
+def export(routes=None, prune=False):
+    """
+    Write a new snapshot; returns the manifest ``{route: file name}``.
+
+    ``routes`` re-renders only those routes and keeps the rest of the
+    current snapshot; a route that no longer renders (a deleted project)
+    is dropped. ``prune`` deletes files of all but the previous snapshot.
+    """
+    from django.test import RequestFactory  # django.test is slow to import at startup
+
+    root = snapshot_root()
+    os.makedirs(root, exist_ok=True)
+    # Exports from several workers run one at a time, so the manifest
+    # written last always comes from the latest committed data
+    with open(os.path.join(root, '.lock'), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        previous = read_manifest(root)
+        if not previous:
+            routes = None
+        factory = RequestFactory()
+        manifest = {} if routes is None else dict(previous)
+        for route, view, kwargs in snapshot_routes(routes):
+            response = view(factory.get(f'/api/{route}'), **kwargs)
+            if hasattr(response, 'render'):
+                response.render()
+            if response.status_code != 200:
+                manifest.pop(route, None)
+                continue
+            body = b''.join(response) if response.streaming else response.content
+            name = file_name(route, body)
+            _write_file(root, name, body)
+            manifest[route] = name
+
+        _write_atomic(
+            os.path.join(root, MANIFEST_NAME),
+            json.dumps(manifest, indent=2, sort_keys=True).encode(),
+        )
+        if prune:
+            # Keep the previous snapshot for clients still holding its URLs
+            keep = {MANIFEST_NAME, *manifest.values(), *previous.values()}
+            for entry in os.listdir(root):
+                base = entry.removesuffix('.gz').removesuffix('.br')
+                if base not in keep and not entry.startswith('.'):
+                    os.remove(os.path.join(root, entry))
+    return manifest
+
+
+def schedule_export(model, pk=None):
+    """Re-export the routes showing row ``pk`` of ``model`` once the current transaction commits"""
+    from .cache import on_commit_once
+
+    for route in affected_routes(model, pk) or [None]:
+        on_commit_once('api-snapshot', route, _export_routes)
+
+
+def _export_routes(routes):
+    export(None if None in routes else routes, prune=True)
+
+
+class SnapshotFiles:
+    """The current manifest and WhiteNoise responders, reloaded when it changes"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._routes = {}
+        self._files = {}
+
+    def _reload(self):
+        try:
+            mtime = os.stat(os.path.join(snapshot_root(), MANIFEST_NAME)).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime != self._mtime:
+            with self._lock:
+                self._routes = read_manifest() if mtime is not None else {}
+                self._files = {}
+                self._mtime = mtime
+
+    def responder(self, name, cache_control):
+        key = (name, cache_control)
+        static_file = self._files.get(key)
+        if static_file is None:
+            path = os.path.join(snapshot_root(), name)
+            headers = [
+                ('Content-Type', 'application/json'),
+                ('Cache-Control', cache_control),
+                ('ETag', '"{}"'.format(name.rsplit('.', 2)[1])),
+                ('Content-Location', f'{settings.STATIC_URL}{SNAPSHOT_DIR}/{name}'),
+            ]
+            static_file = StaticFile(
+                path, headers, encodings={'gzip': path + '.gz', 'br': path + '.br'}
+            )
+            self._files[key] = static_file
+        return static_file
+
+    def for_route(self, route):
+        """The responder for ``route``, or None if it isn't in the snapshot"""
+        self._reload()
+        name = self._routes.get(route)
+        if name is None:
+            return None
+        return self.responder(name, f'max-age={settings.API_SNAPSHOT_MAX_AGE}, public')
+
+    def for_name(self, name):
+        """The responder for hashed file ``name`` of any snapshot still on disk"""
+        if not HASHED_NAME.match(name) or not os.path.exists(os.path.join(snapshot_root(), name)):
+            return None
+        return self.responder(name, IMMUTABLE)
+
+
+files = SnapshotFiles()
+
+
+def serve_snapshot(route, view):
+    """
+    Serve ``view`` (sync or async) from the snapshot file for ``route``.
+
+    ``route`` is formatted with the view kwargs (``'projects/{pk}/'``).
+    Requests with a query string, other methods and routes missing from
+    the snapshot fall through to ``view``.
+    """
+    def snapshot_response(request, kwargs):
+        if request.method not in ('GET', 'HEAD') or request.META.get('QUERY_STRING'):
+            return None
+        static_file = files.for_route(route.format(**kwargs))
+        if static_file is None:
+            return None
+        return WhiteNoiseMiddleware.serve(static_file, request)
+
+    if iscoroutinefunction(view):
+        async def wrapper(request, *args, **kwargs):
+            response = snapshot_response(request, kwargs)
+            if response is None:
+                response = await view(request, *args, **kwargs)
+            return response
+    else:
+        def wrapper(request, *args, **kwargs):
+            response = snapshot_response(request, kwargs)
+            if response is None:
+                response = view(request, *args, **kwargs)
+            return response
+    wrapper = wraps(view)(wrapper)
+    wrapper.csrf_exempt = True
+    return wrapper
+
+
+def snapshot_file(request, name):
+    """Serve a hashed snapshot file"""
+    static_file = files.for_name(name)
+    if static_file is None:
+        raise Http404('Unknown snapshot file')
+    return WhiteNoiseMiddleware.serve(static_file, request)
@@ -1,3 +1,1450 @@
-from django.test import TestCase
+import contextvars
+import gzip
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from cloudinary import CloudinaryResource
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection, transaction
+from django.db.migrations.recorder import MigrationRecorder
+from django.db.utils import OperationalError
+from redis.exceptions import ConnectionError as RedisConnectionError, RedisError
+from django.http import Http404, HttpResponse
+from django.test import AsyncRequestFactory, RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from PIL import Image
+from rest_framework.renderers import JSONRenderer
+
+from portfolio import routers
+from portfolio.middleware import WhiteNoiseMiddleware
+from portfolio.database import database_config, pool_size
+
+from . import (
+    async_views,
+    bulk,
+    cache as cache_module,
+    instrumentation,
+    media,
+    media_jobs,
+    read_model,
+    search,
+    snapshot,
+    streaming,
+    throttling,
+    transfer,
+    views,
+)
+from .cache import LOCK_KEY, CacheEntry, LocalCache, get_generations, response_key, stats
+from .management.commands import boot
+from .models import MediaJob, Project, Resume, Technology
+from .renderers import FastJSONRenderer
+from .serializers import (
+    FastProjectListSerializer,
+    FastProjectSerializer,
+    ProjectListSerializer,
+    ProjectSerializer,
+)
+
+LOCMEM_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.project = Project.objects.create(
+            title='Portfolio', description='Site', technologies='Django, Next.js'
+        )
+
+    def test_repeat_request_is_served_from_cache(self):
+        url = reverse('projects:portfolio-stats')
+        self.client.get(url)
+        # Only the conditional GET validator query remains
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(response.json()['total_projects'], 1)
+
+    def test_save_invalidates_cached_responses(self):
+        url = reverse('projects:project-detail', args=[self.project.pk])
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.title = 'Renamed'
+            self.project.save()
+        self.assertEqual(self.client.get(url).json()['title'], 'Renamed')
+
+    def test_resume_save_bumps_resume_generation(self):
+        before = get_generations([Resume])
+        with self.captureOnCommitCallbacks(execute=True):
+            Resume.objects.create(title='CV', file='resume/cv.pdf')
+        self.assertGreater(get_generations([Resume]), before)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        Project.objects.create(title='Portfolio', description='Site', featured=True)
+
+    def test_matching_etag_returns_304_after_one_query(self):
+        url = reverse('projects:project-list')
+        response = self.client.get(url)
+        self.assertTrue(response.has_header('Last-Modified'))
+        with self.assertNumQueries(1):
+            revalidated = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_etag_changes_when_a_project_is_added(self):
+        url = reverse('projects:portfolio-stats')
+        etag = self.client.get(url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Project.objects.create(title='Another', description='Site')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['total_projects'], 2)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ReadModelTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.project = Project.objects.create(
+            title='Portfolio', description='Site', technologies='Django, Next.js', featured=True
+        )
+
+    def test_listing_matches_serializer_output(self):
+        read_model.rebuild_all()
+        expected = JSONRenderer().render(
+            ProjectListSerializer(Project.objects.all(), many=True).data
+        )
+        response = self.client.get(reverse('projects:project-list'))
+        self.assertEqual(response.content, expected)
+
+    def test_delete_drops_document_and_rebuilds_listings(self):
+        read_model.rebuild_all()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.delete()
+        self.assertEqual(self.client.get(reverse('projects:featured-projects')).json(), [])
+        self.assertIsNone(read_model.get_document(self.project.pk))
+
+    def test_save_rebuilds_only_its_document(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Project.objects.create(title='Other', description='Site')
+        read_model.rebuild_all()
+        with mock.patch.object(read_model, 'build_document', wraps=read_model.build_document) as built, \
+                mock.patch.object(read_model, 'build_listing', wraps=read_model.build_listing) as listed:
+            with self.captureOnCommitCallbacks(execute=True):
+                for title in ('One', 'Two', 'Three'):
+                    self.project.title = title
+                    self.project.save()
+            generation = read_model.current_generation()
+            self.assertEqual(
+                [call.args for call in built.call_args_list], [(self.project.pk, generation)]
+            )
+            listed.assert_not_called()
+            key = read_model.LISTING_KEY.format(generation=generation, name='all')
+            self.assertIsNone(cache.get(key))
+            # The next read renders the listing once
+            titles = [p['title'] for p in self.client.get(reverse('projects:project-list')).json()]
+            self.client.get(reverse('projects:project-list'))
+            self.assertEqual(listed.call_count, 1)
+        self.assertIn('Three', titles)
+
+    def test_listing_rendered_across_a_commit_is_not_served(self):
+        read_model.rebuild_all()
+        url = reverse('projects:project-list')
+        self.client.get(url)
+        rows = list(Project.objects.all())
+
+        def edited_while_rendering():
+            with self.captureOnCommitCallbacks(execute=True):
+                Project.objects.filter(pk=self.project.pk).update(title='Renamed')
+                # update() sends no signals; queue what a save would
+                cache_module.invalidate(Project)
+                read_model.schedule_rebuild(self.project.pk)
+            return rows
+
+        cache.delete_many([
+            read_model.LISTING_KEY.format(generation=read_model.current_generation(), name='all')
+        ])
+        with mock.patch.dict(read_model.LISTINGS, {'all': edited_while_rendering}):
+            stale = read_model.get_listing('all')
+        self.assertIn(b'Portfolio', stale)
+        self.assertEqual([p['title'] for p in self.client.get(url).json()], ['Renamed'])
+
+    def test_documents_expire(self):
+        with mock.patch.object(read_model.cache, 'set', wraps=read_model.cache.set) as stored:
+            read_model.build_document(self.project.pk)
+        self.assertEqual(stored.call_args.kwargs['timeout'], settings.READ_MODEL_TTL)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class PaginationAndFieldsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        for index in range(5):
+            Project.objects.create(title=f'Project {index}', description='Long text', order=index % 2)
+
+    def test_cursor_walks_every_project_once(self):
+        url = reverse('projects:project-list') + '?page_size=2'
+        titles = []
+        while url:
+            page = self.client.get(url).json()
+            titles += [project['title'] for project in page['results']]
+            url = page['next']
+        expected = [project.title for project in Project.objects.order_by('order', '-created_at', '-id')]
+        self.assertEqual(titles, expected)
+
+    def test_invalid_cursor_is_404(self):
+        response = self.client.get(reverse('projects:project-list') + '?cursor=garbage')
+        self.assertEqual(response.status_code, 404)
+
+    def test_sparse_fieldset_skips_unrequested_columns(self):
+        url = reverse('projects:project-list') + '?fields=id,title'
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(set(response.json()[0]), {'id', 'title'})
+        self.assertFalse(any('"description"' in query['sql'] for query in queries))
+
+    def test_sparse_fieldset_applies_to_detail_and_featured(self):
+        project = Project.objects.first()
+        project.featured = True
+        project.save()
+        read_model.rebuild_all()
+        for url in (reverse('projects:project-detail', args=[project.pk]),
+                    reverse('projects:featured-projects')):
+            with self.subTest(url=url):
+                body = self.client.get(url, {'fields': 'id,title'}).json()
+                self.assertEqual(set(body if isinstance(body, dict) else body[0]), {'id', 'title'})
+        response = async_to_sync(async_views.project_detail)(
+            AsyncRequestFactory().get(f'/api/projects/{project.pk}/', {'fields': 'id'}), pk=project.pk
+        )
+        response.render()
+        self.assertEqual(json.loads(response.content), {'id': project.pk})
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class SearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        Project.objects.create(title='Shop', description='Storefront', technologies='Django, React')
+        Project.objects.create(title='Blog', description='Writing', technologies='django, Next.js')
+        Project.objects.create(title='Game', description='Arcade', technologies='Rust')
+
+    def test_save_normalizes_technologies(self):
+        self.assertEqual(Technology.objects.filter(key='django').count(), 1)
+        project = Project.objects.get(title='Game')
+        self.assertEqual(list(project.tech_stack.values_list('key', flat=True)), ['rust'])
+
+    def test_search_with_facets(self):
+        response = self.client.get(reverse('projects:project-search'), {'tech': 'Django'})
+        body = response.json()
+        self.assertEqual({project['title'] for project in body['results']}, {'Shop', 'Blog'})
+        self.assertEqual(body['facets'][0], {'name': 'Django', 'count': 2})
+
+    def test_text_query(self):
+        response = self.client.get(reverse('projects:project-search'), {'q': 'arcade'})
+        self.assertEqual([project['title'] for project in response.json()['results']], ['Game'])
+
+    def test_bulk_index_matches_per_project_index(self):
+        projects = Project.objects.bulk_create([
+            Project(title='Api', description='Backend', technologies='Go, django, Go'),
+            Project(title='Cli', description='Tool', technologies=''),
+        ])
+        with self.assertNumQueries(4):
+            search.index_projects(projects)
+        self.assertEqual(
+            list(projects[0].tech_stack.order_by('key').values_list('key', flat=True)),
+            ['django', 'go'],
+        )
+        self.assertFalse(projects[1].tech_stack.exists())
+        # Existing names keep their spelling; the old facet rows are replaced
+        self.assertEqual(Technology.objects.get(key='django').name, 'Django')
+        projects[0].technologies = 'Rust'
+        search.index_projects(projects[:1])
+        self.assertEqual(list(projects[0].tech_stack.values_list('key', flat=True)), ['rust'])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class SignalBatchingTests(TestCase):
+    def test_one_transaction_runs_the_follow_up_work_once(self):
+        with mock.patch.object(cache_module, '_bump_generations') as bumped, \
+                mock.patch.object(read_model, 'rebuild_projects') as rebuilt:
+            with self.captureOnCommitCallbacks(execute=True):
+                projects = [
+                    Project.objects.create(title=f'Project {index}', description='Site')
+                    for index in range(3)
+                ]
+                Resume.objects.create(title='CV', file='resume/cv.pdf')
+        bumped.assert_called_once_with({Project, Resume})
+        rebuilt.assert_called_once_with({project.pk for project in projects})
+
+    def test_separate_transactions_are_not_merged(self):
+        with mock.patch.object(read_model, 'rebuild_projects') as rebuilt:
+            for title in ('One', 'Two'):
+                with self.captureOnCommitCallbacks(execute=True):
+                    project = Project.objects.create(title=title, description='Site')
+                rebuilt.assert_called_with({project.pk})
+        self.assertEqual(rebuilt.call_count, 2)
+
+    def test_nothing_runs_before_commit(self):
+        callback = mock.Mock()
+        with self.captureOnCommitCallbacks() as callbacks:
+            cache_module.on_commit_once('test', 1, callback)
+            cache_module.on_commit_once('test', 1, callback)
+        callback.assert_not_called()
+        for run in callbacks:
+            run()
+        callback.assert_called_once_with({1})
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class BenchmarkCommandTests(TestCase):
+    def test_seeding_needs_debug_or_yes(self):
+        for command in ('benchmark_api', 'benchmark_streaming'):
+            with self.subTest(command=command), self.assertRaisesMessage(CommandError, '--yes'):
+                call_command(command, projects=1, stdout=io.StringIO())
+        self.assertFalse(Project.objects.exists())
+
+    @override_settings(CACHES=LOCMEM_CACHES)
+    def test_failed_seeding_is_cleaned_up(self):
+        active = Resume.objects.create(title='CV', file='resume/cv.pdf', is_active=True)
+        with mock.patch.object(Resume.objects, 'bulk_create', side_effect=IntegrityError), \
+                self.assertRaises(IntegrityError):
+            call_command('benchmark_api', projects=3, yes=True, stdout=io.StringIO())
+        self.assertFalse(Project.objects.exists())
+        active.refresh_from_db()
+        self.assertTrue(active.is_active)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        Project.objects.create(title='Portfolio', description='Site', featured=True)
+
+    async def test_async_list_matches_sync_body(self):
+        sync_body = (await self.async_client.get(reverse('projects:project-list'))).content
+        request = AsyncRequestFactory().get('/api/projects/')
+        response = await async_views.project_list(request)
+        self.assertEqual(response.content, sync_body)
+
+        request = AsyncRequestFactory().get(
+            '/api/projects/', headers={'If-None-Match': response['ETag']}
+        )
+        self.assertEqual((await async_views.project_list(request)).status_code, 304)
+
+    async def test_async_stats_falls_back_to_sync_view(self):
+        request = AsyncRequestFactory().get('/api/stats/')
+        response = await async_views.portfolio_stats(request)
+        response.render()
+        self.assertEqual(json.loads(response.content), {'total_projects': 1, 'featured_projects': 1})
+
+
+@override_settings(CACHES=LOCMEM_CACHES, SERVER_TIMING=True)
+class InstrumentationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        Project.objects.create(title='Portfolio', description='Site')
+
+    def test_server_timing_reports_queries_and_cache(self):
+        url = reverse('projects:portfolio-stats')
+        first = self.client.get(url)['Server-Timing']
+        second = self.client.get(url)['Server-Timing']
+        self.assertIn('0 hit 1 miss', first)
+        self.assertIn('1 hit 0 miss', second)
+        self.assertIn('desc="1 queries"', second)
+
+    def test_server_timing_is_for_staff_unless_enabled(self):
+        url = reverse('projects:portfolio-stats')
+        with override_settings(SERVER_TIMING=False):
+            self.assertNotIn('Server-Timing', self.client.get(url))
+            self.client.force_login(User.objects.create_superuser('admin', 'a@example.com', 'pw'))
+            self.assertIn('Server-Timing', self.client.get(reverse('admin:index')))
+
+    async def test_async_requests_are_timed_on_the_event_loop(self):
+        response = await self.async_client.get(reverse('projects:portfolio-stats'))
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response['Server-Timing'], r'db;dur=[0-9.]+;desc="[1-9]\d* queries"')
+
+    def test_queries_in_worker_threads_are_counted(self):
+        def query():
+            # The thread's own connection, as in a sync_to_async worker
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            connection.close()
+        with instrumentation.collect() as metrics:
+            thread = threading.Thread(target=contextvars.copy_context().run, args=(query,))
+            thread.start()
+            thread.join()
+        self.assertEqual(metrics.db_queries, 1)
+
+    @override_settings(METRICS_TOKEN='scrape')
+    def test_metrics_endpoint_exports_route_histograms(self):
+        self.client.get(reverse('projects:portfolio-stats'))
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 401)
+        body = self.client.get(reverse('metrics'), headers={'Authorization': 'Bearer scrape'}).content.decode()
+        self.assertIn('api_request_duration_seconds_count{method="GET",route="projects:portfolio-stats"', body)
+
+    def test_metrics_need_a_token_outside_debug(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        with override_settings(DEBUG=True):
+            self.assertEqual(self.client.get(reverse('metrics')).status_code, 200)
+
+
+class AsyncMiddlewareTests(TestCase):
+    def test_asgi_chain_needs_no_thread_hops(self):
+        # Django logs every middleware it has to adapt to the other mode
+        with self.assertNoLogs('django.request', 'DEBUG'):
+            ASGIHandler().load_middleware(is_async=True)
+
+    async def test_static_files_are_served_under_asgi(self):
+        with tempfile.TemporaryDirectory() as root:
+            with open(os.path.join(root, 'app.txt'), 'w') as fh:
+                fh.write('static')
+            with override_settings(STATIC_ROOT=root):
+                middleware = WhiteNoiseMiddleware(self.not_static)
+                response = await middleware(AsyncRequestFactory().get('/static/app.txt'))
+                self.assertEqual(b''.join(response.streaming_content), b'static')
+                response = await middleware(AsyncRequestFactory().get('/api/stats/'))
+                self.assertEqual(response.content, b'view')
+
+    async def not_static(self, request):
+        return HttpResponse('view')
+
+
+class MediaUrlTests(TestCase):
+    def setUp(self):
+        media._urls.clear()
+        self.resource = CloudinaryResource('projects/shot', version='1', format='png')
+
+    def test_url_is_built_once_per_version(self):
+        with mock.patch.object(CloudinaryResource, 'build_url', return_value='u') as build:
+            media.resource_url(self.resource)
+            media.resource_url(self.resource)
+            media.resource_url(CloudinaryResource('projects/shot', version='2', format='png'))
+        self.assertEqual(build.call_count, 2)
+
+    def test_srcset_lists_every_width(self):
+        srcset = media.responsive_srcset(self.resource, widths=[320, 640])
+        self.assertEqual(len(srcset), 2)
+        self.assertTrue(srcset[0].endswith(' 320w'))
+        self.assertIn('w_640', srcset[1])
+        self.assertIn('f_auto', srcset[1])
+
+    def test_forget_drops_cached_urls(self):
+        media.resource_url(self.resource)
+        media.forget(self.resource)
+        self.assertEqual(len(media._urls), 0)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class HomeEndpointTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        Project.objects.create(title='Portfolio', description='Site', featured=True)
+        Project.objects.create(title='Tool', description='CLI')
+
+    def test_home_combines_homepage_payloads(self):
+        response = self.client.get(reverse('projects:home'))
+        body = response.json()
+        self.assertEqual(body['stats'], {'total_projects': 2, 'featured_projects': 1})
+        self.assertEqual([project['title'] for project in body['featured_projects']], ['Portfolio'])
+        self.assertFalse(body['resume']['available'])
+
+        with self.assertNumQueries(1):  # the active resume comes from the cache
+            revalidated = self.client.get(reverse('projects:home'), HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(revalidated.status_code, 304)
+
+
+class DatabaseConnectionTests(TestCase):
+    URL = 'postgres://user:secret@db:5432/portfolio'
+
+    def test_persistent_mode_checks_connection_health(self):
+        config = database_config(self.URL, conn_max_age=300)
+        self.assertEqual(config['CONN_MAX_AGE'], 300)
+        self.assertTrue(config['CONN_HEALTH_CHECKS'])
+        self.assertEqual(database_config(self.URL, server_mode='asgi')['CONN_MAX_AGE'], 0)
+
+    def test_pgbouncer_mode_disables_server_side_cursors(self):
+        self.assertTrue(database_config(self.URL, mode='pgbouncer')['DISABLE_SERVER_SIDE_CURSORS'])
+
+    def test_pool_is_sized_from_the_worker_count(self):
+        self.assertEqual(pool_size(20, 4), (2, 5))
+        self.assertEqual(pool_size(3, 8), (1, 1))
+        with mock.patch('importlib.util.find_spec', return_value=object()):
+            config = database_config(self.URL, mode='pool', max_connections=20, workers=4)
+        self.assertEqual(config['CONN_MAX_AGE'], 0)
+        self.assertEqual(config['OPTIONS']['pool']['max_size'], 5)
+
+    def test_wait_for_db_backs_off_then_times_out(self):
+        with mock.patch.object(connection, 'ensure_connection', side_effect=OperationalError), \
+                mock.patch('time.sleep') as sleep, \
+                mock.patch('time.monotonic', side_effect=[0, 1, 2, 3, 4, 61]):
+            with self.assertRaises(CommandError):
+                call_command('wait_for_db', timeout=60, stdout=mock.Mock())
+        self.assertEqual([call.args[0] for call in sleep.call_args_list], [0.5, 1, 2, 4])
+
+
+@override_settings(CACHES=LOCMEM_CACHES, DATABASE_REPLICAS=['replica_0', 'replica_1'])
+class ReplicaRoutingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        routers.health.reset()
+        self.router = routers.PrimaryReplicaRouter()
+        self.replica = mock.Mock(alias='replica_0')
+        self.databases_patch = mock.patch.object(
+            routers, 'connections', {'replica_0': self.replica, 'replica_1': self.replica}
+        )
+        self.databases_patch.start()
+        self.addCleanup(self.databases_patch.stop)
+
+    def route(self, method='GET', path='/api/projects/', write=False):
+        def view(request):
+            if write:
+                self.router.db_for_write(Project)
+            return self.router.db_for_read(Project)
+        request = mock.Mock(method=method, path_info=path)
+        return routers.ReplicaRoutingMiddleware(view)(request)
+
+    def test_api_reads_go_to_replicas(self):
+        self.assertIn(self.route(), {'replica_0', 'replica_1'})
+        self.assertEqual(self.route(path='/admin/projects/project/'), 'default')
+        self.assertEqual(self.route(method='POST'), 'default')
+        # Outside a request (management commands) reads use the primary
+        self.assertEqual(self.router.db_for_read(Project), 'default')
+
+    def test_reads_stick_to_primary_after_a_write(self):
+        self.assertEqual(self.route(write=True), 'default')
+        with self.captureOnCommitCallbacks(execute=True):
+            Resume.objects.create(title='CV', file='resume/cv.pdf', is_active=True)
+        self.assertEqual(self.route(), 'default')
+        cache.delete(routers.PINNED_KEY)
+        self.assertIn(self.route(), {'replica_0', 'replica_1'})
+
+    def test_unhealthy_replica_falls_back_to_primary(self):
+        self.replica.ensure_connection.side_effect = OperationalError
+        self.assertEqual(self.route(), 'default')
+        # Marked down, so the next request doesn't retry the connection
+        self.assertEqual(self.route(), 'default')
+        self.assertEqual(self.replica.ensure_connection.call_count, 2)
+
+    def test_failed_replica_query_is_retried_on_primary(self):
+        def view(request):
+            alias = self.router.db_for_read(Project)
+            if alias != 'default':
+                # What the replica's hook sees when its query fails
+                def execute(*args):
+                    raise OperationalError('server closed the connection unexpectedly')
+                with self.assertRaises(OperationalError):
+                    routers.record_failure(execute, 'SELECT 1', None, False, {'connection': self.replica})
+                return HttpResponse(status=500)
+            return HttpResponse(alias)
+
+        middleware = routers.ReplicaRoutingMiddleware(view)
+        response = middleware(mock.Mock(method='GET', path_info='/api/projects/'))
+        self.assertEqual(response.content, b'default')
+        self.assertFalse(routers.health.is_up('replica_0'))
+
+    def test_failure_hook_is_installed_on_replica_connections(self):
+        replica = mock.Mock(alias='replica_0', execute_wrappers=[])
+        primary = mock.Mock(alias='default', execute_wrappers=[])
+        for connection_ in (replica, primary, replica):
+            routers.install_failure_hook(None, connection_)
+        self.assertEqual(replica.execute_wrappers, [routers.record_failure])
+        self.assertEqual(primary.execute_wrappers, [])
+
+    async def test_async_requests_route_to_replicas(self):
+        async def view(request):
+            return self.router.db_for_read(Project)
+        middleware = routers.ReplicaRoutingMiddleware(view)
+        request = mock.Mock(method='GET', path_info='/api/projects/')
+        self.assertIn(await middleware(request), {'replica_0', 'replica_1'})
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ThrottleTests(TestCase):
+    RATES = {'anon': '100/hour', 'user': '1000/hour', 'anon:projects:portfolio-stats': '2/minute'}
+
+    def setUp(self):
+        cache.clear()
+        throttling.local_buckets.clear()
+        patcher = mock.patch.object(throttling.TokenBucketThrottle, 'THROTTLE_RATES', self.RATES)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_route_rate_has_its_own_bucket(self):
+        url = reverse('projects:portfolio-stats')
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(self.client.get(url).status_code, 200)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '30')
+        self.assertEqual(self.client.get(reverse('projects:project-list')).status_code, 200)
+
+    def test_unreachable_redis_falls_back_to_process_buckets(self):
+        with mock.patch.object(throttling, 'redis_client', return_value=mock.Mock()), \
+                mock.patch.object(throttling, 'token_bucket', side_effect=RedisConnectionError):
+            self.assertEqual(throttling.take_token('bucket', 1, 1 / 60), (True, 0.0))
+            allowed, wait = throttling.take_token('bucket', 1, 1 / 60)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(wait, 60, places=0)
+
+
+class RedisThrottleTests(TestCase):
+    def test_lua_bucket_refills_at_the_rate(self):
+        client = throttling.redis_client()
+        try:
+            client.ping()
+        except RedisError:
+            self.skipTest('Redis is not reachable')
+        key = 'throttle_test_bucket'
+        client.delete(key)
+        self.addCleanup(client.delete, key)
+        results = [throttling.token_bucket(keys=[key], args=[2, 1], client=client) for _ in range(3)]
+        self.assertEqual([int(allowed) for allowed, _ in results], [1, 1, 0])
+        self.assertGreater(float(results[2][1]), 0.9)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class FastJSONTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        Project.objects.create(
+            title='Ünïcode \u2028 line', description='Para\u2029graph "quoted" </script>',
+            short_description='', technologies='Django, , Next.js', image='projects/site',
+            live_url=None, featured=True, order=2,
+        )
+        Project.objects.create(title='Plain', description='Body', technologies='')
+        Project.objects.filter(title='Plain').update(
+            created_at='2024-02-29T23:59:59.123456Z', live_url='https://example.com/',
+        )
+
+    def assertSameBytes(self, drf, fast):
+        self.assertEqual(JSONRenderer().render(drf.data), FastJSONRenderer().render(fast.data))
+
+    def test_values_serializers_match_drf_byte_for_byte(self):
+        queryset = Project.objects.all()
+        self.assertSameBytes(
+            ProjectListSerializer(queryset, many=True), FastProjectListSerializer(queryset, many=True)
+        )
+        self.assertSameBytes(
+            ProjectSerializer(queryset, many=True), FastProjectSerializer(queryset, many=True)
+        )
+        project = queryset.get(title='Plain')
+        self.assertSameBytes(ProjectSerializer(project), FastProjectSerializer(project))
+
+    def test_fast_mode_serves_identical_responses(self):
+        urls = [
+            reverse('projects:project-list') + '?page_size=1&fields=id,title,image_srcset',
+            reverse('projects:project-list') + '?featured=true&fields=title',
+            reverse('projects:featured-projects'),
+            reverse('projects:project-search') + '?q=plain',
+            reverse('projects:home'),
+        ]
+        with override_settings(REST_FRAMEWORK={
+            'DEFAULT_RENDERER_CLASSES': ['rest_framework.renderers.JSONRenderer'],
+        }):
+            expected = [self.client.get(url).content for url in urls]
+        cache.clear()
+        with override_settings(FAST_JSON=True, REST_FRAMEWORK={
+            'DEFAULT_RENDERER_CLASSES': ['projects.renderers.FastJSONRenderer'],
+        }), mock.patch.object(
+            FastProjectListSerializer, 'to_representation', autospec=True,
+            side_effect=FastProjectListSerializer.to_representation,
+        ) as fast_rows:
+            self.assertEqual([self.client.get(url).content for url in urls], expected)
+        self.assertTrue(fast_rows.called)
+
+    def test_renderer_falls_back_for_indent_and_big_integers(self):
+        renderer = FastJSONRenderer()
+        data = {
+            'when': datetime(2024, 1, 1, 12, 0, 0, 123456, tzinfo=dt_timezone.utc),
+            'price': Decimal('1.50'),
+        }
+        self.assertEqual(renderer.render(data), JSONRenderer().render(data))
+        data['big'] = 2 ** 70
+        self.assertEqual(renderer.render(data), JSONRenderer().render(data))
+        self.assertEqual(
+            renderer.render({'a': 1}, 'application/json; indent=2'),
+            JSONRenderer().render({'a': 1}, 'application/json; indent=2'),
+        )
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ApiSnapshotTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        static_root = tempfile.TemporaryDirectory()
+        self.addCleanup(static_root.cleanup)
+        patcher = override_settings(STATIC_ROOT=static_root.name)
+        patcher.enable()
+        self.addCleanup(patcher.disable)
+        self.root = snapshot.snapshot_root()
+        self.project = Project.objects.create(
+            title='Portfolio', description='Site ' * 100, technologies='Django', featured=True
+        )
+
+    def read(self, route, manifest):
+        with open(os.path.join(self.root, manifest[route]), 'rb') as fh:
+            return fh.read()
+
+    def test_export_matches_the_live_api(self):
+        manifest = snapshot.export()
+        for route in ['projects/', f'projects/{self.project.pk}/', 'projects/featured/',
+                      'stats/', 'resume/status/', 'home/']:
+            self.assertEqual(self.read(route, manifest), self.client.get(f'/api/{route}').content)
+        detail = manifest[f'projects/{self.project.pk}/']
+        self.assertRegex(detail, snapshot.HASHED_NAME)
+        self.assertTrue(os.path.exists(os.path.join(self.root, detail + '.gz')))
+
+    def save(self, project, title):
+        with override_settings(API_SNAPSHOT=True), self.captureOnCommitCallbacks(execute=True):
+            project.title = title
+            project.save()
+        return snapshot.read_manifest()
+
+    def test_changes_rewrite_the_affected_routes(self):
+        other = Project.objects.create(title='Other', description='Site')
+        first = snapshot.export()
+        with mock.patch.object(snapshot, 'snapshot_routes', wraps=snapshot.snapshot_routes) as routes:
+            second = self.save(self.project, 'Renamed')
+        routes.assert_called_once_with({*snapshot.PROJECT_ROUTES, f'projects/{self.project.pk}/'})
+        self.assertIn(b'Renamed', self.read('projects/', second))
+        self.assertIn(b'Renamed', self.read(f'projects/{self.project.pk}/', second))
+        for route in (f'projects/{other.pk}/', 'resume/status/'):
+            self.assertEqual(second[route], first[route])
+        # Files of the previous snapshot stay for clients holding their URLs
+        self.assertTrue(os.path.exists(os.path.join(self.root, first['projects/'])))
+        third = self.save(self.project, 'Third')
+        self.assertFalse(os.path.exists(os.path.join(self.root, first['projects/'])))
+        self.assertTrue(os.path.exists(os.path.join(self.root, second['projects/'])))
+        self.assertTrue(os.path.exists(os.path.join(self.root, third[f'projects/{other.pk}/'])))
+
+        with override_settings(API_SNAPSHOT=True), self.captureOnCommitCallbacks(execute=True):
+            other.delete()
+        self.assertNotIn(f'projects/{other.pk}/', snapshot.read_manifest())
+
+    @override_settings(CORS_ALLOWED_ORIGINS=['https://portfolio.example'])
+    def test_snapshot_files_follow_the_cors_origins(self):
+        name = snapshot.export()['projects/']
+        url = f'/static/api/{name}'
+        response = self.client.get(url, HTTP_ORIGIN='https://portfolio.example')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Access-Control-Allow-Origin'], 'https://portfolio.example')
+        response = self.client.get(url, HTTP_ORIGIN='https://elsewhere.example')
+        self.assertNotIn('Access-Control-Allow-Origin', response)
+        # Left to snapshot_file even when WhiteNoise starts after the export
+        middleware = WhiteNoiseMiddleware(lambda request: HttpResponse('snapshot_file'))
+        self.assertEqual(middleware(RequestFactory().get(url)).content, b'snapshot_file')
+
+    @override_settings(API_SNAPSHOT_MAX_AGE=30)
+    def test_serves_snapshot_files_with_validators(self):
+        manifest = snapshot.export()
+        view = snapshot.serve_snapshot('projects/{pk}/', lambda request, pk: HttpResponse('live'))
+        factory = RequestFactory()
+        request = factory.get('/api/projects/1/', HTTP_ACCEPT_ENCODING='gzip')
+        response = view(request, pk=self.project.pk)
+        name = manifest[f'projects/{self.project.pk}/']
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Cache-Control'], 'max-age=30, public')
+        self.assertEqual(response['Content-Location'], f'/static/api/{name}')
+        request = factory.get('/', HTTP_IF_NONE_MATCH=response['ETag'])
+        revalidated = view(request, pk=self.project.pk)
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(view(factory.get('/?fields=id'), pk=self.project.pk).content, b'live')
+        self.assertEqual(view(factory.get('/'), pk=0).content, b'live')
+
+        hashed = snapshot.snapshot_file(factory.get('/'), name)
+        self.assertIn('immutable', hashed['Cache-Control'])
+        self.assertEqual(
+            b''.join(hashed.streaming_content),
+            self.read(f'projects/{self.project.pk}/', manifest),
+        )
+        with self.assertRaises(Http404):
+            snapshot.snapshot_file(factory.get('/'), '../manifest.json')
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class StampedeProtectionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('projects:portfolio-stats')
+        Project.objects.create(title='Portfolio', description='Site', technologies='Django')
+        self.key = response_key('portfolio-stats', [Project], RequestFactory().get(self.url))
+
+    def counts(self):
+        return stats.totals(['portfolio-stats'], ('stale', 'coalesced', 'early-refresh'))[
+            'portfolio-stats'
+        ]
+
+    def test_concurrent_miss_is_served_stale_with_its_own_validators(self):
+        before = self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Project.objects.create(title='Second', description='Site')
+        fresh_key = response_key('portfolio-stats', [Project], RequestFactory().get(self.url))
+        cache.add(LOCK_KEY.format(fresh_key), 1)  # another worker is rebuilding
+
+        with self.assertNumQueries(1):  # only the conditional GET validators
+            response = self.client.get(self.url)
+        self.assertEqual(response.json(), before.json())
+        self.assertEqual(response['ETag'], before['ETag'])
+        self.assertEqual(self.counts()['stale'], 1)
+
+    def test_concurrent_cold_miss_waits_for_the_rebuild(self):
+        cache.add(LOCK_KEY.format(self.key), 1)
+        entry = CacheEntry({'total_projects': 1, 'featured_projects': 0}, {}, 60, 0.01)
+        with mock.patch('time.sleep', side_effect=lambda _: cache.set(self.key, entry)):
+            response = self.client.get(self.url)
+        self.assertEqual(response.json(), entry.data)
+        self.assertEqual(self.counts()['coalesced'], 1)
+
+    def test_hits_keep_the_validators_of_their_entry(self):
+        data = {'total_projects': 1, 'featured_projects': 0}
+        headers = {'ETag': '"rendered"', 'Last-Modified': 'Thu, 01 Jan 2026 00:00:00 GMT'}
+
+        def served(entry):
+            cache.set(self.key, entry)
+            response = self.client.get(self.url)
+            self.assertEqual(response.json(), data)
+            self.assertEqual(response['ETag'], headers['ETag'])
+            self.assertEqual(response['Last-Modified'], headers['Last-Modified'])
+
+        with self.subTest('fresh'):
+            served(CacheEntry(data, headers, 60, 0.01))
+        cache.add(LOCK_KEY.format(self.key), 1)  # another worker is rebuilding
+        with self.subTest('refreshing elsewhere'):
+            expired = CacheEntry(data, headers, 60, 0.01)
+            expired.expires = 0
+            served(expired)
+        with self.subTest('coalesced'):
+            entry = CacheEntry(data, headers, 60, 0.01)
+            cache.delete(self.key)
+            with mock.patch('time.sleep', side_effect=lambda _: cache.set(self.key, entry)):
+                response = self.client.get(self.url)
+            self.assertEqual(response['ETag'], headers['ETag'])
+        with self.subTest('async'):
+            response = async_to_sync(async_views.portfolio_stats)(AsyncRequestFactory().get(self.url))
+            self.assertEqual(json.loads(response.content), data)
+            self.assertEqual(response['ETag'], headers['ETag'])
+
+    def test_entries_are_refreshed_early_near_expiry(self):
+        self.client.get(self.url)
+        entry = cache.get(self.key)
+        self.assertFalse(entry.refresh_early(beta=0))
+        entry.expires = 0
+        self.assertTrue(entry.refresh_early())
+        cache.set(self.key, entry)
+        self.client.get(self.url)
+        self.assertEqual(self.counts()['early-refresh'], 1)
+        self.assertGreater(cache.get(self.key).expires, 0)
+
+
+REDIS_TEST_CACHES = {
+    'default': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': os.environ.get('REDIS_URL', 'redis://localhost:6379/0'),
+        'KEY_PREFIX': 'two-tier-tests',
+    },
+}
+
+
+class LocalCacheTests(TestCase):
+    def test_evicts_least_recently_used_and_expired_entries(self):
+        local = LocalCache(maxsize=2, ttl=60)
+        local.set('a', 1)
+        local.set('b', 2)
+        local.get('a')
+        local.set('c', 3)
+        self.assertEqual((local.get('a'), local.get('b'), local.get('c')), (1, None, 3))
+        with mock.patch('time.monotonic', return_value=time.monotonic() + 61):
+            self.assertIsNone(local.get('a'))
+
+    def test_values_fetched_before_an_invalidation_are_not_stored(self):
+        local = LocalCache(maxsize=2, ttl=60)
+        epoch = local.epoch
+        local.clear()
+        local.set('a', 1, epoch)
+        self.assertIsNone(local.get('a'))
+
+
+@override_settings(CACHES=REDIS_TEST_CACHES)
+class TwoTierCacheTests(TestCase):
+    def setUp(self):
+        try:
+            cache.delete_pattern('*')
+        except RedisError:
+            self.skipTest('Redis is not reachable')
+        self.addCleanup(cache.delete_pattern, '*')
+        cache_module.l1_enabled()
+        self.assertTrue(cache_module.listener.subscribed.wait(5))
+        cache_module.local.clear()
+        self.url = reverse('projects:portfolio-stats')
+        Project.objects.create(title='Portfolio', description='Site')
+
+    @override_settings(SERVER_TIMING=True)
+    def test_hot_requests_are_served_from_process_memory(self):
+        self.client.get(self.url)
+        key = response_key('portfolio-stats', [Project], RequestFactory().get(self.url))
+        with mock.patch.object(cache, 'get', side_effect=AssertionError('L2 lookup')), \
+                mock.patch.object(cache, 'get_many', side_effect=AssertionError('L2 lookup')):
+            response = self.client.get(self.url)
+        self.assertEqual(response.json()['total_projects'], 1)
+        self.assertIn('l1-hit', response['Server-Timing'])
+        self.assertIsNotNone(cache_module.local.get(key))
+
+    def test_changes_are_visible_immediately(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Project.objects.create(title='Second', description='Site')
+        self.assertEqual(self.client.get(self.url).json()['total_projects'], 2)
+
+    async def test_async_active_resume_lookup_fills_l1(self):
+        self.assertIsNone(await Resume.aget_active())
+        with mock.patch.object(cache, 'aget', side_effect=AssertionError('L2 lookup')), \
+                mock.patch.object(cache, 'aget_many', side_effect=AssertionError('L2 lookup')):
+            self.assertIsNone(await Resume.aget_active())
+
+    def test_invalidations_from_other_processes_clear_l1(self):
+        self.client.get(self.url)
+        self.assertTrue(len(cache_module.local))
+        cache_module.redis_client().publish(cache_module.INVALIDATION_CHANNEL, b'another-worker')
+        deadline = time.monotonic() + 5
+        while len(cache_module.local) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(len(cache_module.local), 0)
+
+
+def png_bytes(width=40, height=30):
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), 'teal').save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+@override_settings(CACHES=LOCMEM_CACHES, MEDIA_BACKEND='projects.media_jobs.LocalMediaBackend')
+class MediaJobTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        staging = tempfile.TemporaryDirectory()
+        self.addCleanup(staging.cleanup)
+        self.enterContext(override_settings(MEDIA_STAGING_ROOT=staging.name))
+        self.project = Project.objects.create(title='Portfolio', description='Site')
+
+    def test_admin_uploads_are_queued_instead_of_uploaded_in_the_request(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'a@example.com', 'pw'))
+        upload = SimpleUploadedFile('shot.png', png_bytes(), content_type='image/png')
+        with mock.patch('cloudinary.uploader.upload_resource', side_effect=AssertionError('upload')):
+            response = self.client.post(
+                reverse('admin:projects_project_change', args=[self.project.pk]),
+                {'title': 'Portfolio', 'description': 'Site', 'image': upload, 'order': 0},
+            )
+        self.assertEqual(response.status_code, 302)
+        job = MediaJob.objects.get()
+        self.assertEqual((job.kind, job.object_id, job.status), ('project-image', self.project.pk, 'pending'))
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.image_status, 'queued')
+        self.assertFalse(self.project.image)
+
+    def test_new_active_resume_goes_live_once_its_file_is_ready(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            current = Resume.objects.create(title='Current', file='resumes/current.pdf')
+        self.client.force_login(User.objects.create_superuser('admin', 'a@example.com', 'pw'))
+        upload = SimpleUploadedFile('cv.pdf', b'%PDF-1.4', content_type='application/pdf')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('admin:projects_resume_add'),
+                {'title': 'New', 'file': upload, 'is_active': 'on'},
+            )
+        self.assertEqual(response.status_code, 302)
+        added = Resume.objects.get(title='New')
+        self.assertFalse(added.is_active)
+        self.assertTrue(MediaJob.objects.get().activate)
+        # The current resume is still the one served meanwhile
+        self.assertEqual(Resume.get_active(), current)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('process_media', '--once', stdout=io.StringIO())
+        added.refresh_from_db()
+        current.refresh_from_db()
+        self.assertTrue(added.is_active)
+        self.assertFalse(current.is_active)
+        self.assertEqual(added.file_status, 'ready')
+        self.assertEqual(Resume.get_active(), added)
+
+    def test_worker_uploads_and_records_metadata(self):
+        data = png_bytes(40, 30)
+        job = media_jobs.enqueue(self.project, 'image', SimpleUploadedFile('shot.png', data))
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('process_media', '--once', stdout=io.StringIO())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, MediaJob.DONE)
+        self.assertFalse(job.upload)
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.image.public_id, 'projects/shot')
+        self.assertEqual((self.project.image_width, self.project.image_height), (40, 30))
+        self.assertEqual(self.project.image_bytes, len(data))
+        self.assertEqual(self.project.image_checksum, hashlib.sha256(data).hexdigest())
+        self.assertEqual(self.project.image_status, 'ready')
+        # The signals refreshed the read model
+        detail = self.client.get(reverse('projects:project-detail', args=[self.project.pk])).json()
+        self.assertIn('projects/shot', detail['image'])
+
+    def test_failures_are_retried_then_marked_failed(self):
+        media_jobs.enqueue(self.project, 'image', SimpleUploadedFile('shot.png', png_bytes()))
+        backend = mock.Mock(**{'upload.side_effect': OSError('Cloudinary is down')})
+        for attempt in range(1, 4):
+            job = media_jobs.process(media_jobs.claim(), backend)
+            self.assertEqual(job.attempts, attempt)
+        self.assertEqual(job.status, MediaJob.FAILED)
+        self.assertIn('Cloudinary is down', job.error)
+        self.assertIsNone(media_jobs.claim())
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.image_status, 'failed')
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class BulkUpdateTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.projects = [
+            Project.objects.create(title=f'Project {i}', description='Site', order=i)
+            for i in range(3)
+        ]
+
+    def updates(self, queries):
+        return [q['sql'] for q in queries.captured_queries if q['sql'].startswith('UPDATE "projects_project"')]
+
+    def test_changes_are_written_in_one_statement(self):
+        first, second, third = self.projects
+        with CaptureQueriesContext(connection) as queries:
+            updated = bulk.apply_changes({
+                first.pk: {'order': 2, 'featured': True},
+                third.pk: {'order': 0},
+            })
+        self.assertEqual(updated, 2)
+        self.assertEqual(len(self.updates(queries)), 1)
+        rows = {p.pk: (p.order, p.featured) for p in Project.objects.all()}
+        self.assertEqual(rows, {first.pk: (2, True), second.pk: (1, False), third.pk: (0, False)})
+
+    def test_endpoint_requires_admin_and_validates_ids(self):
+        url = reverse('projects:project-bulk-update')
+        payload = {'changes': [{'id': self.projects[0].pk, 'featured': True}]}
+        self.assertEqual(self.client.post(url, payload, content_type='application/json').status_code, 403)
+
+        self.client.force_login(User.objects.create_superuser('admin', 'a@example.com', 'pw'))
+        response = self.client.post(url, {'changes': [{'id': 0, 'order': 1}]}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, payload, content_type='application/json')
+        self.assertEqual(response.json(), {'updated': 1})
+        listing = self.client.get(reverse('projects:featured-projects')).json()
+        self.assertEqual([p['id'] for p in listing], [self.projects[0].pk])
+
+    def test_changelist_save_is_one_update(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'a@example.com', 'pw'))
+        data = {
+            'form-TOTAL_FORMS': '3', 'form-INITIAL_FORMS': '3', '_save': 'Save',
+        }
+        for index, project in enumerate(Project.objects.order_by('order', '-created_at')):
+            data.update({
+                f'form-{index}-id': project.pk,
+                f'form-{index}-order': 2 - project.order,
+                f'form-{index}-featured': 'on',
+            })
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('admin:projects_project_changelist'), data)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(len(self.updates(queries)), 1)
+        self.assertEqual(
+            [(p.order, p.featured) for p in Project.objects.order_by('pk')],
+            [(2, True), (1, True), (0, True)],
+        )
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TransferCommandTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        for i in range(5):
+            Project.objects.create(
+                title=f'Project {i}', description='Line one\nline "two", three',
+                technologies='Django, Redis', featured=i % 2 == 0, order=i,
+            )
+        Project.objects.update(created_at=datetime(2024, 1, 1, tzinfo=dt_timezone.utc))
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def rows(self):
+        return list(Project.objects.order_by('pk').values_list(
+            'pk', 'title', 'description', 'featured', 'order', 'created_at'
+        ))
+
+    def test_round_trip_upserts_and_keeps_timestamps(self):
+        for name in ('projects.jsonl', 'projects.csv'):
+            with self.subTest(name):
+                expected = self.rows()
+                call_command('export_projects', self.path(name), '--chunk-size', '2', stdout=io.StringIO())
+                Project.objects.filter(pk=expected[0][0]).update(title='Edited')
+                Project.objects.filter(pk=expected[-1][0]).delete()
+                with self.captureOnCommitCallbacks(execute=True):
+                    call_command('import_projects', self.path(name), '--batch-size', '2', stdout=io.StringIO())
+                self.assertEqual(self.rows(), expected)
+                self.assertFalse(os.path.exists(self.path(name) + '.checkpoint'))
+        # Imported rows are indexed and served
+        self.assertEqual(Project.objects.filter(tech_stack__key='redis').count(), 5)
+        self.assertEqual(len(self.client.get(reverse('projects:project-list')).json()), 5)
+        created = Project.objects.create(title='New', description='Site')
+        self.assertGreater(created.pk, expected[-1][0])
+
+    def test_jsonl_without_orjson(self):
+        Project.objects.filter(pk=self.rows()[0][0]).update(title='Café ☕')
+        call_command('export_projects', self.path('orjson.jsonl'), stdout=io.StringIO())
+        expected = self.rows()
+        with mock.patch.object(transfer, 'orjson', None):
+            call_command('export_projects', self.path('json.jsonl'), stdout=io.StringIO())
+            Project.objects.all().delete()
+            with self.captureOnCommitCallbacks(execute=True):
+                call_command('import_projects', self.path('json.jsonl'), stdout=io.StringIO())
+        self.assertEqual(self.rows(), expected)
+        with open(self.path('orjson.jsonl'), 'rb') as fast, open(self.path('json.jsonl'), 'rb') as plain:
+            self.assertEqual(fast.read(), plain.read())
+
+    def test_interrupted_export_resumes_from_checkpoint(self):
+        call_command('export_projects', self.path('full.jsonl'), stdout=io.StringIO())
+        export_rows = transfer.export_rows
+
+        def interrupted(*args, **kwargs):
+            rows = export_rows(*args, **kwargs)
+            yield next(rows)
+            raise KeyboardInterrupt
+
+        with mock.patch.object(transfer, 'export_rows', interrupted):
+            with self.assertRaisesMessage(CommandError, 'Interrupted after 2 rows'):
+                call_command('export_projects', self.path('partial.jsonl'), '--chunk-size', '2')
+        call_command('export_projects', self.path('partial.jsonl'), '--resume', stdout=io.StringIO())
+        with open(self.path('full.jsonl'), 'rb') as full, open(self.path('partial.jsonl'), 'rb') as partial:
+            self.assertEqual(partial.read(), full.read())
+
+    def test_import_resumes_and_seeds_rows_without_ids(self):
+        with open(self.path('seed.jsonl'), 'w') as fh:
+            for i in range(4):
+                fh.write(json.dumps({'title': f'Seed {i}', 'description': 'Generated'}) + '\n')
+        transfer.Checkpoint(self.path('seed.jsonl')).save(model='projects', format='jsonl', rows=1)
+        out = io.StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('import_projects', self.path('seed.jsonl'), '--resume', stdout=out)
+        self.assertIn('Imported 3 projects', out.getvalue())
+        seeded = Project.objects.filter(description='Generated')
+        self.assertEqual(sorted(seeded.values_list('title', flat=True)), ['Seed 1', 'Seed 2', 'Seed 3'])
+        self.assertTrue(all(project.created_at for project in seeded))
+
+    def test_resumes_keep_a_single_active_one(self):
+        Resume.objects.create(title='Current', file='resume/current.pdf')
+        with open(self.path('resumes.jsonl'), 'w') as fh:
+            for i in range(3):
+                fh.write(json.dumps({'title': f'Old {i}', 'file': f'raw/upload/resume/{i}.pdf', 'is_active': True}) + '\n')
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('import_projects', self.path('resumes.jsonl'), '--model', 'resumes', stdout=io.StringIO())
+        self.assertEqual(Resume.get_active().title, 'Old 2')
+        with self.assertRaisesMessage(CommandError, 'Unknown projects columns: file, is_active'):
+            call_command('import_projects', self.path('resumes.jsonl'))
+
+
+@override_settings(CACHES=LOCMEM_CACHES, STREAMING_CHUNK_SIZE=2)
+class StreamingListTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        for i in range(5):
+            Project.objects.create(
+                title=f'Project \u2028{i}', description='Site', short_description='Caf\u00e9',
+                technologies='Django, Redis', featured=i % 2 == 0, order=i,
+            )
+
+    def fetch(self, url, streamed, **headers):
+        cache.clear()
+        with override_settings(STREAMING_JSON=streamed):
+            response = self.client.get(url, **headers)
+        self.assertEqual(response.streaming, streamed)
+        return response, b''.join(response) if streamed else response.content
+
+    def test_streamed_body_is_byte_identical(self):
+        base = reverse('projects:project-list')
+        for fast in (False, True):
+            for url in (base, base + '?featured=true', base + '?fields=id,title', base + '?search=none'):
+                renderers = [FastJSONRenderer if fast else JSONRenderer]
+                with self.subTest(url=url, fast=fast), override_settings(FAST_JSON=fast), \
+                        mock.patch.object(views.ProjectListView, 'renderer_classes', renderers), \
+                        mock.patch('rest_framework.settings.api_settings.DEFAULT_RENDERER_CLASSES', renderers):
+                    buffered, expected = self.fetch(url, False)
+                    streamed, body = self.fetch(url, True)
+                    self.assertEqual(body, expected)
+                    self.assertEqual(streamed['Content-Type'], buffered['Content-Type'])
+                    self.assertEqual(streamed['ETag'], buffered['ETag'])
+
+        response, body = self.fetch(base, True, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(body), self.fetch(base, False)[1])
+
+    def test_empty_and_indented_listings(self):
+        url = reverse('projects:project-list')
+        Project.objects.all().delete()
+        self.assertEqual(self.fetch(url, True)[1], b'[]')
+        with override_settings(STREAMING_JSON=True):
+            response = self.client.get(url, HTTP_ACCEPT='application/json; indent=2')
+        self.assertFalse(response.streaming)
+
+    async def test_async_view_streams_without_buffering(self):
+        expected = (await self.async_client.get(reverse('projects:project-list'))).content
+        with override_settings(STREAMING_JSON=True):
+            response = await async_views.project_list(AsyncRequestFactory().get('/api/projects/'))
+            self.assertTrue(response.is_async)
+            body = b''.join([piece async for piece in response])
+        self.assertEqual(body, expected)
+
+    def test_concurrent_streamed_listings_skip_the_cache_lock(self):
+        url = reverse('projects:project-list')
+        respond = streaming.json_array_response
+        bodies, requests = [], []
+
+        def json_array_response(request, serializer):
+            requests.append(request)
+            if len(requests) == 1:
+                # A second request arrives while the first one is in the view
+                bodies.append(b''.join(self.client.get(url)))
+            return respond(request, serializer)
+
+        stats.flush()
+        cache.clear()
+        with override_settings(STREAMING_JSON=True), \
+                mock.patch.object(streaming, 'json_array_response', json_array_response), \
+                mock.patch.object(cache_module, '_wait_for', return_value=None) as wait_for:
+            bodies.append(b''.join(self.client.get(url)))
+        wait_for.assert_not_called()
+        self.assertEqual(bodies, [self.fetch(url, False)[1]] * 2)
+        self.assertEqual(stats.totals(['project-list'], ('bypass',))['project-list']['bypass'], 2)
+
+    def test_rows_are_read_with_a_cursor(self):
+        serializer = ProjectListSerializer(Project.objects.all(), many=True)
+        with mock.patch('django.db.models.query.QuerySet.iterator', autospec=True,
+                        side_effect=lambda qs, chunk_size: iter(list(qs))) as iterator:
+            items = list(streaming.representations(serializer))
+        iterator.assert_called_once()
+        self.assertEqual(items, ProjectListSerializer(Project.objects.all(), many=True).data)
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHES,
+    SIGNED_URL_BACKEND='projects.media.LocalURLSigner',
+    SIGNED_URL_TTL=3600,
+    SIGNED_URL_REFRESH=300,
+    RESUME_DOWNLOAD_FILENAME='R\u00e9sum\u00e9.pdf',
+)
+class ResumeDownloadTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        media._urls.clear()
+        self.resume = Resume.objects.create(title='Current', file='raw/upload/v1/resumes/cv.pdf')
+        self.resume.refresh_from_db()
+        self.url = reverse('projects:resume-download')
+
+    def test_redirects_to_a_signed_url(self):
+        with mock.patch('time.time', return_value=1_000_000):
+            response = self.client.get(self.url, {'redirect': ''})
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(response['Location'].startswith('/media/local/resumes/cv.pdf?expires_at=1003600&'))
+        self.assertIn('filename=R%C3%A9sum%C3%A9.pdf', response['Location'])
+        self.assertIn('signature=', response['Location'])
+        # Browsers follow the redirect without reading its headers
+        self.assertFalse(response.has_header('Content-Disposition'))
+        self.assertIn('max-age=3300', response['Cache-Control'])
+        self.assertIn('s-maxage=3300', response['Cache-Control'])
+        self.assertIn('public', response['Cache-Control'])
+
+    def test_signed_url_is_reused_until_shortly_before_it_expires(self):
+        with mock.patch('time.time', return_value=1_000_000):
+            first = self.client.get(self.url).json()
+        self.assertEqual(first['expires_at'], '1970-01-12T14:46:40Z')
+        with mock.patch('time.time', return_value=1_003_000):
+            response = self.client.get(self.url)
+        self.assertEqual(response.json()['url'], first['url'])
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn(' max-age=300', response['Cache-Control'])
+        self.assertIn('s-maxage=300', response['Cache-Control'])
+        with mock.patch('time.time', return_value=1_003_400):
+            renewed = self.client.get(self.url).json()
+        self.assertNotEqual(renewed['url'], first['url'])
+        self.assertIn('expires_at=1007000', renewed['url'])
+
+        # A new file is signed afresh
+        self.resume.file = 'raw/upload/v2/resumes/cv-2.pdf'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.resume.save()
+        with mock.patch('time.time', return_value=1_003_400):
+            self.assertIn('resumes/cv-2.pdf', self.client.get(self.url).json()['url'])
+
+    def test_cloudinary_signer_names_the_attachment(self):
+        url = media.CloudinaryURLSigner().sign(self.resume.file, 1_003_600, 'R\u00e9sum\u00e9.pdf')
+        self.assertRegex(url, r'^https://res\.cloudinary\.com/[^/]+/raw/upload/s--[\w-]+--/')
+        self.assertIn('/fl_attachment:Resume/v1/resumes/cv.pdf', url)
+
+        with override_settings(CLOUDINARY_AUTH_TOKEN_KEY='00112233'):
+            url = media.CloudinaryURLSigner().sign(self.resume.file, 1_003_600, 'My CV.pdf')
+        self.assertIn('/fl_attachment:My_CV/v1/resumes/cv.pdf?__cld_token__=exp=1003600~hmac=', url)
+
+    def test_cloudinary_signer_uses_the_download_api_for_restricted_files(self):
+        self.resume.file.type = 'authenticated'
+        url = media.CloudinaryURLSigner().sign(self.resume.file, 1_003_600, 'R\u00e9sum\u00e9.pdf')
+        self.assertTrue(url.startswith('https://api.cloudinary.com/v1_1/'))
+        self.assertIn('/raw/download?', url)
+        self.assertIn('expires_at=1003600', url)
+        self.assertIn('public_id=resumes%2Fcv&format=pdf', url)
+        self.assertIn('attachment=1', url)
+
+    def test_missing_resume_is_404(self):
+        self.resume.delete()
+        self.assertEqual(self.client.get(self.url, {'redirect': ''}).status_code, 404)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ActiveResumeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_activating_a_resume_deactivates_the_previous_one(self):
+        first = Resume.objects.create(title='First', file='resume/first.pdf')
+        second = Resume.objects.create(title='Second', file='resume/second.pdf')
+        self.assertEqual(list(Resume.objects.filter(is_active=True)), [second])
+        first.is_active = True
+        first.save()
+        self.assertEqual(list(Resume.objects.filter(is_active=True)), [first])
+
+    def test_database_rejects_a_second_active_resume(self):
+        Resume.objects.create(title='First', file='resume/first.pdf')
+        second = Resume.objects.create(title='Second', file='resume/second.pdf', is_active=False)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Resume.objects.filter(pk=second.pk).update(is_active=True)
+
+    def test_admin_can_activate_another_resume(self):
+        first = Resume.objects.create(title='First', file='resume/first.pdf', is_active=False)
+        Resume.objects.create(title='Second', file='resume/second.pdf')
+        self.client.force_login(User.objects.create_superuser('admin', 'a@example.com', 'pw'))
+        response = self.client.post(
+            reverse('admin:projects_resume_change', args=[first.pk]),
+            {'title': 'First', 'file': 'resume/first.pdf', 'is_active': 'on'},
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Resume.objects.get(is_active=True), first)
+
+    def test_saves_that_leave_is_active_alone_keep_the_active_resume(self):
+        first = Resume.objects.create(title='First', file='resume/first.pdf')
+        Resume.objects.create(title='Second', file='resume/second.pdf')
+        first.is_active = True  # stale in-memory value
+        first.title = 'Renamed'
+        first.save(update_fields=['title'])
+        self.assertEqual(Resume.objects.get(is_active=True).title, 'Second')
+
+    def test_active_lookup_is_cached_until_a_resume_changes(self):
+        self.assertIsNone(Resume.get_active())
+        with self.assertNumQueries(0):
+            self.assertIsNone(Resume.get_active())
+        with self.captureOnCommitCallbacks(execute=True):
+            resume = Resume.objects.create(title='CV', file='resume/cv.pdf')
+        self.assertEqual(Resume.get_active(), resume)
+        with self.assertNumQueries(0):
+            self.assertEqual(Resume.get_active(), resume)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class BootCommandTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        static_root = tempfile.TemporaryDirectory()
+        self.addCleanup(static_root.cleanup)
+        self.enterContext(override_settings(STATIC_ROOT=static_root.name))
+
+    def boot(self):
+        out = io.StringIO()
+        call_command('boot', stdout=out)
+        return out.getvalue()
+
+    def test_applied_migrations_and_unchanged_static_files_are_skipped(self):
+        first = self.boot()
+        self.assertIn('skipped, every migration is applied', first)
+        self.assertIn('collected', first)
+        self.assertTrue(User.objects.filter(username='admin', is_superuser=True).exists())
+
+        second = self.boot()
+        self.assertIn('skipped, static files unchanged', second)
+        self.assertIn('"admin" already exists', second)
+
+    def test_migrate_runs_when_the_database_lacks_a_migration(self):
+        applied = MigrationRecorder(connection).applied_migrations()
+        latest = max(key for key in applied if key[0] == 'projects')
+        del applied[latest]
+
+        def fake_migrate(name, *args, **options):
+            if name != 'migrate':
+                call_command(name, *args, **options)
+        with mock.patch.object(MigrationRecorder, 'applied_migrations', return_value=applied), \
+                mock.patch.object(boot, 'call_command', side_effect=fake_migrate) as called:
+            self.assertRegex(self.boot(), r'migrate +[0-9.]+s  applied')
+        self.assertIn('migrate', [call.args[0] for call in called.call_args_list])
+
+
+@override_settings(CACHES=LOCMEM_CACHES, SERVER_TIMING=True)
+class LeanMiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(User.objects.create_superuser('admin', 'a@example.com', 'pw'))
+
+    def test_api_reads_skip_session_auth_and_csrf(self):
+        response = self.client.get(reverse('projects:portfolio-stats'))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(hasattr(response.wsgi_request, 'session'))
+        # DRF authenticates without the session: anonymous despite the login
+        self.assertTrue(response.wsgi_request.user.is_anonymous)
+        self.assertIn('Server-Timing', response)
+
+    def test_admin_and_disabled_mode_keep_the_full_stack(self):
+        response = self.client.get(reverse('admin:index'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.wsgi_request.user.is_superuser)
+        with override_settings(LEAN_API_MIDDLEWARE=False):
+            response = self.client.get(reverse('projects:portfolio-stats'))
+        self.assertTrue(response.wsgi_request.user.is_superuser)
+
+    def test_staff_keep_server_timing_on_lean_requests(self):
+        url = reverse('projects:portfolio-stats')
+        with mock.patch.object(instrumentation, 'is_staff', wraps=instrumentation.is_staff) as checked:
+            self.assertIn('Server-Timing', self.client.get(url))
+        # Only looked up when the header isn't on for everyone
+        checked.assert_not_called()
+        with override_settings(SERVER_TIMING=False):
+            response = self.client.get(url)
+            self.assertIn('Server-Timing', response)
+            self.assertFalse(hasattr(response.wsgi_request, 'session'))
+            self.async_client.cookies = self.client.cookies
+            self.assertIn('Server-Timing', async_to_sync(self.async_client.get)(url))
+            self.client.logout()
+            self.assertNotIn('Server-Timing', self.client.get(url))
@@ -0,0 +1,149 @@
+"""
+Token-bucket throttles for the API.
+
+DRF's ``SimpleRateThrottle`` keeps a list of request timestamps per client
+and reads, trims and rewrites it on every request. These throttles keep a
+two-field bucket per client instead and refill/take a token in a single
+atomic Lua script, so a request costs one Redis round-trip and O(1) memory.
+
+Rates come from ``DEFAULT_THROTTLE_RATES``. A ``'<scope>:<route name>'``
+entry (e.g. ``'anon:projects:project-search': '30/minute'``) gives that
+route its own bucket and rate. Other cache backends store the bucket with
+a plain get/set, and while Redis is unreachable the buckets are kept in
+process instead.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import cache
+from redis.commands.core import Script
+from redis.exceptions import RedisError
+from rest_framework.throttling import AnonRateThrottle, SimpleRateThrottle, UserRateThrottle
+
+from .cache import redis_client
+
+# KEYS[1] bucket; ARGV capacity, refill rate (tokens/s). Returns
+# {allowed, seconds to wait} with the wait as a string (Lua numbers are
+# truncated to integers on the way out).
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate))
+return {allowed, tostring(wait)}
+"""
+
+
+def take_from(bucket, now, capacity, rate):
+    """
+    Refill ``bucket`` (``(tokens, timestamp)`` or None) to ``now`` and take a token.
+
+    Returns ``(allowed, seconds to wait, new bucket)``; mirrors the Lua script.
+    """
+    tokens, ts = bucket or (capacity, now)
+    tokens = min(capacity, tokens + max(0, now - ts) * rate)
+    if tokens >= 1:
+        return True, 0.0, (tokens - 1, now)
+    return False, (1 - tokens) / rate, (tokens, now)
+
+
+class LocalBuckets:
+    """In-process token buckets, used while Redis is unreachable"""
+
+    maxsize = 10000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()
+
+    def take(self, key, capacity, rate):
+        with self._lock:
+            allowed, wait, self._buckets[key] = take_from(
+                self._buckets.pop(key, None), time.monotonic(), capacity, rate
+            )
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        return allowed, wait
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+local_buckets = LocalBuckets()
+token_bucket = Script(None, TOKEN_BUCKET_SCRIPT.encode())
+
+
+def take_token(key, capacity, rate):
+    """Take a token from bucket ``key``; return ``(allowed, seconds to wait)``"""
+    client = redis_client()
+    if client is None:
+        # Other cache backends (local development, tests): not atomic, but
+        # still one small entry per client
+        allowed, wait, bucket = take_from(cache.get(key), time.time(), capacity, rate)
+        cache.set(key, bucket, math.ceil(capacity / rate))
+        return allowed, wait
+    try:
+        allowed, wait = token_bucket(
+            keys=[cache.make_key(key)], args=[capacity, rate], client=client
+        )
+    except RedisError:
+        return local_buckets.take(key, capacity, rate)
+    return bool(allowed), float(wait)
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """``SimpleRateThrottle`` rates and keys, enforced with a token bucket"""
+
+    def __init__(self):
+        # The rate depends on the route, so it's resolved per request
+        self.wait_seconds = None
+
+    def route_rate(self, request):
+        match = getattr(request, 'resolver_match', None)
+        if match is not None and match.view_name:
+            rate = self.THROTTLE_RATES.get(f'{self.scope}:{match.view_name}')
+            if rate is not None:
+                return rate, match.view_name
+        return self.get_rate(), None
+
+    def allow_request(self, request, view):
+        rate, route = self.route_rate(request)
+        if rate is None:
+            return True
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return True
+        if route is not None:
+            key = f'{key}:{route}'
+
+        num_requests, duration = self.parse_rate(rate)
+        allowed, self.wait_seconds = take_token(key, num_requests, num_requests / duration)
+        return allowed
+
+    def wait(self):
+        return self.wait_seconds or None
+
+
+class AnonTokenBucketThrottle(TokenBucketThrottle, AnonRateThrottle):
+    """Token-bucket ``AnonRateThrottle``: unauthenticated clients by IP"""
+
+
+class UserTokenBucketThrottle(TokenBucketThrottle, UserRateThrottle):
+    """Token-bucket ``UserRateThrottle``: users by id, others by IP"""
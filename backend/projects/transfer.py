@@ -0,0 +1,347 @@
+"""
+Bulk export and import of projects and resumes.
+
+``manage.py export_projects`` and ``import_projects`` stream JSONL or CSV
+in constant memory. Exports read rows in primary-key order with
+``.iterator()``; imports upsert them on the primary key in batches with
+``bulk_create(update_conflicts=True)``, so a file can be loaded over
+existing data, and loaded again, safely. On PostgreSQL CSV exports and
+every import batch go through ``COPY`` instead. Both commands save a
+checkpoint after each batch and continue from it with ``--resume``.
+
+Imported rows skip the model signals; the search index, caches, read
+model and API snapshot are refreshed for them in bulk.
+"""
+import csv
+import io
+import json
+import os
+from contextlib import contextmanager
+from datetime import datetime
+from itertools import islice
+
+from django.conf import settings
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import read_model, search, snapshot
+from .cache import invalidate
+from .models import Project, Resume
+
+try:
+    import orjson
+except ImportError:  # JSON lines fall back to the json module
+    orjson = None
+
+MODELS = {'projects': Project, 'resumes': Resume}
+FORMATS = ('jsonl', 'csv')
+# Rebuilt after an import instead of being carried in the file
+DERIVED_FIELDS = {'search_vector'}
+COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+
+def transfer_fields(model):
+    """The concrete fields carried in export files, primary key first"""
+    return [field for field in model._meta.concrete_fields if field.name not in DERIVED_FIELDS]
+
+
+def guess_format(path):
+    return 'csv' if path.lower().endswith('.csv') else 'jsonl'
+
+
+def dump_value(field, value):
+    """``value`` as written to a file: JSON scalars and ISO 8601 datetimes"""
+    value = field.get_prep_value(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def dump_record(record):
+    """``record`` as one line of compact JSON, the same with or without orjson"""
+    if orjson is not None:
+        return orjson.dumps(record).decode()
+    return json.dumps(record, ensure_ascii=False, separators=(',', ':'))
+
+
+def load_record(line):
+    if orjson is not None:
+        return orjson.loads(line)
+    return json.loads(line)
+
+
+def load_value(field, value):
+    """Inverse of ``dump_value``; also takes CSV strings and PostgreSQL's COPY output"""
+    if value is None or value == '':
+        if field.null:
+            return None
+        return '' if field.empty_strings_allowed else field.get_default()
+    return field.to_python(value)
+
+
+class Checkpoint:
+    """Progress of a transfer, kept next to its file as ``<path>.checkpoint``"""
+
+    def __init__(self, path):
+        self.path = f'{path}.checkpoint'
+
+    def load(self):
+        try:
+            with open(self.path) as fh:
+                return json.load(fh)
+        except FileNotFoundError:
+            return None
+
+    def save(self, **state):
+        # Replaced atomically, so an interruption never leaves half a checkpoint
+        temporary = f'{self.path}.tmp'
+        with open(temporary, 'w') as fh:
+            json.dump(state, fh)
+        os.replace(temporary, self.path)
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def export_rows(model, fh, format, after=0, chunk_size=2000, header=True):
+    """
+    Write the rows with a primary key above ``after`` to binary file ``fh``.
+
+    Yields ``(last primary key, rows written)`` after each chunk, once the
+    chunk has been flushed to ``fh``.
+    """
+    fields = transfer_fields(model)
+    names = [field.attname for field in fields]
+    if format == 'csv' and connection.vendor == 'postgresql':
+        yield from _copy_out(model, names, fh, after, chunk_size, header)
+        return
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    if format == 'csv' and header:
+        writer.writerow(names)
+    rows = (
+        model.objects.filter(pk__gt=after).order_by('pk')
+        .values_list(*names).iterator(chunk_size=chunk_size)
+    )
+    count = 0
+    for row in rows:
+        values = [dump_value(field, value) for field, value in zip(fields, row)]
+        if format == 'csv':
+            writer.writerow(values)
+        else:
+            buffer.write(dump_record(dict(zip(names, values))))
+            buffer.write('\n')
+        after = row[0]
+        count += 1
+        if count % chunk_size == 0:
+            _flush(buffer, fh)
+            yield after, count
+    if buffer.tell():
+        _flush(buffer, fh)
+        yield after, count
+
+
+def _flush(buffer, fh):
+    fh.write(buffer.getvalue().encode())
+    fh.flush()
+    buffer.seek(0)
+    buffer.truncate()
+
+
+def _copy_out(model, names, fh, after, chunk_size, header):
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    pk = quote(model._meta.pk.column)
+    columns = ', '.join(quote(name) for name in names)
+    options = 'FORMAT csv, HEADER' if header else 'FORMAT csv'
+    count = 0
+    with connection.cursor() as cursor:
+        while True:
+            cursor.execute(
+                f'SELECT MAX({pk}) FROM (SELECT {pk} FROM {table} WHERE {pk} > %s '
+                f'ORDER BY {pk} LIMIT %s) chunk',
+                [after, chunk_size],
+            )
+            upper = cursor.fetchone()[0]
+            if upper is None:
+                break
+            # COPY takes no parameters; both bounds are integers from the table
+            _copy(
+                cursor,
+                f'COPY (SELECT {columns} FROM {table} WHERE {pk} > {int(after)} '
+                f'AND {pk} <= {int(upper)} ORDER BY {pk}) TO STDOUT WITH ({options})',
+                fh,
+            )
+            fh.flush()
+            options = 'FORMAT csv'
+            count += cursor.rowcount
+            after = upper
+            yield after, count
+
+
+def read_records(fh, format):
+    """Yield the records of binary file ``fh`` as dicts keyed by column"""
+    if format == 'csv':
+        yield from csv.DictReader(io.TextIOWrapper(fh, encoding='utf-8', newline=''))
+        return
+    for line in fh:
+        if line.strip():
+            yield load_record(line)
+
+
+@contextmanager
+def file_timestamps(model):
+    """Keep the timestamps read from the file instead of auto_now/auto_now_add"""
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield fields
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def import_rows(model, records, columns, batch_size=1000):
+    """
+    Upsert ``records`` into ``model`` in transactions of ``batch_size`` rows.
+
+    Only ``columns`` are written to existing rows; new rows take the model
+    defaults, and the current time for timestamps, for the rest. Yields
+    the number of records imported after each batch commits. Call
+    ``finish_import()`` afterwards.
+    """
+    fields = {field.attname: field for field in transfer_fields(model)}
+    selected = [fields[column] for column in columns]
+    update_fields = [field.attname for field in selected if not field.primary_key]
+    count = 0
+    with file_timestamps(model) as timestamps:
+        records = iter(records)
+        while batch := list(islice(records, batch_size)):
+            now = timezone.now()
+            instances = []
+            for record in batch:
+                instance = model(**{
+                    field.attname: load_value(field, record.get(field.attname))
+                    for field in selected
+                })
+                for field in timestamps:
+                    if getattr(instance, field.attname) is None:
+                        setattr(instance, field.attname, now)
+                instances.append(instance)
+            with transaction.atomic():
+                if model is Resume:
+                    _single_active(instances, 'is_active' in columns)
+                _write(model, instances, update_fields)
+                if model is Project:
+                    search.index_projects(instances)
+            count += len(instances)
+            yield count
+
+
+def _single_active(resumes, has_active_column):
+    """Keep unique_active_resume: the last active resume imported wins"""
+    active = [resume for resume in resumes if resume.is_active and has_active_column]
+    for resume in resumes:
+        resume.is_active = bool(active) and resume is active[-1]
+    if active:
+        Resume.objects.filter(is_active=True).exclude(pk=active[-1].pk).update(is_active=False)
+
+
+def _write(model, instances, update_fields):
+    if connection.vendor == 'postgresql':
+        _copy_in(model, [instance for instance in instances if instance.pk is not None], update_fields)
+        instances = [instance for instance in instances if instance.pk is None]
+        if not instances:
+            return
+    if update_fields:
+        model.objects.bulk_create(
+            instances,
+            update_conflicts=True,
+            unique_fields=[model._meta.pk.name],
+            update_fields=update_fields,
+        )
+    else:
+        model.objects.bulk_create(instances, ignore_conflicts=True)
+
+
+def _copy_in(model, instances, update_fields):
+    """Upsert through a ``COPY`` into a temporary table"""
+    if not instances:
+        return
+    quote = connection.ops.quote_name
+    table = model._meta.db_table
+    staging = quote(f'{table}_import')
+    fields = transfer_fields(model)
+    columns = ', '.join(quote(field.column) for field in fields)
+    buffer = io.StringIO()
+    for instance in instances:
+        buffer.write('\t'.join(
+            _copy_text(field.get_db_prep_save(field.pre_save(instance, True), connection))
+            for field in fields
+        ))
+        buffer.write('\n')
+    buffer.seek(0)
+    if update_fields:
+        assignments = ', '.join(
+            f'{quote(column)} = EXCLUDED.{quote(column)}'
+            for column in (model._meta.get_field(name).column for name in update_fields)
+        )
+        action = f'DO UPDATE SET {assignments}'
+    else:
+        action = 'DO NOTHING'
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE TEMPORARY TABLE IF NOT EXISTS {staging} '
+            f'(LIKE {quote(table)}) ON COMMIT DELETE ROWS'
+        )
+        _copy(cursor, f'COPY {staging} ({columns}) FROM STDIN', buffer)
+        cursor.execute(
+            f'INSERT INTO {quote(table)} ({columns}) SELECT {columns} FROM {staging} '
+            f'ON CONFLICT ({quote(model._meta.pk.column)}) {action}'
+        )
+
+
+def _copy(cursor, sql, fh):
+    """Run ``COPY ... TO STDOUT`` into, or ``COPY ... FROM STDIN`` from, ``fh``"""
+    cursor = cursor.cursor
+    if hasattr(cursor, 'copy_expert'):  # psycopg2
+        cursor.copy_expert(sql, fh)
+        return
+    # psycopg 3, used by the "pool" connection mode
+    with cursor.copy(sql) as copy:
+        if 'STDOUT' in sql:
+            for data in copy:
+                fh.write(data)
+        else:
+            while data := fh.read(64 * 1024):
+                copy.write(data)
+
+
+def _copy_text(value):
+    """``value`` in the text format of ``COPY``"""
+    if value is None:
+        return r'\N'
+    return str(value).translate(COPY_ESCAPES)
+
+
+def finish_import(model):
+    """Do once what the skipped signals would have done for every imported row"""
+    with connection.cursor() as cursor:
+        # Rows were inserted with explicit ids, past the sequence
+        for sql in connection.ops.sequence_reset_sql(no_style(), [model]):
+            cursor.execute(sql)
+    invalidate(model)
+    if model is Project:
+        read_model.rebuild_all()
+    if settings.API_SNAPSHOT:
+        snapshot.schedule_export(model)
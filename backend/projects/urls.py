@@ -1,13 +1,48 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
 app_name = 'projects'
 
+if settings.SERVER_MODE == 'asgi':
+    from . import async_views
+
+    project_list = async_views.project_list
+    project_detail = async_views.project_detail
+    featured_projects = async_views.featured_projects
+    search_projects = async_views.search_projects
+    portfolio_stats = async_views.portfolio_stats
+    download_resume = async_views.download_resume
+    resume_status = async_views.resume_status
+    home = async_views.home
+else:
+    project_list = views.ProjectListView.as_view()
+    project_detail = views.ProjectDetailView.as_view()
+    featured_projects = views.featured_projects
+    search_projects = views.search_projects
+    portfolio_stats = views.portfolio_stats
+    download_resume = views.download_resume
+    resume_status = views.resume_status
+    home = views.home
+
+if settings.API_SNAPSHOT:
+    from .snapshot import serve_snapshot
+
+    project_list = serve_snapshot('projects/', project_list)
+    project_detail = serve_snapshot('projects/{pk}/', project_detail)
+    featured_projects = serve_snapshot('projects/featured/', featured_projects)
+    portfolio_stats = serve_snapshot('stats/', portfolio_stats)
+    resume_status = serve_snapshot('resume/status/', resume_status)
+    home = serve_snapshot('home/', home)
+
 urlpatterns = [
-    path('projects/', views.ProjectListView.as_view(), name='project-list'),
-    path('projects/<int:pk>/', views.ProjectDetailView.as_view(), name='project-detail'),
-    path('projects/featured/', views.featured_projects, name='featured-projects'),
-    path('stats/', views.portfolio_stats, name='portfolio-stats'),
-    path('resume/download/', views.download_resume, name='resume-download'),
-    path('resume/status/', views.resume_status, name='resume-status'),
+    path('projects/', project_list, name='project-list'),
+    path('projects/<int:pk>/', project_detail, name='project-detail'),
+    path('projects/bulk/', views.bulk_update_projects, name='project-bulk-update'),
+    path('projects/featured/', featured_projects, name='featured-projects'),
+    path('projects/search/', search_projects, name='project-search'),
+    path('stats/', portfolio_stats, name='portfolio-stats'),
+    path('resume/download/', download_resume, name='resume-download'),
+    path('resume/status/', resume_status, name='resume-status'),
+    path('home/', home, name='home'),
 ]
@@ -1,19 +1,90 @@
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
 from rest_framework import generics
 from rest_framework.response import Response
-from rest_framework.decorators import api_view
-from django.http import Http404
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from django.db.models import Count, Q
+from django.http import Http404, HttpResponseRedirect
+from django.utils.cache import patch_cache_control
+from django.utils.decorators import method_decorator
+from .cache import cache_response
+from .conditional import (
+    active_resume_state,
+    conditional,
+    featured_projects_state,
+    home_state,
+    portfolio_stats_state,
+    project_detail_state,
+    project_list_state,
+)
+from .media import resource_url, signed_url
 from .models import Project, Resume
-from .serializers import ProjectSerializer, ProjectListSerializer
+from .pagination import ProjectKeysetPagination
+from . import bulk, search, streaming
+from .read_model import get_document, get_listing, serve_read_model
+from .serializers import (
+    ProjectBulkChangeSerializer,
+    ProjectListSerializer,
+    ProjectSerializer,
+    project_serializer,
+)
+
+
+def project_list_document(request, *args, **kwargs):
+    if settings.STREAMING_JSON:
+        return None
+    params = set(request.GET)
+    if not params:
+        return get_listing('all')
+    if params == {'featured'}:
+        return get_listing('featured')
+    return None
+
+
+def project_list_streams(request):
+    """Whether ``ProjectListView`` streams its response, which is never cached"""
+    return (
+        settings.STREAMING_JSON
+        and not ProjectKeysetPagination().requested(request)
+        and streaming.can_stream(request)
+    )
 
 
+def project_detail_document(request, pk, *args, **kwargs):
+    # Query parameters (?fields=) need the serializer
+    if request.GET:
+        return None
+    return get_document(pk)
+
+
+def featured_projects_document(request, *args, **kwargs):
+    if request.GET:
+        return None
+    return get_listing('featured-top3')
+
+
+@method_decorator(conditional(project_list_state), name='get')
+@method_decorator(serve_read_model('project-list', project_list_document), name='get')
+@method_decorator(
+    cache_response('project-list', [Project], bypass=project_list_streams), name='get'
+)
 class ProjectListView(generics.ListAPIView):
     """API view to list all projects"""
     
     queryset = Project.objects.all()
     serializer_class = ProjectListSerializer
+    pagination_class = ProjectKeysetPagination
     
+    def get_serializer_class(self):
+        return project_serializer(ProjectListSerializer)
+
     def get_queryset(self):
-        queryset = Project.objects.all()
+        # Card views never load the large description column
+        columns = ProjectListSerializer.model_fields(self.request)
+        queryset = Project.objects.only('id', 'order', 'created_at', *columns)
         featured = self.request.query_params.get('featured', None)
         
         if featured is not None:
@@ -21,54 +92,158 @@ class ProjectListView(generics.ListAPIView):
             
         return queryset
 
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = self.get_serializer(queryset, many=True)
+        if settings.STREAMING_JSON:
+            response = streaming.json_array_response(request, serializer)
+            if response is not None:
+                return response
+        return Response(serializer.data)
 
+
+@method_decorator(conditional(project_detail_state), name='get')
+@method_decorator(serve_read_model('project-detail', project_detail_document), name='get')
+@method_decorator(cache_response('project-detail', [Project]), name='get')
 class ProjectDetailView(generics.RetrieveAPIView):
     """API view to get a single project"""
     
     queryset = Project.objects.all()
     serializer_class = ProjectSerializer
 
+    def get_serializer_class(self):
+        return project_serializer(ProjectSerializer)
+
 
 @api_view(['GET'])
+@conditional(featured_projects_state)
+@serve_read_model('featured-projects', featured_projects_document)
+@cache_response('featured-projects', [Project])
 def featured_projects(request):
     """Get featured projects for homepage"""
     projects = Project.objects.filter(featured=True)[:3]
-    serializer = ProjectListSerializer(projects, many=True, context={'request': request})
+    serializer = project_serializer(ProjectListSerializer)(
+        projects, many=True, context={'request': request}
+    )
     return Response(serializer.data)
 
 
 @api_view(['GET'])
-def portfolio_stats(request):
-    """Get portfolio statistics"""
-    total_projects = Project.objects.count()
-    featured_projects = Project.objects.filter(featured=True).count()
-    
+@conditional(project_list_state)
+@cache_response('project-search', [Project])
+def search_projects(request):
+    """Full-text project search with technology facet counts"""
+    queryset = Project.objects.all()
+    text = request.query_params.get('q', '').strip()
+    if text:
+        queryset = search.search(queryset, text)
+    technologies = [
+        name.strip() for name in request.query_params.get('tech', '').split(',') if name.strip()
+    ]
+    queryset = search.filter_technologies(queryset, technologies)
+
+    columns = ProjectListSerializer.model_fields(request)
+    projects = queryset.only('id', *columns)
+    serializer = project_serializer(ProjectListSerializer)(
+        projects, many=True, context={'request': request}
+    )
     return Response({
-        'total_projects': total_projects,
-        'featured_projects': featured_projects,
+        'count': len(serializer.data),
+        'results': serializer.data,
+        'facets': search.technology_facets(queryset),
     })
 
 
+@api_view(['GET'])
+@conditional(portfolio_stats_state)
+@cache_response('portfolio-stats', [Project])
+def portfolio_stats(request):
+    """Get portfolio statistics"""
+    return Response(project_counts())
+
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def bulk_update_projects(request):
+    """Reorder and (un)feature many projects in one statement (staff only)"""
+    serializer = ProjectBulkChangeSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    return Response({'updated': bulk.apply_changes(serializer.to_changes())})
+
+
+def project_counts():
+    """Total and featured project counts in one conditional-aggregation query"""
+    return Project.objects.aggregate(
+        total_projects=Count('id'),
+        featured_projects=Count('id', filter=Q(featured=True)),
+    )
+
+
+def resume_status_data(resume):
+    return {
+        'available': bool(resume and resume.file),
+        'title': resume.title if resume else None,
+        'uploaded_at': resume.uploaded_at if resume else None,
+        'url': resource_url(resume.file) if resume else None
+    }
+
+
 @api_view(['GET'])
 def download_resume(request):
-    """Return Cloudinary URL of the active resume for download"""
-    resume = Resume.objects.filter(is_active=True).first()
+    """
+    Return a time-limited download URL of the active resume.
+
+    With ``?redirect`` the response is a 302 straight to the file, which
+    the signed URL names. The URL is memoized by ``signed_url()``, so
+    nothing here is response-cached; every visitor gets the same link,
+    so browsers and the CDN may cache either response until it is renewed.
+    """
+    resume = Resume.get_active()
     if not resume or not resume.file:
         raise Http404("Resume not found")
     
-    return Response({
-        "url": resume.file.url,
-        "filename": "Siri_Tech_Resume.pdf"
-    })
+    filename = settings.RESUME_DOWNLOAD_FILENAME
+    url, expires_at = signed_url(resume.file, filename)
+    if 'redirect' in request.query_params:
+        response = HttpResponseRedirect(url)
+    else:
+        response = Response({
+            "url": url,
+            "filename": filename,
+            "expires_at": datetime.fromtimestamp(expires_at, timezone.utc),
+        })
+    max_age = max(int(expires_at - time.time()) - settings.SIGNED_URL_REFRESH, 0)
+    patch_cache_control(response, public=True, max_age=max_age, s_maxage=max_age)
+    return response
 
 
 @api_view(['GET'])
+@conditional(active_resume_state)
+@cache_response('resume-status', [Resume])
 def resume_status(request):
     """Check if resume is available for download"""
-    resume = Resume.objects.filter(is_active=True).first()
+    resume = Resume.get_active()
+    return Response(resume_status_data(resume))
+
+
+@api_view(['GET'])
+@conditional(home_state)
+@cache_response('home', [Project, Resume])
+def home(request):
+    """Featured projects, stats and resume status for the homepage in one call"""
+    projects = Project.objects.filter(featured=True).only(
+        'id', *ProjectListSerializer.model_fields(None)
+    )[:3]
+    serializer = project_serializer(ProjectListSerializer)(
+        projects, many=True, context={'request': request}
+    )
+    resume = Resume.get_active()
     return Response({
-        'available': bool(resume and resume.file),
-        'title': resume.title if resume else None,
-        'uploaded_at': resume.uploaded_at if resume else None,
-        'url': resume.file.url if resume and resume.file else None
+        'featured_projects': serializer.data,
+        'stats': project_counts(),
+        'resume': resume_status_data(resume),
     })
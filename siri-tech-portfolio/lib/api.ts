@@ -8,6 +8,7 @@ export interface Project {
   github_url?: string
   live_url?: string
   image?: string
+  image_srcset?: string[]
   technologies: string
   technology_list: string[]
   featured: boolean
@@ -21,6 +22,19 @@ export interface PortfolioStats {
   featured_projects: number
 }
 
+export interface ResumeStatus {
+  available: boolean
+  title: string | null
+  uploaded_at: string | null
+  url: string | null
+}
+
+export interface HomeData {
+  featured_projects: Project[]
+  stats: PortfolioStats
+  resume: ResumeStatus
+}
+
 export async function fetchProjects(): Promise<Project[]> {
   try {
     const response = await fetch(`${API_BASE_URL}/projects/`)
@@ -72,3 +86,16 @@ export async function fetchPortfolioStats(): Promise<PortfolioStats> {
     return { total_projects: 0, featured_projects: 0 }
   }
 }
+
+export async function fetchHome(): Promise<HomeData | null> {
+  try {
+    const response = await fetch(`${API_BASE_URL}/home/`)
+    if (!response.ok) {
+      throw new Error("Failed to fetch homepage data")
+    }
+    return await response.json()
+  } catch (error) {
+    console.error("Error fetching homepage data:", error)
+    return null
+  }
+}